@@ -35,7 +35,12 @@ stats
 
 import sys
 
-from .geomrefdb import PostGISGeomRefDB, RtreeGeomRefDB, SQLiteGeomRefDB
+from .geomrefdb import (
+    PostGISGeomRefDB,
+    RtreeGeomRefDB,
+    SQLiteGeomRefDB,
+    STRtreeGeomRefDB,
+)
 
 
 if sys.version_info[:2] >= (3, 8):
@@ -2,10 +2,10 @@
 
 
 import abc
-from collections.abc import Sequence
 import multiprocessing as mp
 import signal
 
+from .comparefunc import _geoms_always_match
 from .stats import recall_score, precision_score, f1_score
 
 
@@ -35,99 +35,136 @@ class GeomRefDB(abc.ABC):
 
 
     def get_recall_score(self, geoms_iter, AOI_geom, geoms_EPSG,
-                         same_geoms_func):
-        if not isinstance(geoms_iter, Sequence):
-            geoms_iter = list(geoms_iter)
-        try:
-            tp_num = len(self.true_positives(geoms_iter,
-                                             geoms_epsg=geoms_EPSG,
-                                             geoms_match=same_geoms_func))
-        except TypeError:
-            tp_num = sum(1 for _ in self.true_positives(geoms_iter,
-                                                        geoms_epsg=geoms_EPSG,
-                                                        geoms_match=same_geoms_func))
-        try:
-            mg_num = len(self.missing_geometries(geoms_iter,
-                                                 aoi_geom=AOI_geom,
-                                                 geoms_epsg=geoms_EPSG,
-                                                 geoms_match=same_geoms_func))
-        except TypeError:
-            mg_num = sum(1 for _ in self.missing_geometries(geoms_iter,
-                                                            aoi_geom=AOI_geom,
-                                                            geoms_epsg=geoms_EPSG,
-                                                            geoms_match=same_geoms_func))
+                         same_geoms_func, **kwargs):
+        tp_num, _, mg_num = self._match_counts(geoms_iter, AOI_geom,
+                                               geoms_EPSG, same_geoms_func,
+                                               **kwargs)
         return recall_score(tp_num, mg_num)
 
 
-    def get_precision_score(self, geoms_iter, geoms_EPSG, same_geoms_func):
-        if not isinstance(geoms_iter, Sequence):
-            geoms_iter = list(geoms_iter)
-        try:
-            tp_num = len(self.true_positives(geoms_iter,
-                                             geoms_epsg=geoms_EPSG,
-                                             geoms_match=same_geoms_func))
-        except TypeError:
-            tp_num = sum(1 for _ in self.true_positives(geoms_iter,
-                                                        geoms_epsg=geoms_EPSG,
-                                                        geoms_match=same_geoms_func))
-        try:
-            fp_num = len(self.false_positives(geoms_iter,
-                                              geoms_epsg=geoms_EPSG,
-                                              geoms_match=same_geoms_func))
-        except TypeError:
-            fp_num = sum(1 for _ in self.false_positives(geoms_iter,
-                                                         geoms_epsg=geoms_EPSG,
-                                                         geoms_match=same_geoms_func))
+    def get_precision_score(self, geoms_iter, geoms_EPSG, same_geoms_func,
+                            **kwargs):
+        tp_num, fp_num, _ = self._match_counts(geoms_iter, None, geoms_EPSG,
+                                               same_geoms_func,
+                                               count_missing=False, **kwargs)
         return precision_score(tp_num, fp_num)
 
 
     def get_f1_score(self, geoms_iter, AOI_geom, geoms_EPSG,
-                     same_geoms_func):
-        if not isinstance(geoms_iter, Sequence):
-            geoms_iter = list(geoms_iter)
-        try:
-            tp_num = len(self.true_positives(geoms_iter,
-                                             geoms_epsg=geoms_EPSG,
-                                             geoms_match=same_geoms_func))
-        except TypeError:
-            tp_num = sum(1 for _ in self.true_positives(geoms_iter,
-                                                        geoms_epsg=geoms_EPSG,
-                                                        geoms_match=same_geoms_func))
-        try:
-            fp_num = len(self.false_positives(geoms_iter,
-                                              geoms_epsg=geoms_EPSG,
-                                              geoms_match=same_geoms_func))
-        except TypeError:
-            fp_num = sum(1 for _ in self.false_positives(geoms_iter,
-                                                         geoms_epsg=geoms_EPSG,
-                                                         geoms_match=same_geoms_func))
-        try:
-            mg_num = len(self.missing_geometries(geoms_iter,
-                                                 aoi_geom=AOI_geom,
-                                                 geoms_epsg=geoms_EPSG,
-                                                 geoms_match=same_geoms_func))
-        except TypeError:
-            mg_num = sum(1 for _ in self.missing_geometries(geoms_iter,
-                                                            aoi_geom=AOI_geom,
-                                                            geoms_epsg=geoms_EPSG,
-                                                            geoms_match=same_geoms_func))
-            return f1_score(tp_num, fp_num, mg_num)
-
-
-    def compare_full(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func):
-        if not isinstance(geoms_iter, Sequence):
-            geoms_iter = list(geoms_iter)
+                     same_geoms_func, **kwargs):
+        tp_num, fp_num, mg_num = self._match_counts(geoms_iter, AOI_geom,
+                                                    geoms_EPSG,
+                                                    same_geoms_func,
+                                                    **kwargs)
+        return f1_score(tp_num, fp_num, mg_num)
+
+
+    def _match_counts(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func,
+                      count_missing=True, **kwargs):
+        """ Return the numbers of true positives, false positives and
+        missing geometries (None if `count_missing` is False), without
+        keeping or yielding any geometry. Engines may override this
+        method to push the counting down to their database.
+        """
+        geoms_num = 0
+
+        def counted_geoms():
+            nonlocal geoms_num
+            for geom in geoms_iter:
+                geoms_num += 1
+                yield geom
+
+        matched_inputs, matched_refs = self._fused_comparison(
+            counted_geoms(), AOI_geom, geoms_EPSG, same_geoms_func, **kwargs
+        )
+        tp_num = len(matched_inputs)
+        mg_num = None
+        if count_missing:
+            mg_num = sum(1 for ref_key
+                         in self._aoi_reference_keys(AOI_geom, geoms_EPSG,
+                                                     **kwargs)
+                         if ref_key not in matched_refs)
+        return tp_num, geoms_num - tp_num, mg_num
+
+
+    @abc.abstractmethod
+    def _candidate_pairs(self, geoms, geoms_EPSG, **kwargs):
+        """ Yield the candidate pairs of input and reference geometries
+        as ``(input_index, reference_key, input_geom, reference_geom)``
+        tuples, with both geometries in the same spatial reference
+        system. ``reference_key`` uniquely identifies a reference
+        geometry of the GeomRefDB instance.
+        """
+
+
+    @abc.abstractmethod
+    def _aoi_reference_geoms(self, AOI_geom, geoms_EPSG, **kwargs):
+        """ Yield the reference geometries of the GeomRefDB instance that
+        intersect with the area of interest (all of them if `AOI_geom`
+        is None), as ``(reference_key, reference_geom)`` tuples, with
+        geometries as they would be yielded by `missing_geometries`.
+        """
+
+
+    def _aoi_reference_keys(self, AOI_geom, geoms_EPSG, **kwargs):
+        """ Yield the keys of the reference geometries yielded by
+        `_aoi_reference_geoms`. Engines should override this method to
+        avoid loading the geometries.
+        """
+        for ref_key, _ in self._aoi_reference_geoms(AOI_geom, geoms_EPSG,
+                                                    **kwargs):
+            yield ref_key
+
+
+    def _fused_comparison(self, geoms, AOI_geom, geoms_EPSG, same_geoms_func,
+                          **kwargs):
+        """ Evaluate each candidate pair of geometries once, and return
+        the indices of the matching input geometries, as well as the
+        keys of the matching reference geometries.
+        """
+        if same_geoms_func is None:
+            same_geoms_func = _geoms_always_match
+        matched_inputs = set()
+        matched_refs = set()
+        for i, ref_key, gtest, gref in self._candidate_pairs(geoms, geoms_EPSG,
+                                                             **kwargs):
+            ## Pairs where both geometries are already known to match
+            ## cannot change the results.
+            if i in matched_inputs and ref_key in matched_refs:
+                continue
+            if same_geoms_func(gtest, gref):
+                matched_inputs.add(i)
+                matched_refs.add(ref_key)
+        return matched_inputs, matched_refs
+
+
+    def compare_full(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func,
+                     **kwargs):
+        """ Compare the input geometries with the geometries of the
+        GeomRefDB instance, and return the true positives, false
+        positives and missing geometries, as well as the recall,
+        precision and F1 scores, in a `dict`.
+
+        The candidate pairs of input and reference geometries are
+        searched for and evaluated only once, for all the results.
+        Engine-specific keyword arguments (e.g. ``geoms_tab_name`` or
+        ``get_search_frame`` for `SQLiteGeomRefDB`) can be passed as
+        `kwargs`.
+        """
+        geoms = list(geoms_iter)
+        matched_inputs, matched_refs = self._fused_comparison(
+            geoms, AOI_geom, geoms_EPSG, same_geoms_func, **kwargs
+        )
         results = dict()
-        results['true_positives'] = list(self.true_positives(geoms_iter,
-                                                            geoms_epsg=geoms_EPSG,
-                                                            geoms_match=same_geoms_func))
-        results['false_positives'] = list(self.false_positives(geoms_iter,
-                                                               geoms_epsg=geoms_EPSG,
-                                                               geoms_match=same_geoms_func))
-        results['missing_geometries'] = list(self.missing_geometries(geoms_iter,
-                                                                      aoi_geom=AOI_geom,
-                                                                      geoms_epsg=geoms_EPSG,
-                                                                      geoms_match=same_geoms_func))
+        results['true_positives'] = [geom for i, geom in enumerate(geoms)
+                                     if i in matched_inputs]
+        results['false_positives'] = [geom for i, geom in enumerate(geoms)
+                                      if i not in matched_inputs]
+        results['missing_geometries'] = [
+            ref_geom for ref_key, ref_geom
+            in self._aoi_reference_geoms(AOI_geom, geoms_EPSG, **kwargs)
+            if ref_key not in matched_refs
+        ]
         tp_num = len(results['true_positives'])
         fp_num = len(results['false_positives'])
         mg_num = len(results['missing_geometries'])
@@ -1,77 +1,362 @@
 # -*- coding: utf-8 -*-
 
 
+import collections
+import itertools
+import math
+import os
+import pickle
 import queue
 import multiprocessing as mp
+import tempfile
+import time
+import uuid
+from functools import partial
 
+from .io import _setup_logger
 
-def gen_from_queue(q, lock):
-    try:
-        with lock:
-            yield q.get(block=False)
-    except queue.Empty:
-        raise StopIteration
 
-def iter_to_queue(it, q, lock):
-    with lock:
-        for el in iter(it):
-            q.put((el))
+def _put_unless_cancelled(results, calls, slot, call_id, msg):
+    """Put a message in the (bounded) results queue, waiting for free
+    space as long as the call the message belongs to is not cancelled.
+    Return ``False`` if the call was cancelled.
+    """
+    while calls[slot] == call_id:
+        try:
+            results.put(msg, timeout=0.1)
+        except queue.Full:
+            continue
+        return True
+    return False
 
+def _worker_loop(pickled_obj, tasks, results, calls, logger_conf, batch_size,
+                 flush_delay):
+    """Main function of the worker processes of a `WorkerPool`.
 
-class SharedIterator:
+    The object bound to the pool is unpickled once, when the worker
+    starts, and its methods are then run on the tasks pulled from the
+    ``tasks`` queue until the ``None`` sentinel is received. The
+    elements returned by the methods are sent back in small batches, as
+    soon as they are produced.
+    """
+    if logger_conf is None:
+        logger = _setup_logger(name=str(uuid.uuid1()), level=None)
+    else:
+        logger_conf = dict(logger_conf)
+        logger_conf["name"] = (logger_conf.get("name", "")
+                               + f" (PID: {os.getpid()})")
+        logger = _setup_logger(**logger_conf)
+    obj = pickle.loads(pickled_obj)
+    logger.info("Worker started.")
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        slot, call_id, pickled_task = task
+        if calls[slot] != call_id:
+            continue
+        put = partial(_put_unless_cancelled, results, calls, slot, call_id)
+        try:
+            method_name, iterable, method_args, method_kwargs = pickle.loads(
+                pickled_task)
+            method_obj = getattr(obj, method_name)
+            batch = list()
+            last_flush = time.monotonic()
+            for el in method_obj(iterable, *method_args, **method_kwargs):
+                batch.append(el)
+                if (len(batch) >= batch_size
+                        or time.monotonic() - last_flush >= flush_delay):
+                    if not put((call_id, "results", batch)):
+                        break
+                    batch = list()
+                    last_flush = time.monotonic()
+            else:
+                if batch:
+                    put((call_id, "results", batch))
+                put((call_id, "done", None))
+        except Exception as exc:
+            put((call_id, "error", exc))
+    del obj
+    logger.info("Worker stopped.")
+
+
+class _SpillBuffer:
+    """FIFO buffer of the messages received for a call of
+    `WorkerPool.imap`, which keeps at most ``maxsize`` messages in
+    memory. The next messages are spilled to a temporary file, and
+    read back in order once the messages in memory are consumed.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._head = collections.deque()
+        self._file = None
+        self._nspilled = 0
+        self._read_pos = 0
+
+    def __len__(self):
+        return len(self._head) + self._nspilled
+
+    def append(self, msg):
+        if not self._nspilled and len(self._head) < self.maxsize:
+            self._head.append(msg)
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()
+        self._file.seek(0, os.SEEK_END)
+        pickle.dump(msg, self._file)
+        self._nspilled += 1
+
+    def popleft(self):
+        if not self._head and self._nspilled:
+            self._file.seek(self._read_pos)
+            while self._nspilled and len(self._head) < self.maxsize:
+                self._head.append(pickle.load(self._file))
+                self._nspilled -= 1
+            self._read_pos = self._file.tell()
+            if not self._nspilled:
+                self._file.seek(0)
+                self._file.truncate()
+                self._read_pos = 0
+        return self._head.popleft()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class WorkerPool:
+    """Pool of persistent worker processes bound to an object.
+
+    The object is pickled once, when the pool is started, and each
+    worker process keeps its own copy of the object alive until the
+    pool is closed. Methods of the object can then be run in the
+    workers, on multiple input iterables, with :meth:`imap`, and only
+    the input iterables and the method arguments have to be sent to
+    the workers.
+
+    The results are streamed back from the workers through a bounded
+    queue: the workers wait when it is full, so that the memory used
+    by the pending results does not grow with the size of the full
+    result.
+
+    Several calls of :meth:`imap` may run concurrently (e.g. when their
+    generators are consumed alternately): the results are routed to the
+    call they belong to, and the results of a call that is not being
+    consumed are buffered until it is. At most ``max_pending`` batches
+    of results are buffered in memory per call, the next ones are
+    spilled to a temporary file.
+
+    Parameters
+    ----------
+    obj : `object`
+        Picklable object which methods are to be run by the workers.
+    nworkers : `int`
+        Number of worker processes.
+    logger_conf : `dict`, optional
+        Logging configuration of the workers (see
+        :func:`geomcompare.io._setup_logger`).
+    batch_size : `int`, default: ``64``
+        Maximum number of elements sent back at once by a worker.
+    max_pending : `int`, optional
+        Maximum number of batches of results waiting to be consumed.
+        Default is four batches per worker.
+    flush_delay : `float`, default: ``0.5``
+        Maximum delay (in seconds) before an incomplete batch of
+        results is sent back by a worker.
+    max_calls : `int`, default: ``16``
+        Maximum number of concurrent calls of :meth:`imap`.
+    """
+
+    def __init__(self, obj, nworkers, logger_conf=None, batch_size=64,
+                 max_pending=None, flush_delay=0.5, max_calls=16):
+        pickled_obj = pickle.dumps(obj)
+        if max_pending is None:
+            max_pending = 4 * nworkers
+        self._max_pending = max_pending
+        self._tasks = mp.Queue()
+        self._results = mp.Queue(maxsize=max_pending)
+        ## Identifiers of the running calls of imap, one slot per
+        ## call (0 for a free slot). Tasks and results of a call that
+        ## is no longer registered are cancelled/discarded.
+        self._calls = mp.Array("q", max_calls)
+        self._call_ids = itertools.count(1)
+        ## Results received for each running call, not consumed yet
+        ## (see _SpillBuffer).
+        self._buffers = dict()
+        worker_args = (pickled_obj, self._tasks, self._results, self._calls,
+                       logger_conf, batch_size, flush_delay)
+        self._procs = [mp.Process(target=_worker_loop, args=worker_args,
+                                  daemon=True)
+                       for _ in range(nworkers)]
+        for p in self._procs:
+            p.start()
 
     @property
-    def lock(self):
-        return self._l
+    def nworkers(self):
+        return len(self._procs)
 
     @property
-    def size(self):
-        with self._s.get_lock():
-            size = self._s.value
-        return size
+    def pids(self):
+        return [p.pid for p in self._procs]
+
+    def imap(self, method_name, iterables, *method_args, **method_kwargs):
+        """Run a method of the bound object on each input iterable.
 
-    def __init__(self, it=None, lock=None):
-        self._q = mp.Queue()
-        self._l = mp.Lock() if lock is None else lock
-        self._s = mp.Value("i", 0)
-        if it is not None:
-            for count, el in enumerate(it, 1):
-                self._q.put(el)
-            self._s.value += count
+        The method must take an iterable as first positional argument
+        and return an iterable. The elements of the returned iterables
+        are yielded as soon as the workers produce them, in no
+        particular order. Stopping the iteration early cancels the
+        remaining work.
 
+        The tasks (input iterables and method arguments) are pickled in
+        the calling process, and a `pickle.PicklingError` is raised if
+        they cannot be pickled (e.g. if an argument is a lambda).
+        """
+        slot, call_id = self._register_call()
+        iterables = iter(iterables)
 
-    def __next__(self):
+        def submit(n):
+            """Queue (at most) n new tasks and return their number."""
+            count = 0
+            for iterable in itertools.islice(iterables, n):
+                ## Pickling errors in the feeder thread of the queue
+                ## would be silently ignored, and the task lost.
+                try:
+                    pickled_task = pickle.dumps((method_name, iterable,
+                                                 method_args, method_kwargs))
+                except Exception as exc:
+                    raise pickle.PicklingError(
+                        f"The task of the {method_name!r} method cannot be "
+                        f"sent to the worker processes: {exc}") from exc
+                self._tasks.put((slot, call_id, pickled_task))
+                count += 1
+            return count
 
-        while self.size:
+        ntasks = 0
+        try:
+            ## Input iterables are consumed lazily: only a few tasks
+            ## are queued in advance, and a new one is queued each time
+            ## a worker completes a task. Idle workers thus always pull
+            ## the next task from the shared queue.
+            ntasks += submit(2 * self.nworkers)
+            while ntasks:
+                _, kind, payload = self._get_result(call_id)
+                if kind == "results":
+                    yield from payload
+                elif kind == "done":
+                    ntasks -= 1
+                    ntasks += submit(1)
+                else:
+                    raise payload
+        finally:
+            ## Unregistering the call cancels its remaining tasks.
+            self._unregister_call(slot, call_id)
+
+    def _register_call(self):
+        with self._calls.get_lock():
+            for slot, call_id in enumerate(self._calls):
+                if call_id == 0:
+                    call_id = next(self._call_ids)
+                    self._calls[slot] = call_id
+                    self._buffers[call_id] = _SpillBuffer(self._max_pending)
+                    return slot, call_id
+        raise RuntimeError(f"No more than {len(self._calls)} concurrent calls "
+                           "of imap are allowed!")
+
+    def _unregister_call(self, slot, call_id):
+        with self._calls.get_lock():
+            if self._calls[slot] == call_id:
+                self._calls[slot] = 0
+        buffer = self._buffers.pop(call_id, None)
+        if buffer is not None:
+            buffer.close()
+
+    def _get_result(self, call_id):
+        """Return the next message of a call, buffering the messages of
+        the other running calls received in the meantime.
+        """
+        buffer = self._buffers[call_id]
+        while not buffer:
             try:
-                el = self._q.get(block=False)
+                msg = self._results.get(timeout=1)
             except queue.Empty:
+                if not all(p.is_alive() for p in self._procs):
+                    self.terminate()
+                    raise RuntimeError("A worker process terminated "
+                                       "unexpectedly!")
                 continue
-            with self._s.get_lock():
-                self._s.value -= 1
-            return el
-        raise StopIteration()
-
+            ## Messages of cancelled calls are discarded.
+            msg_buffer = self._buffers.get(msg[0], None)
+            if msg_buffer is not None:
+                msg_buffer.append(msg)
+        return buffer.popleft()
 
-    def __iter__(self):
-        return self
+    def close(self):
+        """Stop the worker processes once their current tasks are done.
+        Pending tasks are cancelled.
+        """
+        with self._calls.get_lock():
+            for slot in range(len(self._calls)):
+                self._calls[slot] = 0
+        for _ in self._procs:
+            self._tasks.put(None)
+        ## Results left over in the queue must be consumed, else the
+        ## workers cannot exit (see
+        ## https://docs.python.org/3/library/multiprocessing.html#programming-guidelines).
+        for p in self._procs:
+            while p.is_alive():
+                try:
+                    while True:
+                        self._results.get_nowait()
+                except queue.Empty:
+                    pass
+                p.join(timeout=0.1)
 
+    def terminate(self):
+        """Stop the worker processes immediately."""
+        for p in self._procs:
+            p.terminate()
+            p.join()
 
-    def put(self, el):
-        self._q.put(el)
-        with self._s.get_lock():
-            self._s.value += 1
 
-    def put_iter(self, it):
-        with self._l:
-            for count, el in enumerate(it, 1):
-                self._q.put(el)
-        with self._s.get_lock():
-            self._s.value += count
+def iter_to_chunks(it, size):
+    """Lazily split an iterable into lists of (at most) ``size`` elements."""
+    it = iter(it)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
 
+def iter_to_work_chunks(it, size, cost_func=None, window=None):
+    """Lazily split an iterable into chunks of work.
 
-def split_iter_to_lists(it, nlists):
-    lists = [[] for _ in range(nlists)]
-    for i,el in enumerate(it):
-        lists[i % nlists].append(el)
-    return lists
+    If no ``cost_func`` is given, this is equivalent to
+    :func:`iter_to_chunks`. Else, the elements are read by windows of
+    ``window`` elements (default: 16 chunks), sorted by decreasing
+    cost, and grouped into chunks of (at most) ``size`` elements and
+    of roughly equal cost, so that the heaviest elements come first
+    and end up in smaller chunks.
+    """
+    if cost_func is None:
+        yield from iter_to_chunks(it, size)
+        return
+    if window is None:
+        window = 16 * size
+    for elements in iter_to_chunks(it, window):
+        costs = [cost_func(el) for el in elements]
+        ## Heaviest elements first.
+        order = sorted(range(len(elements)), key=costs.__getitem__,
+                       reverse=True)
+        budget = sum(costs) / math.ceil(len(elements) / size)
+        chunk, chunk_cost = list(), 0
+        for i in order:
+            chunk.append(elements[i])
+            chunk_cost += costs[i]
+            if len(chunk) >= size or chunk_cost >= budget:
+                yield chunk
+                chunk, chunk_cost = list(), 0
+        if chunk:
+            yield chunk
@@ -2,9 +2,10 @@
 
 
 
-from functools import partial
+from collections import Counter, OrderedDict
 
 import numpy as np
+import shapely
 
 
 dispatch_funcs = list()
@@ -16,45 +17,291 @@ def dispatch_function(func):
 def _geoms_always_match(gtest, gref):
     return True
 
-def _perc_area_ptest_overlap(gtest, gref, threshold=None):
-    intersection = gtest.intersection(gref)
-    return (intersection.area / gtest.area) >= threshold
+def _batch_match(geoms_match, gtests, grefs):
+    ## Evaluate a comparison function on aligned arrays of candidate
+    ## pairs. Comparison functions can provide a vectorized 'batch'
+    ## entry point, else they are called one pair at a time.
+    if geoms_match is None or geoms_match is _geoms_always_match:
+        return np.ones(len(gtests), dtype=bool)
+    batch = getattr(geoms_match, "batch", None)
+    if batch is not None:
+        return np.asarray(batch(gtests, grefs), dtype=bool)
+    return np.fromiter(map(geoms_match, gtests, grefs), dtype=bool,
+                       count=len(gtests))
 
-def _perc_area_pref_overlap(gtest, gref, threshold=None):
-    intersection = gtest.intersection(gref)
-    return (intersection.area / gref.area) >= threshold
+## Scores of the strategies of `polygons_area_match`, from the area of
+## the intersection and the areas of the test and reference geometries.
+## They work on floats as well as on numpy arrays (vectorized
+## evaluation).
+def _ptest_score(inter_area, gtest_area, gref_area):
+    return inter_area / gtest_area
 
-def _perc_area_both_overlap(gtest, gref, threshold=None):
-    intersection = gtest.intersection(gref)
-    return min(intersection.area / gtest.area,
-               intersection.area / gref.area) >= threshold
+def _pref_score(inter_area, gtest_area, gref_area):
+    return inter_area / gref_area
 
-def _mean_perc_area_overlap(gtest, gref, threshold=None):
-    intersection = gtest.intersection(gref)
-    return np.mean([intersection.area / gtest.area,
-                    intersection.area / gref.area]) >= threshold
+def _both_score(inter_area, gtest_area, gref_area):
+    return np.minimum(inter_area / gtest_area, inter_area / gref_area)
 
-def _intersection_over_union(gtest, gref, threshold=None):
-    intersection = gtest.intersection(gref)
-    union = gtest.union(gref)
-    return (intersection.area / union.area) >= threshold
+def _mean_score(inter_area, gtest_area, gref_area):
+    return (inter_area / gtest_area + inter_area / gref_area) / 2
 
+def _iou_score(inter_area, gtest_area, gref_area):
+    ## The area of the union is derived from the area of the
+    ## intersection, which saves one overlay operation per pair.
+    return inter_area / (gtest_area + gref_area - inter_area)
 
-_strategy_mapping = {"ptest": _perc_area_ptest_overlap,
-                     "pref": _perc_area_pref_overlap,
-                     "both": _perc_area_both_overlap,
-                     "mean": _mean_perc_area_overlap,
-                     "IoU": _intersection_over_union}
+
+_area_score_mapping = {"ptest": _ptest_score,
+                       "pref": _pref_score,
+                       "both": _both_score,
+                       "mean": _mean_score,
+                       "IoU": _iou_score}
+
+
+class RefGeomCache:
+    """ Bounded LRU cache of prepared reference geometries.
+
+    Reference geometries are stored by key (e.g. the row identifier of
+    the reference geometry in a database), prepared (see
+    :func:`shapely.prepare`), and with their precomputed area. A
+    comparison function bound to the cache (see `bind`) can then reuse
+    them when the same reference geometry is a candidate for several
+    input geometries.
+
+    Parameters
+    ----------
+    maxsize : `int`, default: 4096
+        Maximum number of reference geometries kept in the cache. The
+        least recently used geometries are evicted first.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        ## (geometry, area) entries by key.
+        self._geoms = OrderedDict()
+        ## Entry returned by the last call of `get`, whose area is
+        ## looked up by the comparison functions bound to the cache.
+        self._last = None
+
+    def __len__(self):
+        return len(self._geoms)
+
+    def get(self, key, load):
+        """ Return the cached reference geometry stored by `key`. On a
+        cache miss, the geometry is returned by calling `load` (without
+        arguments), and is prepared and stored.
+        """
+        entry = self._geoms.get(key)
+        if entry is not None:
+            self._geoms.move_to_end(key)
+        else:
+            geom = load()
+            shapely.prepare(geom)
+            entry = self._geoms[key] = (geom, geom.area)
+            if len(self._geoms) > self.maxsize:
+                self._geoms.popitem(last=False)
+        self._last = entry
+        return entry[0]
+
+    def area(self, geom):
+        """ Return the area of a geometry, cached if it is the geometry
+        returned by the last call of `get`.
+        """
+        last = self._last
+        if last is not None and last[0] is geom:
+            return last[1]
+        return geom.area
+
+    def bind(self, geoms_match):
+        """ Return a comparison function which uses the cache, if
+        `geoms_match` supports it, else return `geoms_match` unchanged.
+        """
+        with_ref_cache = getattr(geoms_match, "with_ref_cache", None)
+        if with_ref_cache is None:
+            return geoms_match
+        return with_ref_cache(self)
+
+
+def _bbox_intersection_area(bounds1, bounds2):
+    width = min(bounds1[2], bounds2[2]) - max(bounds1[0], bounds2[0])
+    height = min(bounds1[3], bounds2[3]) - max(bounds1[1], bounds2[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    return width * height
+
+
+class _AreaMatch:
+    """ Comparison function returned by `polygons_area_match`.
+
+    Instances are called with a single pair of geometries, like any
+    comparison function, and also expose vectorized entry points
+    (`scores` and `batch`), which take two aligned arrays of *test* and
+    *reference* geometries (candidate pairs). Instances can be pickled,
+    e.g. to be sent to worker processes.
+
+    Pairs are evaluated in stages, from the cheapest to the most
+    expensive. The scores of all the strategies increase with the area
+    of the intersection, which cannot exceed the area of the
+    intersection of the bounding boxes, nor the area of the smallest
+    geometry. Pairs which upper bound score is below the threshold are
+    rejected without computing their intersection. The number of pairs
+    settled at each stage is counted in `stats`:
+
+    - ``"pairs"``: evaluated pairs;
+    - ``"bbox"``: pairs rejected from their bounding boxes;
+    - ``"disjoint"``: pairs rejected as disjoint (prepared reference
+      geometry from a `RefGeomCache` only);
+    - ``"covered"``: pairs where the reference geometry covers the test
+      geometry (prepared reference geometry only);
+    - ``"overlay"``: pairs evaluated from their exact intersection.
+
+    Copies bound to a `RefGeomCache` share the counters of the original
+    function, but counters are not sent back from worker processes.
+    """
+
+    def __init__(self, strategy, threshold, ref_cache=None):
+        self.strategy = strategy
+        self.threshold = threshold
+        self.ref_cache = ref_cache
+        self.stats = Counter()
+
+    def __call__(self, gtest, gref):
+        stats = self.stats
+        stats["pairs"] += 1
+        score = self._score
+        gtest_area = gtest.area
+        if self.ref_cache is None:
+            gref_area = gref.area
+        else:
+            gref_area = self.ref_cache.area(gref)
+        max_inter_area = min(_bbox_intersection_area(gtest.bounds, gref.bounds),
+                             gtest_area, gref_area)
+        if not score(max_inter_area, gtest_area, gref_area) >= self.threshold:
+            stats["bbox"] += 1
+            return False
+        if self.ref_cache is not None:
+            ## Predicates are evaluated with the prepared reference
+            ## geometry, and only the pairs of partially overlapping
+            ## geometries need an overlay operation.
+            if not gref.intersects(gtest):
+                stats["disjoint"] += 1
+                return False
+            if gref.covers(gtest):
+                stats["covered"] += 1
+                return bool(score(gtest_area, gtest_area, gref_area)
+                            >= self.threshold)
+        stats["overlay"] += 1
+        inter_area = gtest.intersection(gref).area
+        return bool(score(inter_area, gtest_area, gref_area) >= self.threshold)
+
+    def _score(self, inter_area, gtest_area, gref_area):
+        ## Null divisions (geometries without area) give a NaN score,
+        ## i.e. the pair is not matching, as with the vectorized entry
+        ## points.
+        try:
+            return _area_score_mapping[self.strategy](inter_area, gtest_area,
+                                                      gref_area)
+        except ZeroDivisionError:
+            return float("nan")
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(strategy={self.strategy!r}, "
+                f"threshold={self.threshold!r})")
+
+    def with_ref_cache(self, ref_cache):
+        """ Return a copy of the comparison function, which uses the
+        areas and prepared geometries of a `RefGeomCache`.
+        """
+        bound = type(self)(self.strategy, self.threshold, ref_cache)
+        bound.stats = self.stats
+        return bound
+
+    def area_ratio_bounds(self):
+        """ Return the ``(min_ratio, max_ratio)`` bounds of the ratio of
+        the area of a reference geometry to the area of a test
+        geometry, out of which the geometries cannot match.
+        """
+        t = self.threshold
+        ## The area of the intersection cannot exceed the area of the
+        ## smallest geometry.
+        if self.strategy == "ptest":
+            return t, float("inf")
+        if self.strategy == "pref":
+            return 0.0, 1 / t
+        if self.strategy == "mean":
+            if t <= 0.5:
+                return 0.0, float("inf")
+            return 2 * t - 1, 1 / (2 * t - 1)
+        ## "both" and "IoU" (which cannot exceed the ratio of the
+        ## smallest area to the largest area).
+        return t, 1 / t
+
+    def scores(self, gtests, grefs):
+        """ Return the array of scores of the candidate pairs. Pairs with
+        a geometry without area may get a NaN score.
+        """
+        gtests = np.asarray(gtests, dtype=object)
+        grefs = np.asarray(grefs, dtype=object)
+        inter_area = shapely.area(shapely.intersection(gtests, grefs))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _area_score_mapping[self.strategy](
+                inter_area, shapely.area(gtests), shapely.area(grefs)
+            )
+
+    def match_areas(self, inter_areas, gtest_areas, gref_areas):
+        """ Return the boolean array of matching pairs, from the areas of
+        their intersections and of their test and reference geometries
+        (e.g. computed by a spatial database).
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = _area_score_mapping[self.strategy](
+                np.asarray(inter_areas, dtype=float),
+                np.asarray(gtest_areas, dtype=float),
+                np.asarray(gref_areas, dtype=float)
+            )
+        return scores >= self.threshold
+
+    def batch(self, gtests, grefs):
+        """ Return the boolean array of matching candidate pairs. The
+        intersections are only computed for the pairs which are not
+        rejected from their bounding boxes.
+        """
+        gtests = np.asarray(gtests, dtype=object)
+        grefs = np.asarray(grefs, dtype=object)
+        gtest_areas = shapely.area(gtests)
+        gref_areas = shapely.area(grefs)
+        gtest_bounds = shapely.bounds(gtests)
+        gref_bounds = shapely.bounds(grefs)
+        width = (np.minimum(gtest_bounds[:, 2], gref_bounds[:, 2])
+                 - np.maximum(gtest_bounds[:, 0], gref_bounds[:, 0]))
+        height = (np.minimum(gtest_bounds[:, 3], gref_bounds[:, 3])
+                  - np.maximum(gtest_bounds[:, 1], gref_bounds[:, 1]))
+        max_inter_areas = np.minimum(
+            np.clip(width, 0, None) * np.clip(height, 0, None),
+            np.minimum(gtest_areas, gref_areas)
+        )
+        candidates = self.match_areas(max_inter_areas, gtest_areas, gref_areas)
+        inter_areas = shapely.area(
+            shapely.intersection(gtests[candidates], grefs[candidates])
+        )
+        match = np.zeros(len(gtests), dtype=bool)
+        match[candidates] = self.match_areas(inter_areas,
+                                             gtest_areas[candidates],
+                                             gref_areas[candidates])
+        self.stats["pairs"] += len(gtests)
+        self.stats["bbox"] += len(gtests) - int(candidates.sum())
+        self.stats["overlay"] += int(candidates.sum())
+        return match
 
 @dispatch_function
 def polygons_area_match(strategy, threshold):
-    if strategy not in _strategy_mapping.keys():
+    if strategy not in _area_score_mapping.keys():
         raise ValueError("The strategy parameter must be passed one of {}!"
-                         .format(", ".join([f"{s!r}"
-                                            for s in _strategy_mapping.keys()])))
+                         .format(", ".join([f"{s!r}" for s
+                                            in _area_score_mapping.keys()])))
     try:
         assert 0 < float(threshold) <= 1
     except (AssertionError, ValueError):
         raise ValueError("The threshold parameter must passed a floating point "
                          "number between 0.0 (excluded) and 1.0 (included)!")
-    return partial(_strategy_mapping[strategy], threshold=float(threshold))
+    return _AreaMatch(strategy, float(threshold))
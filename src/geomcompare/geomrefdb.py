@@ -3,143 +3,371 @@
 
 
 import inspect
+import itertools
 import logging
 import multiprocessing as mp
 import os
+import pickle
+import re
 import sqlite3
+import struct
 import time
 import uuid
+import warnings
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+from operator import itemgetter
 from tempfile import NamedTemporaryFile
 from typing import Optional, Literal
 from collections.abc import Generator, Callable
 
+import numpy as np
 import psycopg2
-import pyproj
+import psycopg2.pool
 import rtree
-import shapely.ops
+import shapely
 from pyproj.exceptions import CRSError
 from shapely import speedups, wkb
 
-from .comparefunc import _geoms_always_match
+from .comparefunc import (
+    _geoms_always_match,
+    _batch_match,
+    _AreaMatch,
+    RefGeomCache,
+)
 from ._geomrefdb_abc import GeomRefDB
-from .geomutils import _geom_type_mapping, get_transform_func, _to_2D, _unchanged_geom, GeomObject
-from .io import _setup_logger, _update_logger, GeometryIterable
-from ._misc import SharedIterator, split_iter_to_lists
+from .geomutils import (
+    _get_crs,
+    _geom_type_mapping,
+    get_transform_func,
+    _to_2D,
+    _unchanged_geom,
+    _GeomsIndex,
+    GeomObject,
+)
+from .io import (
+    _setup_logger,
+    _update_logger,
+    _server_side_cursor,
+    _fetch_geoms,
+    GeometryIterable,
+    PGConnectionPool,
+)
+from ._misc import WorkerPool, iter_to_chunks, iter_to_work_chunks
+
+
+## Scores of the strategies of polygons_area_match, as SQL expressions
+## of the area of the intersection (i) and of the areas of the test (a)
+## and reference (b) geometries of a pair. Pairs with a null division
+## (i.e. an undefined score) are not matching, as NaN scores.
+_PG_AREA_SCORES = {
+    "ptest": "i / NULLIF(a, 0)",
+    "pref": "i / NULLIF(b, 0)",
+    "both": "LEAST(i / NULLIF(a, 0), i / NULLIF(b, 0))",
+    "mean": "(i / NULLIF(a, 0) + i / NULLIF(b, 0)) / 2",
+    "IoU": "i / NULLIF(a + b - i, 0)",
+}
+
+## Signature and header of the binary format of the PostgreSQL COPY
+## command (no flags, no header extension).
+_PG_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+
+
+def _pg_binary_copy(geoms, epsg):
+    """Return the ``(input_id, geometry)`` rows of input geometries, in
+    the binary format of the PostgreSQL COPY command. The geometries are
+    sent as EWKB, with their EPSG code as SRID.
+    """
+    geoms = shapely.set_srid(np.array(geoms, dtype=object), int(epsg))
+    buffer = BytesIO()
+    buffer.write(_PG_COPY_HEADER)
+    for i, ewkb in enumerate(shapely.to_wkb(geoms, include_srid=True)):
+        buffer.write(struct.pack("!hiii", 2, 4, i, len(ewkb)))
+        buffer.write(ewkb)
+    buffer.write(struct.pack("!h", -1))
+    buffer.seek(0)
+    return buffer
 
 
 class PostGISGeomRefDB(GeomRefDB):
-    def __init__(self, PG_params, PG_schema, PG_table, PG_geoms_column):
+    _search_chunk_size = 1000
+    ## Number of input geometries loaded at once into the temporary
+    ## table of the server-side comparisons.
+    _copy_chunk_size = 50000
+
+    def __init__(
+        self,
+        PG_params,
+        PG_schema,
+        PG_table,
+        PG_geoms_column,
+        itersize=2000,
+        PG_pool=None,
+        server_side=False,
+    ):
 
         self.PG_params = PG_params
-        self.PG_conn = psycopg2.connect(**PG_params)
+        ## Pool from which the connection to the database is drawn. It
+        ## can be shared with other instances, and is shared by the
+        ## copies of the instance within a (worker) process. A pool
+        ## created by the instance is closed with it (see close).
+        self._owns_pool = PG_pool is None
+        if PG_pool is None:
+            PG_pool = PGConnectionPool(PG_params)
+        self.PG_pool = PG_pool
+        self._PG_conn = None
         self.PG_schema = PG_schema
         self.PG_table = PG_table
         self.PG_geoms_column = PG_geoms_column
+        self._PG_geoms_EPSG = None
+        ## Reprojected copies of the table, by EPSG code (see
+        ## add_reprojected_copy).
+        self._reprojected_tables = dict()
+        ## Number of rows transferred at a time by the server-side
+        ## cursors streaming reference features.
+        self.itersize = itersize
+        ## Compare the features within the database, when the comparison
+        ## function can be expressed in SQL (see _server_side_support).
+        self.server_side = server_side
+        ## Open the connection early, to fail fast.
+        _ = self.PG_conn
+
+    @property
+    def PG_conn(self):
+        if self._PG_conn is None or self._PG_conn.closed:
+            self._release_conn()
+            self._PG_conn = self.PG_pool.getconn()
+        return self._PG_conn
+
+    def _release_conn(self):
+        conn, self._PG_conn = self.__dict__.get("_PG_conn", None), None
+        if conn is not None:
+            try:
+                self.PG_pool.putconn(conn, close=bool(conn.closed))
+            except (psycopg2.pool.PoolError, psycopg2.Error):
+                pass
+
+    def close(self):
+        """Give the connection to the database back to the pool, and
+        close the connections of the pool if it was created by the
+        instance (i.e. if no pool was passed to its constructor).
+        """
+        self._release_conn()
+        if self.__dict__.get("_owns_pool", False):
+            self._owns_pool = False
+            self.PG_pool.closeall()
 
     def __del__(self):
-        self.PG_conn = None
+        self.close()
 
     def __getstate__(self):
         attrs = self.__dict__.copy()
-        attrs["PG_conn"] = None
+        attrs["_PG_conn"] = None
+        ## Copies share the connections of the pool within a process,
+        ## which are thus only closed with the original instance.
+        attrs["_owns_pool"] = False
         return attrs
 
     def __setstate__(self, state):
+        ## The connection is drawn from the pool when first needed.
         self.__dict__ = state
-        self.PG_conn = psycopg2.connect(**self.PG_params)
 
     def get_PG_geoms_EPSG(self):
+        ## The SRID of the geometry column is looked up once per
+        ## instance (and kept by its pickled copies).
+        if self._PG_geoms_EPSG is None:
+            PG_cursor = self.PG_conn.cursor()
+            PG_cursor.execute(
+                f"SELECT Find_SRID('{self.PG_schema}', '{self.PG_table}', "
+                f"'{self.PG_geoms_column}')"
+            )
+            res = PG_cursor.fetchone()
+            PG_cursor = None
+            self._PG_geoms_EPSG = int(res[0])
+        return self._PG_geoms_EPSG
+
+    def add_reprojected_copy(self, epsg, refresh=False):
+        """Create a reprojected copy of the table of reference features.
+
+        The copy is stored in the same schema as the table, in a table
+        named after it and the EPSG code (e.g. *buildings_epsg4326*),
+        with a GiST index on its geometry column. The comparisons with
+        input features in that spatial reference system are then run
+        against the copy, without any reprojection of the input or
+        reference features. Only the copies added with this method are
+        used by the instance (and by its pickled copies).
+
+        The copy is a snapshot of the table. If it already exists in
+        the database, it is reused, unless its number of features
+        differs from the table's (i.e. features were added to or
+        deleted from the table), or ``refresh`` is True. Features
+        modified in place are not detected: the copy must then be
+        rebuilt with ``refresh=True``.
+
+        Parameters
+        ----------
+        epsg : `int`
+            EPSG code of the spatial reference system of the copy.
+        refresh : `bool`, default: ``False``
+            Rebuild the copy if it already exists in the database.
+
+        Returns
+        -------
+        `str`
+            Name of the table of the copy (or of the table itself if it
+            is already in the given spatial reference system).
+
+        Raises
+        ------
+        ValueError
+            If ``epsg`` is not a valid EPSG code.
+        """
+        try:
+            epsg = int(epsg)
+            _ = _get_crs(epsg)
+        except (CRSError, ValueError, TypeError):
+            raise ValueError(f"{epsg!r} is not a valid EPSG code!")
+        if epsg == self.get_PG_geoms_EPSG():
+            return self.PG_table
+        copy_table = f"{self.PG_table}_epsg{epsg}"
+        path2copy = ".".join([self.PG_schema, copy_table])
+        path2table = ".".join([self.PG_schema, self.PG_table])
         PG_cursor = self.PG_conn.cursor()
+        PG_cursor.execute(f"SELECT to_regclass('{path2copy}') IS NOT NULL;")
+        if PG_cursor.fetchone()[0] and not refresh:
+            PG_cursor.execute(
+                f"SELECT (SELECT COUNT(*) FROM {path2table}), "
+                f"(SELECT COUNT(*) FROM {path2copy});"
+            )
+            table_count, copy_count = PG_cursor.fetchone()
+            if table_count != copy_count:
+                _setup_logger().info(
+                    f"The {path2copy!r} table is out of date, rebuilding it..."
+                )
+                refresh = True
+        if refresh:
+            PG_cursor.execute(f"DROP TABLE IF EXISTS {path2copy};")
+        PG_cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {path2copy} AS "
+            f"SELECT ST_Transform({self.PG_geoms_column}, {epsg}) "
+            f"AS {self.PG_geoms_column} FROM {path2table};"
+        )
         PG_cursor.execute(
-            f"SELECT Find_SRID('{self.PG_schema}', '{self.PG_table}', "
-            f"'{self.PG_geoms_column}')"
+            f"CREATE INDEX IF NOT EXISTS {copy_table}_{self.PG_geoms_column}_gist "
+            f"ON {path2copy} USING GIST ({self.PG_geoms_column}); "
+            f"ANALYZE {path2copy};"
         )
-        res = PG_cursor.fetchone()
+        PG_cursor.close()
+        if not self.PG_conn.autocommit:
+            self.PG_conn.commit()
+        self._reprojected_tables[epsg] = copy_table
+        return copy_table
+
+    def _source_table(self, geoms_EPSG):
+        """Return the path to the table of reference features to compare
+        input features with, and its EPSG code: the reprojected copy of
+        the table in the spatial reference system of the input features
+        if any (see :meth:`add_reprojected_copy`), else the table.
+        """
+        copy_table = self._reprojected_tables.get(int(geoms_EPSG), None)
+        if copy_table is not None:
+            return ".".join([self.PG_schema, copy_table]), int(geoms_EPSG)
+        return ".".join([self.PG_schema, self.PG_table]), self.get_PG_geoms_EPSG()
+
+    def _batch_candidates(self, geoms_iter, geoms_EPSG):
+        """Search for the candidate features of input features.
+
+        Function generator that sends the input geometries, chunk by
+        chunk, as a single array parameter to the database, where they
+        are joined laterally with the intersecting features of the
+        table. For each chunk, a ``(chunk, candidates)`` tuple is
+        yielded, where ``candidates`` iterates over ``(input_id, rows)``
+        groups of ``(input_id, ctid, wkb)`` rows, with the geometries of
+        the candidate features in the spatial reference system of the
+        input features.
+        """
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        SQL_query = (
+            f"SELECT g.i - 1, t.ref_id, ST_AsBinary(ST_Transform(t.geom, "
+            f"{geoms_EPSG})) "
+            f"FROM unnest(%s::bytea[]) WITH ORDINALITY AS g(wkb, i) "
+            f"CROSS JOIN LATERAL ("
+            f"SELECT ctid::text AS ref_id, {self.PG_geoms_column} AS geom "
+            f"FROM {path2table} "
+            f"WHERE ST_Intersects({self.PG_geoms_column}, "
+            f"ST_Transform(ST_GeomFromWKB(g.wkb, {geoms_EPSG}), "
+            f"{PG_geoms_EPSG}))"
+            f") AS t "
+            f"ORDER BY g.i"
+        )
+        PG_cursor = self.PG_conn.cursor()
+        for chunk in iter_to_chunks(geoms_iter, self._search_chunk_size):
+            PG_cursor.execute(
+                SQL_query, ([psycopg2.Binary(geom.wkb) for geom in chunk],)
+            )
+            yield chunk, itertools.groupby(PG_cursor.fetchall(), key=itemgetter(0))
         PG_cursor = None
-        return int(res[0])
 
-    def true_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
-        self.logger = _setup_logger()
-        self.logger.info("Searching true positive geometries...")
-        PG_geoms_EPSG = self.get_PG_geoms_EPSG()
-        transform = PG_geoms_EPSG != int(geoms_EPSG)
-        path2table = ".".join([self.PG_schema, self.PG_table])
-        if transform:
-            SQL_query_template = (
-                f"SELECT ST_AsBinary(ST_Transform({self.PG_geoms_column},"
-                f"{geoms_EPSG})) "
-                f"FROM {path2table} "
-                f"WHERE ST_Intersects({self.PG_geoms_column}, "
-                f"ST_Transform(ST_GeomFromText('{{geom.wkt}}', {geoms_EPSG}), "
-                f"{PG_geoms_EPSG}))"
-            )
-        else:
-            SQL_query_template = (
-                f"SELECT ST_AsBinary({self.PG_geoms_column}) "
-                f"FROM {path2table} "
-                f"WHERE ST_Intersects({self.PG_geoms_column}, "
-                f"ST_GeomFromText('{{geom.wkt}}', {geoms_EPSG}))"
-            )
-        PG_cursor = self.PG_conn.cursor()
-        for geom in geoms_iter:
-            PG_cursor.execute(SQL_query_template.format(geom=geom))
-            for row in PG_cursor:
-                PG_geom = wkb.loads(row[0].tobytes())
-                if same_geoms_func(geom, PG_geom):
+    def _geoms_generator(
+        self, geoms_iter, geoms_EPSG, same_geoms_func, matching_geoms=True
+    ) -> Generator[GeomObject]:
+        """Yield (non-)matching features resulting from the SQL query.
+
+        The input features are yielded by the function, depending on
+        whether their geometries match the geometry of (at least) one
+        of their candidate features (see :meth:`_batch_candidates`).
+        """
+        ref_cache = RefGeomCache()
+        same_geoms_func = ref_cache.bind(same_geoms_func)
+        for chunk, candidates in self._batch_candidates(geoms_iter, geoms_EPSG):
+            matched = set()
+            for input_id, rows in candidates:
+                geom = chunk[input_id]
+                for _, ctid, PG_wkb in rows:
+                    PG_geom = ref_cache.get(ctid, lambda: wkb.loads(PG_wkb.tobytes()))
+                    if same_geoms_func(geom, PG_geom):
+                        matched.add(input_id)
+                        break
+            for i, geom in enumerate(chunk):
+                if (i in matched) == matching_geoms:
                     yield geom
-                    break
-        PG_cursor = None
+
+    def true_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
+        logger = _setup_logger()
+        logger.info("Searching true positive geometries...")
+        geoms_generator = self._geoms_generator
+        if self._server_side_support(same_geoms_func):
+            geoms_generator = self._server_side_generator
+        yield from geoms_generator(
+            geoms_iter, geoms_EPSG, same_geoms_func, matching_geoms=True
+        )
         logger.info("Done searching true positive geometries.")
 
     def false_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
         logger = _setup_logger()
         logger.info("Searching false positive geometries...")
-        PG_geoms_EPSG = self.get_PG_geoms_EPSG()
-        transform = PG_geoms_EPSG != int(geoms_EPSG)
-        path2table = ".".join([self.PG_schema, self.PG_table])
-        if transform:
-            SQL_query_template = (
-                f"SELECT ST_AsBinary(ST_Transform({self.PG_geoms_column},"
-                f"{geoms_EPSG})) "
-                f"FROM {path2table} "
-                f"WHERE ST_Intersects({self.PG_geoms_column}, "
-                f"ST_Transform(ST_GeomFromText('{{geom.wkt}}', "
-                f"{geoms_EPSG}), {PG_geoms_EPSG}))"
-            )
-        else:
-            SQL_query_template = (
-                f"SELECT ST_AsBinary({self.PG_geoms_column}) "
-                f"FROM {path2table} "
-                f"WHERE ST_Intersects({self.PG_geoms_column}, "
-                f"ST_GeomFromText('{{geom.wkt}}', {geoms_EPSG}))"
-            )
-        PG_cursor = self.PG_conn.cursor()
-        for geom in geoms_iter:
-            PG_cursor.execute(SQL_query_template.format(geom=geom))
-            false_positive = True
-            for row in PG_cursor:
-                PG_geom = wkb.loads(row[0].tobytes())
-                if same_geoms_func(geom, PG_geom):
-                    false_positive = False
-                    break
-            if false_positive:
-                yield geom
-        PG_cursor = None
+        geoms_generator = self._geoms_generator
+        if self._server_side_support(same_geoms_func):
+            geoms_generator = self._server_side_generator
+        yield from geoms_generator(
+            geoms_iter, geoms_EPSG, same_geoms_func, matching_geoms=False
+        )
         logger.info("Done searching false positive geometries.")
 
     def missing_geometries(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func):
         logger = _setup_logger()
         logger.info("Searching missing geometries...")
-        PG_geoms_EPSG = self.get_PG_geoms_EPSG()
+        if self._server_side_support(same_geoms_func):
+            yield from self._server_side_missing(
+                geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func
+            )
+            logger.info("Done searching missing geometries.")
+            return
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
         transform = PG_geoms_EPSG != int(geoms_EPSG)
-        path2table = ".".join([self.PG_schema, self.PG_table])
         if transform:
-            PG_crs = pyproj.CRS(f"EPSG:{PG_geoms_EPSG}")
-            AOI_crs = pyproj.CRS(f"EPSG:{geoms_EPSG}")
-            project = pyproj.Transformer.from_crs(
-                AOI_crs, PG_crs, always_xy=True
-            ).transform
-            aoi_wkt = shapely.ops.transform(project, AOI_geom).wkt
+            aoi_wkt = get_transform_func(geoms_EPSG, PG_geoms_EPSG)(AOI_geom).wkt
             SQL_query = (
                 f"SELECT ST_AsBinary(ST_Transform({self.PG_geoms_column},"
                 f"{geoms_EPSG})) "
@@ -154,51 +382,397 @@ class PostGISGeomRefDB(GeomRefDB):
                 f"WHERE ST_Intersects({self.PG_geoms_column}, "
                 f"ST_GeomFromText('{AOI_geom.wkt}', {PG_geoms_EPSG}))"
             )
+        PG_cursor = _server_side_cursor(self.PG_conn, self.itersize)
+        PG_cursor.execute(SQL_query)
+        index = _GeomsIndex(geoms_iter)
+        try:
+            yield from index.unmatched(
+                _fetch_geoms(PG_cursor, self.itersize), same_geoms_func
+            )
+        finally:
+            PG_cursor.close()
+        logger.info("Done searching missing geometries.")
+
+    def _candidate_pairs(self, geoms, geoms_EPSG):
+        offset = 0
+        for chunk, candidates in self._batch_candidates(geoms, geoms_EPSG):
+            for input_id, rows in candidates:
+                geom = chunk[input_id]
+                for _, ctid, PG_wkb in rows:
+                    yield offset + input_id, ctid, geom, wkb.loads(PG_wkb.tobytes())
+            offset += len(chunk)
+
+    def _aoi_where_clause(self, AOI_geom, geoms_EPSG, PG_geoms_EPSG):
+        if AOI_geom is None:
+            return ""
+        if PG_geoms_EPSG != int(geoms_EPSG):
+            AOI_geom = get_transform_func(geoms_EPSG, PG_geoms_EPSG)(AOI_geom)
+        return (
+            f"WHERE ST_Intersects({self.PG_geoms_column}, "
+            f"ST_GeomFromText('{AOI_geom.wkt}', {PG_geoms_EPSG}))"
+        )
+
+    def _aoi_reference_geoms(self, AOI_geom, geoms_EPSG):
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        SQL_query = (
+            f"SELECT ctid::text, ST_AsBinary(ST_Transform("
+            f"{self.PG_geoms_column}, {geoms_EPSG})) "
+            f"FROM {path2table} "
+            + self._aoi_where_clause(AOI_geom, geoms_EPSG, PG_geoms_EPSG)
+        )
+        PG_cursor = _server_side_cursor(self.PG_conn, self.itersize)
+        PG_cursor.execute(SQL_query)
+        try:
+            yield from _fetch_geoms(PG_cursor, self.itersize, column=1, key_column=0)
+        finally:
+            PG_cursor.close()
+
+    def _aoi_reference_keys(self, AOI_geom, geoms_EPSG):
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        SQL_query = (
+            f"SELECT ctid::text FROM {path2table} "
+            + self._aoi_where_clause(AOI_geom, geoms_EPSG, PG_geoms_EPSG)
+        )
         PG_cursor = self.PG_conn.cursor()
         PG_cursor.execute(SQL_query)
-        index = rtree.index.Index()
-        for i, geom in enumerate(geoms_iter):
-            index.insert(i, geom.bounds, obj=geom)
         for row in PG_cursor:
-            PG_geom = wkb.loads(row[0].tobytes())
-            if not any(
-                same_geoms_func(el.object, PG_geom)
-                for el in index.intersection(PG_geom.bounds, objects=True)
-            ):
-                yield PG_geom
+            yield row[0]
         PG_cursor = None
-        logger.info("Done searching missing geometries.")
+
+    def _match_counts(
+        self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func, count_missing=True
+    ):
+        always_match = same_geoms_func in (None, _geoms_always_match)
+        if not always_match and self._server_side_support(same_geoms_func):
+            return self._server_side_counts(
+                geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func, count_missing
+            )
+        if not always_match:
+            return super()._match_counts(
+                geoms_iter,
+                AOI_geom,
+                geoms_EPSG,
+                same_geoms_func,
+                count_missing=count_missing,
+            )
+        ## Every pair of intersecting geometries is a match: the
+        ## counting is done by the database, one chunk of input
+        ## geometries at a time. Only the identifiers of the matched
+        ## reference geometries are kept.
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        in_aoi = "TRUE"
+        if AOI_geom is not None:
+            aoi_geom = AOI_geom
+            if PG_geoms_EPSG != int(geoms_EPSG):
+                aoi_geom = get_transform_func(geoms_EPSG, PG_geoms_EPSG)(AOI_geom)
+            in_aoi = (
+                f"ST_Intersects(t.{self.PG_geoms_column}, "
+                f"ST_GeomFromText('{aoi_geom.wkt}', {PG_geoms_EPSG}))"
+            )
+        SQL_query = (
+            "SELECT COUNT(DISTINCT g.i), "
+            f"array_agg(DISTINCT t.ctid::text) FILTER (WHERE {in_aoi}) "
+            "FROM unnest(%s::bytea[]) WITH ORDINALITY AS g(wkb, i) "
+            f"JOIN {path2table} AS t "
+            f"ON ST_Intersects(t.{self.PG_geoms_column}, "
+            f"ST_Transform(ST_GeomFromWKB(g.wkb, {geoms_EPSG}), {PG_geoms_EPSG}))"
+        )
+        PG_cursor = self.PG_conn.cursor()
+        geoms_num = tp_num = 0
+        matched_refs = set()
+        for chunk in iter_to_chunks(geoms_iter, self._search_chunk_size):
+            geoms_num += len(chunk)
+            PG_cursor.execute(
+                SQL_query, ([psycopg2.Binary(geom.wkb) for geom in chunk],)
+            )
+            chunk_tp_num, chunk_refs = PG_cursor.fetchone()
+            tp_num += chunk_tp_num
+            matched_refs.update(chunk_refs or ())
+        mg_num = None
+        if count_missing:
+            PG_cursor.execute(
+                f"SELECT COUNT(*) FROM {path2table} "
+                + self._aoi_where_clause(AOI_geom, geoms_EPSG, PG_geoms_EPSG)
+            )
+            mg_num = PG_cursor.fetchone()[0] - len(matched_refs)
+        PG_cursor = None
+        return tp_num, geoms_num - tp_num, mg_num
+
+
+    def _server_side_support(self, same_geoms_func):
+        """Return whether features are to be compared within the
+        database, i.e. in server-side mode and with a comparison
+        function which can be expressed in SQL (area-based comparison
+        functions from `polygons_area_match`, or any intersection).
+        """
+        return self.server_side and (
+            same_geoms_func in (None, _geoms_always_match)
+            or isinstance(same_geoms_func, _AreaMatch)
+        )
+
+    def _pairs_query(self, inputs, geoms_EPSG, same_geoms_func):
+        """Return the SQL query selecting the ``(input_id, ref_id)``
+        matching pairs of features, from the temporary table of input
+        features. Area-based comparisons are evaluated in the spatial
+        reference system of the input features, as in client-side mode.
+        """
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        col = f"t.{self.PG_geoms_column}"
+        join = (
+            f"FROM {inputs} AS g JOIN {path2table} AS t "
+            f"ON ST_Intersects({col}, g.geom)"
+        )
+        if not isinstance(same_geoms_func, _AreaMatch):
+            return f"SELECT g.input_id, t.ctid AS ref_id {join}"
+        gtest, gref = "g.geom", col
+        if PG_geoms_EPSG != int(geoms_EPSG):
+            ## The reference features are reprojected once per pair, and
+            ## the input features are read in their own SRS.
+            gtest, gref = "g.geom_in", "r.geom"
+            join += (
+                f" CROSS JOIN LATERAL (SELECT ST_Transform({col}, "
+                f"{int(geoms_EPSG)}) AS geom) AS r"
+            )
+        ## Pairs which cannot match because of the ratio of the areas of
+        ## their geometries are rejected before computing intersections.
+        min_ratio, max_ratio = map(float, same_geoms_func.area_ratio_bounds())
+        conditions = []
+        if min_ratio > 0:
+            conditions.append(f"ST_Area({gref}) >= {min_ratio!r} * ST_Area({gtest})")
+        if np.isfinite(max_ratio):
+            conditions.append(f"ST_Area({gref}) <= {max_ratio!r} * ST_Area({gtest})")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        ## OFFSET 0 keeps the subquery from being flattened, which would
+        ## compute the intersection once per reference in the score.
+        score = _PG_AREA_SCORES[same_geoms_func.strategy]
+        return (
+            f"SELECT input_id, ref_id FROM ("
+            f"SELECT g.input_id, t.ctid AS ref_id, ST_Area({gtest}) AS a, "
+            f"ST_Area({gref}) AS b, "
+            f"ST_Area(ST_Intersection({gtest}, {gref})) AS i "
+            f"{join}{where} OFFSET 0) AS p "
+            f"WHERE {score} >= {float(same_geoms_func.threshold)!r}"
+        )
+
+    @contextmanager
+    def _temp_tables(self, PG_cursor):
+        """Create the session temporary tables of the server-side
+        comparisons (input features and identifiers of the matched
+        reference features), and drop them on exit.
+
+        The input features are stored in the spatial reference system
+        of the database table (*geom* column, with a GiST index), and
+        in their own (*geom_in* column) if it is different.
+        """
+        suffix = uuid.uuid4().hex
+        inputs, matched = f"gc_input_{suffix}", f"gc_matched_{suffix}"
+        PG_cursor.execute(
+            f"CREATE TEMP TABLE {inputs} "
+            "(input_id integer, geom geometry, geom_in geometry); "
+            f"CREATE INDEX {inputs}_geom ON {inputs} USING GIST (geom); "
+            f"CREATE TEMP TABLE {matched} (ref_id tid PRIMARY KEY);"
+        )
+        try:
+            yield inputs, matched
+        finally:
+            ## After an error, the tables go away with the rolled back
+            ## transaction.
+            status = self.PG_conn.info.transaction_status
+            if status != psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+                PG_cursor.execute(f"DROP TABLE IF EXISTS {inputs}, {matched};")
+
+    def _server_side_matches(
+        self, PG_cursor, tables, geoms_iter, geoms_EPSG, same_geoms_func, record_refs
+    ):
+        """Compare input features with the features of the database,
+        within the database.
+
+        Function generator that loads the input features, chunk by
+        chunk, into a temporary table with a binary COPY (see
+        :meth:`_temp_tables`), and joins them with the features of the
+        database table. For each
+        chunk, a ``(chunk, matched_ids)`` tuple is yielded, where
+        ``matched_ids`` are the (chunk) indices of the matching input
+        features. If ``record_refs`` is True, the identifiers of the
+        matching reference features are recorded in a temporary table.
+        """
+        inputs, matched = tables
+        _, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        pairs_query = self._pairs_query(inputs, geoms_EPSG, same_geoms_func)
+        if record_refs:
+            SQL_query = (
+                f"WITH pairs AS ({pairs_query}), "
+                f"refs AS (INSERT INTO {matched} SELECT DISTINCT ref_id FROM pairs "
+                f"ON CONFLICT DO NOTHING) "
+                f"SELECT DISTINCT input_id FROM pairs"
+            )
+        else:
+            SQL_query = f"SELECT DISTINCT input_id FROM ({pairs_query}) AS pairs"
+        transform = PG_geoms_EPSG != int(geoms_EPSG)
+        copy_column = "geom_in" if transform else "geom"
+        for chunk in iter_to_chunks(geoms_iter, self._copy_chunk_size):
+            PG_cursor.execute(f"TRUNCATE {inputs};")
+            PG_cursor.copy_expert(
+                f"COPY {inputs} (input_id, {copy_column}) FROM STDIN "
+                "WITH (FORMAT binary)",
+                _pg_binary_copy(chunk, geoms_EPSG),
+            )
+            if transform:
+                PG_cursor.execute(
+                    f"UPDATE {inputs} SET geom = ST_Transform(geom_in, "
+                    f"{PG_geoms_EPSG});"
+                )
+            PG_cursor.execute(f"ANALYZE {inputs};")
+            PG_cursor.execute(SQL_query)
+            matched_ids = {row[0] for row in PG_cursor}
+            yield chunk, matched_ids
+
+    def _unmatched_refs_query(self, select, matched, AOI_geom, geoms_EPSG):
+        path2table, PG_geoms_EPSG = self._source_table(geoms_EPSG)
+        where_clause = self._aoi_where_clause(AOI_geom, geoms_EPSG, PG_geoms_EPSG)
+        return (
+            f"SELECT {select} FROM {path2table} AS t "
+            + where_clause
+            + (" AND " if where_clause else "WHERE ")
+            + f"NOT EXISTS (SELECT 1 FROM {matched} AS m WHERE m.ref_id = t.ctid)"
+        )
+
+    def _server_side_generator(
+        self, geoms_iter, geoms_EPSG, same_geoms_func, matching_geoms=True
+    ) -> Generator[GeomObject]:
+        """Yield (non-)matching features, compared within the database
+        (see :meth:`_server_side_matches`).
+        """
+        PG_cursor = self.PG_conn.cursor()
+        with self._temp_tables(PG_cursor) as tables:
+            for chunk, matched_ids in self._server_side_matches(
+                PG_cursor, tables, geoms_iter, geoms_EPSG, same_geoms_func, False
+            ):
+                for i, geom in enumerate(chunk):
+                    if (i in matched_ids) == matching_geoms:
+                        yield geom
+        PG_cursor.close()
+
+    def _server_side_missing(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func):
+        PG_cursor = self.PG_conn.cursor()
+        with self._temp_tables(PG_cursor) as tables:
+            for _ in self._server_side_matches(
+                PG_cursor, tables, geoms_iter, geoms_EPSG, same_geoms_func, True
+            ):
+                pass
+            refs_cursor = _server_side_cursor(self.PG_conn, self.itersize)
+            refs_cursor.execute(
+                self._unmatched_refs_query(
+                    f"ST_AsBinary(ST_Transform(t.{self.PG_geoms_column}, "
+                    f"{geoms_EPSG}))",
+                    tables[1],
+                    AOI_geom,
+                    geoms_EPSG,
+                )
+            )
+            ## The cursor must be closed before the tables are dropped.
+            try:
+                yield from _fetch_geoms(refs_cursor, self.itersize)
+            finally:
+                refs_cursor.close()
+        PG_cursor.close()
+
+    def _server_side_counts(
+        self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func, count_missing
+    ):
+        PG_cursor = self.PG_conn.cursor()
+        geoms_num = tp_num = 0
+        mg_num = None
+        with self._temp_tables(PG_cursor) as tables:
+            for chunk, matched_ids in self._server_side_matches(
+                PG_cursor,
+                tables,
+                geoms_iter,
+                geoms_EPSG,
+                same_geoms_func,
+                count_missing,
+            ):
+                geoms_num += len(chunk)
+                tp_num += len(matched_ids)
+            if count_missing:
+                PG_cursor.execute(
+                    self._unmatched_refs_query(
+                        "COUNT(*)", tables[1], AOI_geom, geoms_EPSG
+                    )
+                )
+                mg_num = PG_cursor.fetchone()[0]
+        PG_cursor.close()
+        return tp_num, geoms_num - tp_num, mg_num
+
+    def _fused_comparison(self, geoms, AOI_geom, geoms_EPSG, same_geoms_func):
+        if not self._server_side_support(same_geoms_func):
+            return super()._fused_comparison(
+                geoms, AOI_geom, geoms_EPSG, same_geoms_func
+            )
+        PG_cursor = self.PG_conn.cursor()
+        matched_inputs = set()
+        offset = 0
+        with self._temp_tables(PG_cursor) as tables:
+            for chunk, matched_ids in self._server_side_matches(
+                PG_cursor, tables, geoms, geoms_EPSG, same_geoms_func, True
+            ):
+                matched_inputs.update(offset + i for i in matched_ids)
+                offset += len(chunk)
+            PG_cursor.execute(f"SELECT ref_id::text FROM {tables[1]};")
+            matched_refs = {row[0] for row in PG_cursor}
+        PG_cursor.close()
+        return matched_inputs, matched_refs
 
 
 class RtreeGeomRefDB(GeomRefDB):
+    """In-memory implementation of the GeomRefDB ABC using an R-tree.
+
+    The reference geometries are stored in a numpy array, and their
+    bounding boxes are bulk-loaded (packed) once into a
+    :class:`rtree.index.Index`, through its stream interface. The index
+    only stores the positions of the geometries in the array.
+
+    Parameters
+    ----------
+    geoms_iter : iterable of `.GeomObject`
+        Iterable of reference geometrical features.
+    geoms_EPSG : `int`
+        EPSG code of the reference geometrical features.
+    """
+
     def __init__(self, geoms_iter, geoms_EPSG):
-        self.index = rtree.index.Index()
-        for i, geom in enumerate(geoms_iter):
-            self.index.insert(i, geom.bounds, obj=geom)
+        self.geoms = np.array(list(geoms_iter), dtype=object)
+        if len(self.geoms):
+            bounds = shapely.bounds(self.geoms).tolist()
+            self.index = rtree.index.Index(
+                ((i, bbox, None) for i, bbox in enumerate(bounds)),
+                interleaved=True,
+            )
+        else:
+            ## libspatialindex cannot bulk-load an empty stream.
+            self.index = rtree.index.Index(interleaved=True)
         self.EPSG = geoms_EPSG
 
     def true_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
         logger = _setup_logger()
         logger.info("Searching true positive geometries...")
+        ref_cache = RefGeomCache()
+        same_geoms_func = ref_cache.bind(same_geoms_func)
         transform = geoms_EPSG != self.EPSG
         if transform:
-            geoms_crs = pyproj.CRS(f"EPSG:{geoms_EPSG}")
-            ref_DB_crs = pyproj.CRS(f"EPSG:{self.EPSG}")
-            project = pyproj.Transformer.from_crs(
-                geoms_crs, ref_DB_crs, always_xy=True
-            ).transform
+            project = get_transform_func(geoms_EPSG, self.EPSG)
             for geom in geoms_iter:
-                geom_reproj = shapely.ops.transform(project, geom)
+                geom_reproj = project(geom)
                 if any(
-                    same_geoms_func(geom_reproj, el.object)
-                    for el in self.index.intersection(geom_reproj.bounds, objects=True)
+                    same_geoms_func(geom_reproj, self._cached_ref(ref_cache, i))
+                    for i in self.index.intersection(geom_reproj.bounds)
                 ):
                     yield geom
         else:
             for geom in geoms_iter:
                 if any(
-                    same_geoms_func(geom, el.object)
-                    for el in self.index.intersection(geom.bounds, objects=True)
+                    same_geoms_func(geom, self._cached_ref(ref_cache, i))
+                    for i in self.index.intersection(geom.bounds)
                 ):
                     yield geom
         logger.info("Done searching true positive geometries.")
@@ -206,75 +780,235 @@ class RtreeGeomRefDB(GeomRefDB):
     def false_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
         logger = _setup_logger()
         logger.info("Searching false positive geometries...")
+        ref_cache = RefGeomCache()
+        same_geoms_func = ref_cache.bind(same_geoms_func)
         transform = geoms_EPSG != self.EPSG
         if transform:
-            geoms_crs = pyproj.CRS(f"EPSG:{geoms_EPSG}")
-            ref_DB_crs = pyproj.CRS(f"EPSG:{self.EPSG}")
-            project = pyproj.Transformer.from_crs(
-                geoms_crs, ref_DB_crs_crs, always_xy=True
-            ).transform
+            project = get_transform_func(geoms_EPSG, self.EPSG)
             for geom in geoms_iter:
-                geom_reproj = shapely.ops.transform(project, geom)
+                geom_reproj = project(geom)
                 if not any(
-                    same_geoms_func(geom_reproj, el.object)
-                    for el in self.index.intersection(geom_reproj.bounds, objects=True)
+                    same_geoms_func(geom_reproj, self._cached_ref(ref_cache, i))
+                    for i in self.index.intersection(geom_reproj.bounds)
                 ):
                     yield geom
         else:
             for geom in geoms_iter:
                 if not any(
-                    same_geoms_func(geom, el.object)
-                    for el in self.index.intersection(geom.bounds, objects=True)
+                    same_geoms_func(geom, self._cached_ref(ref_cache, i))
+                    for i in self.index.intersection(geom.bounds)
                 ):
                     yield geom
         logger.info("Done searching false positive geometries.")
 
+    def _cached_ref(self, ref_cache, i):
+        return ref_cache.get(i, lambda: self.geoms[i])
+
     def intersecting_idx_geoms(self, poly=None, bounds=None):
         if poly is not None:
-            for el in self.index.intersection(poly.bounds, objects=True):
-                idx_geom = el.object
+            for i in self.index.intersection(poly.bounds):
+                idx_geom = self.geoms[i]
                 if poly.intersects(idx_geom):
                     yield idx_geom
         else:
             if bounds is None:
-                bounds = self.index.bounds
-            for el in self.index.intersection(bounds, objects=True):
-                yield el.object
+                yield from self.geoms
+                return
+            for i in self.index.intersection(bounds):
+                yield self.geoms[i]
 
     def missing_geometries(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func):
         logger = _setup_logger()
         logger.info("Searching missing geometries...")
-        index = rtree.index.Index()
-        for i, geom in enumerate(geoms_iter):
-            index.insert(i, geom.bounds, obj=geom)
+        index = _GeomsIndex(geoms_iter)
         transform = geoms_EPSG != self.EPSG
         if transform:
-            geoms_crs = pyproj.CRS(f"EPSG:{geoms_EPSG}")
-            ref_DB_crs = pyproj.CRS(f"EPSG:{self.EPSG}")
-            project = pyproj.Transformer.from_crs(
-                ref_DB_crs, geoms_crs, always_xy=True
-            ).transform
+            project = get_transform_func(self.EPSG, geoms_EPSG)
             if AOI_geom is not None:
-                project_AOI = pyproj.Transformer.from_crs(
-                    geoms_crs, ref_DB_crs, always_xy=True
-                ).transform
-                AOI_geom = shapely.ops.transform(project_AOI, AOI_geom)
-            for ref_geom in self.intersecting_idx_geoms(poly=AOI_geom):
-                ref_geom = shapely.ops.transform(project, ref_geom)
-                if not any(
-                    same_geoms_func(el.object, ref_geom)
-                    for el in index.intersection(ref_geom.bounds, objects=True)
-                ):
-                    yield ref_geom
+                AOI_geom = get_transform_func(geoms_EPSG, self.EPSG)(AOI_geom)
+            ref_geoms_iter = (
+                project(ref_geom)
+                for ref_geom in self.intersecting_idx_geoms(poly=AOI_geom)
+            )
         else:
-            for ref_geom in self.intersecting_idx_geoms(poly=AOI_geom):
-                if not any(
-                    same_geoms_func(el.object, ref_geom)
-                    for el in index.intersection(ref_geom.bounds, objects=True)
-                ):
-                    yield ref_geom
+            ref_geoms_iter = self.intersecting_idx_geoms(poly=AOI_geom)
+        yield from index.unmatched(ref_geoms_iter, same_geoms_func)
+        logger.info("Done searching missing geometries.")
+
+    def _candidate_pairs(self, geoms, geoms_EPSG):
+        if geoms_EPSG != self.EPSG:
+            project = get_transform_func(geoms_EPSG, self.EPSG)
+        else:
+            project = _unchanged_geom
+        for i, geom in enumerate(geoms):
+            geom_reproj = project(geom)
+            for ref_id in self.index.intersection(geom_reproj.bounds):
+                yield i, ref_id, geom_reproj, self.geoms[ref_id]
+
+    def _aoi_index_ids(self, AOI_geom, geoms_EPSG):
+        if AOI_geom is None:
+            yield from range(len(self.geoms))
+            return
+        if geoms_EPSG != self.EPSG:
+            AOI_geom = get_transform_func(geoms_EPSG, self.EPSG)(AOI_geom)
+        for ref_id in self.index.intersection(AOI_geom.bounds):
+            if AOI_geom.intersects(self.geoms[ref_id]):
+                yield ref_id
+
+    def _aoi_reference_geoms(self, AOI_geom, geoms_EPSG):
+        if geoms_EPSG != self.EPSG:
+            project = get_transform_func(self.EPSG, geoms_EPSG)
+        else:
+            project = _unchanged_geom
+        for ref_id in self._aoi_index_ids(AOI_geom, geoms_EPSG):
+            yield ref_id, project(self.geoms[ref_id])
+
+    def _aoi_reference_keys(self, AOI_geom, geoms_EPSG):
+        yield from self._aoi_index_ids(AOI_geom, geoms_EPSG)
+
+
+class STRtreeGeomRefDB(GeomRefDB):
+    """In-memory implementation of the GeomRefDB ABC using an STRtree.
+
+    The reference geometries are stored in a numpy array, and indexed
+    by a :class:`shapely.STRtree`. The input geometries are processed
+    chunk by chunk: the candidate pairs of a whole chunk are searched
+    for in a single bulk query of the tree, and are evaluated by the
+    comparison function in a single call, if the latter provides a
+    vectorized ``batch`` entry point.
+
+    Parameters
+    ----------
+    geoms_iter : iterable of `.GeomObject`
+        Iterable of reference geometrical features.
+    geoms_EPSG : `int`
+        EPSG code of the reference geometrical features.
+    """
+
+    _chunk_size = 10000
+
+    def __init__(self, geoms_iter, geoms_EPSG):
+        self.geoms = np.array(list(geoms_iter), dtype=object)
+        self.tree = shapely.STRtree(self.geoms)
+        self.EPSG = geoms_EPSG
+
+    def _matching_pairs(self, geoms_iter, geoms_EPSG, same_geoms_func):
+        """Yield ``(chunk, input_idx, ref_idx)`` tuples, where
+        ``input_idx`` and ``ref_idx`` are aligned arrays of indices of
+        the matching input geometries of the chunk and reference
+        geometries.
+        """
+        if geoms_EPSG != self.EPSG:
+            project = get_transform_func(geoms_EPSG, self.EPSG)
+        else:
+            project = _unchanged_geom
+        for chunk in iter_to_chunks(geoms_iter, self._chunk_size):
+            chunk = np.array(chunk, dtype=object)
+            geoms_reproj = project(chunk)
+            input_idx, ref_idx = self.tree.query(geoms_reproj)
+            match = _batch_match(
+                same_geoms_func, geoms_reproj[input_idx], self.geoms[ref_idx]
+            )
+            yield chunk, input_idx[match], ref_idx[match]
+
+    def _aoi_ref_indices(self, AOI_geom, geoms_EPSG):
+        if AOI_geom is None:
+            return np.arange(len(self.geoms))
+        if geoms_EPSG != self.EPSG:
+            AOI_geom = get_transform_func(geoms_EPSG, self.EPSG)(AOI_geom)
+        return np.sort(self.tree.query(AOI_geom, predicate="intersects"))
+
+    def true_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
+        logger = _setup_logger()
+        logger.info("Searching true positive geometries...")
+        for chunk, input_idx, _ in self._matching_pairs(
+            geoms_iter, geoms_EPSG, same_geoms_func
+        ):
+            matched = np.zeros(len(chunk), dtype=bool)
+            matched[input_idx] = True
+            yield from chunk[matched]
+        logger.info("Done searching true positive geometries.")
+
+    def false_positives(self, geoms_iter, geoms_EPSG, same_geoms_func):
+        logger = _setup_logger()
+        logger.info("Searching false positive geometries...")
+        for chunk, input_idx, _ in self._matching_pairs(
+            geoms_iter, geoms_EPSG, same_geoms_func
+        ):
+            matched = np.zeros(len(chunk), dtype=bool)
+            matched[input_idx] = True
+            yield from chunk[~matched]
+        logger.info("Done searching false positive geometries.")
+
+    def missing_geometries(self, geoms_iter, AOI_geom, geoms_EPSG, same_geoms_func):
+        logger = _setup_logger()
+        logger.info("Searching missing geometries...")
+        matched = np.zeros(len(self.geoms), dtype=bool)
+        for _, _, ref_idx in self._matching_pairs(
+            geoms_iter, geoms_EPSG, same_geoms_func
+        ):
+            matched[ref_idx] = True
+        ref_idx = self._aoi_ref_indices(AOI_geom, geoms_EPSG)
+        ref_idx = ref_idx[~matched[ref_idx]]
+        for _, ref_geom in self._reference_geoms(ref_idx, geoms_EPSG):
+            yield ref_geom
         logger.info("Done searching missing geometries.")
 
+    def _reference_geoms(self, ref_idx, geoms_EPSG):
+        if geoms_EPSG != self.EPSG:
+            project = get_transform_func(self.EPSG, geoms_EPSG)
+        else:
+            project = _unchanged_geom
+        for i in ref_idx.tolist():
+            yield i, project(self.geoms[i])
+
+    def _candidate_pairs(self, geoms, geoms_EPSG):
+        if geoms_EPSG != self.EPSG:
+            project = get_transform_func(geoms_EPSG, self.EPSG)
+        else:
+            project = _unchanged_geom
+        offset = 0
+        for chunk in iter_to_chunks(geoms, self._chunk_size):
+            geoms_reproj = project(np.array(chunk, dtype=object))
+            input_idx, ref_idx = self.tree.query(geoms_reproj)
+            for i, j in zip(input_idx.tolist(), ref_idx.tolist()):
+                yield offset + i, j, geoms_reproj[i], self.geoms[j]
+            offset += len(chunk)
+
+    def _fused_comparison(self, geoms, AOI_geom, geoms_EPSG, same_geoms_func):
+        matched_inputs = set()
+        matched_refs = set()
+        offset = 0
+        for chunk, input_idx, ref_idx in self._matching_pairs(
+            geoms, geoms_EPSG, same_geoms_func
+        ):
+            matched_inputs.update((input_idx + offset).tolist())
+            matched_refs.update(ref_idx.tolist())
+            offset += len(chunk)
+        return matched_inputs, matched_refs
+
+    def _aoi_reference_geoms(self, AOI_geom, geoms_EPSG):
+        ref_idx = self._aoi_ref_indices(AOI_geom, geoms_EPSG)
+        yield from self._reference_geoms(ref_idx, geoms_EPSG)
+
+    def _aoi_reference_keys(self, AOI_geom, geoms_EPSG):
+        yield from self._aoi_ref_indices(AOI_geom, geoms_EPSG).tolist()
+
+## Size of the cache of compiled statements of the SQLite connections.
+_SQLITE_CACHED_STATEMENTS = 256
+
+## Columns derived from the geometries, which can be stored alongside
+## them (see SQLiteGeomRefDB.add_geometries): SQL types and SpatiaLite
+## expressions.
+_DERIVED_COLUMNS = {
+    "area": ("REAL", "ST_Area(geometry)"),
+    "minx": ("REAL", "MbrMinX(geometry)"),
+    "miny": ("REAL", "MbrMinY(geometry)"),
+    "maxx": ("REAL", "MbrMaxX(geometry)"),
+    "maxy": ("REAL", "MbrMaxY(geometry)"),
+    "num_vertices": ("INTEGER", "ST_NPoints(geometry)"),
+}
+
 #: Geometry types supported by the `SQLiteGeomRefDB` class.
 SpatialiteGeomType = Literal[
     "Point",
@@ -286,6 +1020,21 @@ SpatialiteGeomType = Literal[
     "GeometryCollection",
 ]
 
+def _reprojected_table_name(geoms_tab_name, epsg):
+    ## Name of the reprojected copy of a table (see
+    ## SQLiteGeomRefDB.add_reprojected_copy).
+    return f"{geoms_tab_name}_epsg{epsg}"
+
+
+def _geom_values(geom, epsg):
+    return geom.wkb, epsg
+
+
+def _geom_derived_values(geom, epsg):
+    num_vertices = int(shapely.get_num_coordinates(geom))
+    return (geom.wkb, epsg, geom.area, *geom.bounds, num_vertices)
+
+
 class SQLiteGeomRefDB(GeomRefDB):
     """Concrete implementation of the GeomRefDB ABC using SQLite.
 
@@ -349,6 +1098,16 @@ class SQLiteGeomRefDB(GeomRefDB):
     instances of this class.
     """
 
+    #: Number of input features whose candidates are searched with a
+    #: single SQL statement.
+    _search_chunk_size = 1000
+    #: Maximum number of input features per task sent to the worker
+    #: processes.
+    _parallel_chunk_size = 256
+    #: Maximum number of prepared reference features kept in cache
+    #: while comparing features.
+    _ref_cache_size = 4096
+
     def __init__(
         self,
         filename: Optional[str] = None,
@@ -362,6 +1121,11 @@ class SQLiteGeomRefDB(GeomRefDB):
         logger_name: Optional[str] = None,
         logging_level: int = logging.INFO,
     ) -> None:
+        self._free_frames_tables = list()
+        self._pool = None
+        self._geom_info_cache = None
+        self._count_cache = dict()
+        self._derived_columns_cache = dict()
         if filename is not None:
             self._filename = os.path.abspath(filename)
         else:
@@ -369,7 +1133,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         if default_epsg is not None:
             try:
                 default_epsg = int(default_epsg)
-                _ = pyproj.CRS(default_epsg)
+                _ = _get_crs(default_epsg)
             except (CRSError, ValueError, TypeError):
                 raise ValueError("{!r} ('default_epsg') is not a valid EPSG code!")
             else:
@@ -394,7 +1158,9 @@ class SQLiteGeomRefDB(GeomRefDB):
                     "The 'filename' cannot be set to None if 'in_ram' is set to False!"
                 )
             else:
-                self._conn = sqlite3.connect(":memory:")
+                self._conn = sqlite3.connect(
+                    ":memory:", cached_statements=_SQLITE_CACHED_STATEMENTS
+                )
                 self._conn.enable_load_extension(True)
                 self._conn.load_extension("mod_spatialite")
                 cursor = self._conn.cursor()
@@ -402,7 +1168,9 @@ class SQLiteGeomRefDB(GeomRefDB):
                 self._conn.commit()
                 self._logger.info("New database created in RAM.")
         elif in_ram:
-            self._conn = sqlite3.connect(":memory:")
+            self._conn = sqlite3.connect(
+                ":memory:", cached_statements=_SQLITE_CACHED_STATEMENTS
+            )
             self._conn.enable_load_extension(True)
             self._conn.load_extension("mod_spatialite")
             if not new_db:
@@ -413,18 +1181,20 @@ class SQLiteGeomRefDB(GeomRefDB):
                     f"Database file {filename!r} successfully loaded in RAM."
                 )
             else:
-                cursor = conn.cursor()
+                cursor = self._conn.cursor()
                 cursor.execute("SELECT InitSpatialMetaData();")
                 self._conn.commit()
                 self._logger.info(
-                    f"File {dp_path!r} does not exist, new database created in RAM."
+                    f"File {filename!r} does not exist, new database created in RAM."
                 )
         else:
-            self._conn = sqlite3.connect(filename)
+            self._conn = sqlite3.connect(
+                filename, cached_statements=_SQLITE_CACHED_STATEMENTS
+            )
             self._conn.enable_load_extension(True)
             self._conn.load_extension("mod_spatialite")
             if new_db:
-                cursor = conn.cursor()
+                cursor = self._conn.cursor()
                 cursor.execute("SELECT InitSpatialMetaData();")
                 self._conn.commit()
                 self._logger.info(f"New database created at {filename!r}.")
@@ -501,11 +1271,13 @@ class SQLiteGeomRefDB(GeomRefDB):
         """Close the connection to the SQLite database and do some
         cleanup if the instance has been pickled.
         """
+        if getattr(self, "_pool", None) is not None:
+            self._pool.terminate()
         self._conn.close()
         if hasattr(self, "db_tf") and os.path.isfile(self.db_tf):
             try:
                 os.remove(self.db_tf)
-            except PermissionError:
+            except (PermissionError, FileNotFoundError):
                 pass
 
     def __getstate__(self):
@@ -519,6 +1291,8 @@ class SQLiteGeomRefDB(GeomRefDB):
         attrs = self.__dict__.copy()
         attrs["db_tf"] = db_tf.name
         attrs["_conn"] = None
+        attrs["_free_frames_tables"] = list()
+        attrs["_pool"] = None
         return attrs
 
     def __setstate__(self, state):
@@ -527,11 +1301,15 @@ class SQLiteGeomRefDB(GeomRefDB):
         self.__dict__ = state
         if self.in_ram:
             disk_conn = sqlite3.connect(self.db_tf)
-            self._conn = sqlite3.connect(":memory:")
+            self._conn = sqlite3.connect(
+                ":memory:", cached_statements=_SQLITE_CACHED_STATEMENTS
+            )
             disk_conn.backup(self._conn)
             disk_conn.close()
         else:
-            self._conn = sqlite3.connect(self.db_tf)
+            self._conn = sqlite3.connect(
+                self.db_tf, cached_statements=_SQLITE_CACHED_STATEMENTS
+            )
         self._conn.enable_load_extension(True)
         self._conn.load_extension("mod_spatialite")
 
@@ -581,6 +1359,10 @@ class SQLiteGeomRefDB(GeomRefDB):
         geom_type: Optional[SpatialiteGeomType] = None,
         geoms_epsg: Optional[int] = None,
         geoms_tab_name: Optional[str] = None,
+        batch_size: int = 10000,
+        defer_spatial_index: bool = False,
+        derived_columns: bool = False,
+        bulk_load: bool = False,
     ) -> None:
         """Add geometrical features to the internal SQLite database.
 
@@ -618,6 +1400,39 @@ class SQLiteGeomRefDB(GeomRefDB):
             features into a table named *default_table*. The
             *default_table* table will be created if it does not
             already exist in the database.
+        batch_size : `int`, default: ``10000``
+            Number of geometrical features sent to the database per
+            batch of insertions. All the batches are inserted within
+            a single transaction.
+        defer_spatial_index : `bool`, default: ``False``
+            If set to ``True``, the spatial index of the destination
+            table is built in a single pass once all the input
+            features have been inserted, instead of being updated
+            after each insertion. In the case of an existing table,
+            its spatial index is dropped before the insertions and
+            rebuilt afterwards. This is much faster for large loads.
+        derived_columns : `bool`, default: ``False``
+            If set to ``True``, columns derived from the geometries are
+            stored alongside them: *area*, *minx*, *miny*, *maxx*,
+            *maxy* (bounding box) and *num_vertices*. In the case of an
+            existing table, the columns are added and filled for the
+            features already stored. Once a table has derived columns,
+            they are filled for all the features added afterwards.
+            Comparisons with the area-based functions of
+            :func:`.polygons_area_match` then prune the candidate
+            features in SQL, from the ratio of their areas to the areas
+            of the input features.
+        bulk_load : `bool`, default: ``False``
+            If set to ``True``, journaling and disk synchronization are
+            turned off for the duration of the insertions, which speeds
+            up large loads into a database file. This is always the
+            case for databases stored in RAM.
+
+        Warnings
+        --------
+        With ``bulk_load=True``, the database file may be corrupted if
+        the process or the operating system crashes during the
+        insertions.
 
         Raises
         ------
@@ -660,7 +1475,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         if geoms_epsg is not None:
             try:
                 geoms_epsg = int(geoms_epsg)
-                _ = pyproj.CRS(geoms_epsg)
+                _ = _get_crs(geoms_epsg)
             except (CRSError, ValueError, TypeError):
                 raise ValueError(f"{geoms_epsg!r} is not a valid EPSG code!")
         if geoms_tab_name is None:
@@ -685,37 +1500,335 @@ class SQLiteGeomRefDB(GeomRefDB):
                         "'geoms_epsg' cannot be passed None if no default EPSG has "
                         "been set!"
                     )
-            cursor.execute(
-                f"CREATE TABLE {geoms_tab_name} "
-                "(r_id INTEGER PRIMARY KEY AUTOINCREMENT);"
-            )
+            columns = "r_id INTEGER PRIMARY KEY AUTOINCREMENT"
+            if derived_columns:
+                columns += "".join(
+                    f", {col} {col_type}"
+                    for col, (col_type, _) in _DERIVED_COLUMNS.items()
+                )
+            cursor.execute(f"CREATE TABLE {geoms_tab_name} ({columns});")
             cursor.execute(
                 f"SELECT AddGeometryColumn ('{geoms_tab_name}', "
                 f"'geometry', {geoms_epsg}, '{geom_type}', 'XY', 1);"
             )
-            cursor.execute(
-                f"SELECT CreateSpatialIndex('{geoms_tab_name}', 'geometry');"
+            if not defer_spatial_index:
+                cursor.execute(
+                    f"SELECT CreateSpatialIndex('{geoms_tab_name}', 'geometry');"
+                )
+            self._conn.commit()
+            self._invalidate_geom_info()
+
+        else:  # if existing table
+            if geom_type is not None and geom_type != tab_info["geom_type"]:
+                raise ValueError(
+                    f"The {geom_type!r} geometry type does not match the geometry type "
+                    f"of the {geoms_tab_name!r} table!"
+                )
+            if geoms_epsg is None:
+                geoms_epsg = tab_info["srid"]
+            elif geoms_epsg != tab_info["srid"]:
+                transform_geom = get_transform_func(geoms_epsg, tab_info["srid"])
+                geoms_epsg = tab_info["srid"]
+            if derived_columns and not self._has_derived_columns(geoms_tab_name):
+                self._add_derived_columns(geoms_tab_name)
+            if defer_spatial_index:
+                self._drop_spatial_index(geoms_tab_name)
+        if self._has_derived_columns(geoms_tab_name):
+            insert_query = (
+                f"INSERT INTO {geoms_tab_name} "
+                f"(geometry, {', '.join(_DERIVED_COLUMNS)}) "
+                f"VALUES (GeomFromWKB(?, ?){', ?' * len(_DERIVED_COLUMNS)});"
+            )
+            get_values = _geom_derived_values
+        else:
+            insert_query = (
+                f"INSERT INTO {geoms_tab_name} (geometry) VALUES (GeomFromWKB(?, ?));"
             )
+            get_values = _geom_values
+        n_geoms = 0
+        start = time.perf_counter()
+        with self._bulk_load_pragmas(bulk_load):
+            try:
+                for batch in iter_to_chunks(geoms_iter, batch_size):
+                    batch_reproj = transform_geom(
+                        _to_2D(np.array(batch, dtype=object))
+                    )
+                    cursor.executemany(
+                        insert_query,
+                        (get_values(geom, geoms_epsg) for geom in batch_reproj),
+                    )
+                    n_geoms += len(batch)
+            except Exception:
+                self._conn.rollback()
+                self._invalidate_geom_info(geoms_tab_name)
+                ## The spatial index must be rebuilt even if the
+                ## insertions failed, as the table may already hold
+                ## features. A failure to do so must not hide the
+                ## original error.
+                if defer_spatial_index:
+                    try:
+                        self._build_spatial_index(geoms_tab_name)
+                    except Exception as exc:
+                        self._conn.rollback()
+                        self.logger.error(
+                            "The spatial index of the "
+                            f"{geoms_tab_name!r} table could not be rebuilt: {exc!r}"
+                        )
+                raise
             self._conn.commit()
+            if defer_spatial_index:
+                self._build_spatial_index(geoms_tab_name)
+        if geoms_tab_name in self._count_cache:
+            self._count_cache[geoms_tab_name] += n_geoms
+        for copy_tab_name, copy_epsg in self._reprojected_copies(
+            geoms_tab_name
+        ).items():
+            self._sync_reprojected_copy(geoms_tab_name, copy_tab_name, copy_epsg)
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            f"{n_geoms} geometries added to the {geoms_tab_name!r} table in "
+            f"{elapsed:.2f}s ({n_geoms / max(elapsed, 1e-9):.0f} rows/s)."
+        )
+
+    def _add_derived_columns(self, geoms_tab_name: str) -> None:
+        """Add the derived columns to a table, and fill them for the
+        features already stored.
+        """
+        self.logger.info(f"Adding derived columns to the {geoms_tab_name!r} table...")
+        cursor = self._conn.cursor()
+        for col, (col_type, _) in _DERIVED_COLUMNS.items():
+            cursor.execute(f"ALTER TABLE {geoms_tab_name} ADD COLUMN {col} {col_type};")
+        assignments = ", ".join(
+            f"{col} = {expr}" for col, (_, expr) in _DERIVED_COLUMNS.items()
+        )
+        cursor.execute(f"UPDATE {geoms_tab_name} SET {assignments};")
+        self._conn.commit()
+        self._invalidate_geom_info()
+
+    def _drop_spatial_index(self, geoms_tab_name: str) -> None:
+        """Disable and drop the spatial index of a table, if any."""
+        cursor = self._conn.cursor()
+        cursor.execute(
+            "SELECT spatial_index_enabled FROM geometry_columns "
+            "WHERE f_table_name = ? AND f_geometry_column = 'geometry';",
+            (geoms_tab_name.lower(),),
+        )
+        row = cursor.fetchone()
+        if row is None or not row[0]:
+            return
+        self.logger.info(
+            f"Dropping the spatial index of the {geoms_tab_name!r} table..."
+        )
+        cursor.execute(f"SELECT DisableSpatialIndex('{geoms_tab_name}', 'geometry');")
+        cursor.execute(f"DROP TABLE IF EXISTS idx_{geoms_tab_name}_geometry;")
+        self._conn.commit()
+
+    def _build_spatial_index(self, geoms_tab_name: str) -> None:
+        """Build the spatial index of a table in a single pass over its
+        features.
+        """
+        self.logger.info(
+            f"Building the spatial index of the {geoms_tab_name!r} table..."
+        )
+        start = time.perf_counter()
+        cursor = self._conn.cursor()
+        cursor.execute(f"SELECT CreateSpatialIndex('{geoms_tab_name}', 'geometry');")
+        self._conn.commit()
+        self.logger.info(f"Spatial index built in {time.perf_counter() - start:.2f}s.")
+
+    def add_reprojected_copy(
+        self, epsg: int, geoms_tab_name: Optional[str] = None, refresh: bool = False
+    ) -> str:
+        """Store a reprojected copy of a table of the internal SQLite
+        database.
+
+        The features of the table are reprojected by SpatiaLite into a
+        new table, named after the table and the EPSG code (e.g.
+        *default_table_epsg4326*), with a spatial index (and derived
+        columns, if the table has them). The public methods of the
+        `SQLiteGeomRefDB` instance called with *input* features in that
+        spatial reference system then use the copy as reference,
+        without reprojecting the *input* features. The features added
+        afterwards to the table with :meth:`add_geometries` are also
+        added to its reprojected copies.
+
+        If the copy already exists, the features added to the table
+        since it was made are added to it. If features were deleted
+        from the table (e.g. by another program), the copy is rebuilt.
+        Features modified in place are not detected: the copy must then
+        be rebuilt with ``refresh=True``.
+
+        Parameters
+        ----------
+        epsg : `int`
+            EPSG code of the spatial reference system of the copy.
+        geoms_tab_name : `str`, optional
+            Name of the table to copy. If no argument is passed to the
+            ``geoms_tab_name`` parameter, the *default_table* table is
+            copied.
+        refresh : `bool`, default: ``False``
+            Rebuild the copy if it already exists.
+
+        Returns
+        -------
+        `str`
+            Name of the table of the copy (or of the table itself if it
+            is already in the given spatial reference system).
+
+        Raises
+        ------
+        RuntimeError
+            If the table does not exist in the database.
+        ValueError
+            If ``epsg`` is not a valid EPSG code.
+        """
+        geoms_tab_name, tab_epsg, epsg = self._table_srs(
+            geoms_tab_name, epsg, reprojected=False
+        )
+        if epsg == tab_epsg:
+            return geoms_tab_name
+        copy_tab_name = _reprojected_table_name(geoms_tab_name, epsg)
+        if copy_tab_name in self.db_geom_info():
+            self._sync_reprojected_copy(
+                geoms_tab_name, copy_tab_name, epsg, rebuild=refresh
+            )
+            return copy_tab_name
+        self.logger.info(
+            f"Copying the {geoms_tab_name!r} table to the {copy_tab_name!r} table "
+            f"(EPSG:{epsg})..."
+        )
+        geom_type = self.db_geom_info()[geoms_tab_name]["geom_type"]
+        cursor = self._conn.cursor()
+        cursor.execute(
+            f"CREATE TABLE {copy_tab_name} "
+            "(r_id INTEGER PRIMARY KEY AUTOINCREMENT);"
+        )
+        cursor.execute(
+            f"SELECT AddGeometryColumn ('{copy_tab_name}', "
+            f"'geometry', {epsg}, '{geom_type}', 'XY', 1);"
+        )
+        if self._has_derived_columns(geoms_tab_name):
+            for col, (col_type, _) in _DERIVED_COLUMNS.items():
+                cursor.execute(
+                    f"ALTER TABLE {copy_tab_name} ADD COLUMN {col} {col_type};"
+                )
+        self._conn.commit()
+        self._invalidate_geom_info()
+        with self._bulk_load_pragmas():
+            self._sync_reprojected_copy(geoms_tab_name, copy_tab_name, epsg)
+        self._build_spatial_index(copy_tab_name)
+        return copy_tab_name
+
+    def _sync_reprojected_copy(
+        self, geoms_tab_name: str, copy_tab_name: str, epsg: int, rebuild: bool = False
+    ) -> None:
+        """Add the features of a table that are missing from its
+        reprojected copy (i.e. added after the copy was made).
 
-        else:  # if existing table
-            if geom_type is not None and geom_type != tab_info["geom_type"]:
-                raise ValueError(
-                    f"The {geom_type!r} geometry type does not match the geometry type "
-                    f"of the {geoms_tab_name!r} table!"
+        Features deleted from the table cannot be synchronized
+        incrementally. They are detected from the number of features of
+        the copy, which is then rebuilt, as it is if ``rebuild`` is
+        True.
+        """
+        cursor = self._conn.cursor()
+        last_id, copy_count = cursor.execute(
+            f"SELECT IFNULL(MAX(r_id), 0), COUNT(*) FROM {copy_tab_name};"
+        ).fetchone()
+        if not rebuild:
+            tab_count = cursor.execute(
+                f"SELECT COUNT(*) FROM {geoms_tab_name} WHERE r_id <= ?;", (last_id,)
+            ).fetchone()[0]
+            if tab_count != copy_count:
+                self.logger.info(
+                    f"The {copy_tab_name!r} table is out of date, rebuilding it..."
                 )
-            if geoms_epsg is None:
-                geoms_epsg = tab_info["srid"]
-            elif geoms_epsg != tab_info["srid"]:
-                transform_geom = get_transform_func(geoms_epsg, tab_info["srid"])
-                geoms_epsg = tab_info["srid"]
-        for geom in geoms_iter:
+                rebuild = True
+        if rebuild:
+            self._drop_spatial_index(copy_tab_name)
+            cursor.execute(f"DELETE FROM {copy_tab_name};")
+            last_id = 0
+        cursor.execute(
+            f"INSERT INTO {copy_tab_name} (r_id, geometry) "
+            f"SELECT r_id, Transform(geometry, {epsg}) FROM {geoms_tab_name} "
+            "WHERE r_id > ?;",
+            (last_id,),
+        )
+        if self._has_derived_columns(copy_tab_name):
+            assignments = ", ".join(
+                f"{col} = {expr}" for col, (_, expr) in _DERIVED_COLUMNS.items()
+            )
             cursor.execute(
-                f"INSERT INTO {geoms_tab_name} (geometry) VALUES "
-                f"(GeomFromText('{transform_geom(_to_2D(geom)).wkt}', "
-                f"{geoms_epsg}));"
+                f"UPDATE {copy_tab_name} SET {assignments} WHERE r_id > ?;",
+                (last_id,),
             )
         self._conn.commit()
+        if rebuild:
+            self._build_spatial_index(copy_tab_name)
+        self._count_cache.pop(copy_tab_name, None)
+
+    def _reprojected_copies(self, geoms_tab_name: str) -> dict[str, int]:
+        """Return the reprojected copies of a table, with their EPSG
+        codes.
+        """
+        pattern = re.compile(
+            re.escape(_reprojected_table_name(geoms_tab_name, "")) + r"(\d+)"
+        )
+        copies = dict()
+        for tab_name, tab_info in self.db_geom_info().items():
+            match = pattern.fullmatch(tab_name)
+            if match is not None and int(match.group(1)) == tab_info["srid"]:
+                copies[tab_name] = tab_info["srid"]
+        return copies
+
+    def _reprojected_table(
+        self, geoms_tab_name: str, geoms_epsg: Optional[int]
+    ) -> str:
+        """Return the name of the reprojected copy of a table in the
+        spatial reference system of the *input* features, if any (see
+        :meth:`add_reprojected_copy`), else the name of the table.
+        """
+        if geoms_epsg is None:
+            return geoms_tab_name
+        try:
+            geoms_epsg = int(geoms_epsg)
+        except (ValueError, TypeError):
+            return geoms_tab_name
+        copy_tab_name = _reprojected_table_name(geoms_tab_name, geoms_epsg)
+        ## Tables merely named like a copy are not used.
+        copy_info = self.db_geom_info().get(copy_tab_name, None)
+        if copy_info is not None and copy_info["srid"] == geoms_epsg:
+            return copy_tab_name
+        return geoms_tab_name
+
+    @contextmanager
+    def _bulk_load_pragmas(self, unsafe: bool = False):
+        """Temporarily tune the SQLite connection for bulk insertions.
+
+        The page cache is enlarged, and temporary data kept in memory,
+        for the duration of the ``with`` block. Journaling and disk
+        synchronization are also turned off if ``unsafe`` is set to
+        ``True`` or if the database is stored in RAM (where they do not
+        protect anything). The previous settings are restored
+        afterwards.
+        """
+        pragmas = {
+            "temp_store": "MEMORY",
+            "cache_size": "-262144",  # 256 MiB
+        }
+        if unsafe or self.in_ram:
+            pragmas.update(synchronous="OFF", journal_mode="MEMORY")
+        cursor = self._conn.cursor()
+        previous = dict()
+        for name, value in pragmas.items():
+            previous[name] = cursor.execute(f"PRAGMA {name};").fetchone()[0]
+            ## Some pragmas return the new value, which must be fetched
+            ## for the statement not to stay in progress.
+            cursor.execute(f"PRAGMA {name} = {value};").fetchall()
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                cursor.execute(f"PRAGMA {name} = {value};").fetchall()
 
     def get_geometries(
         self,
@@ -761,7 +1874,7 @@ class SQLiteGeomRefDB(GeomRefDB):
             If ``geoms_tab_name`` is not specified and no table named
             *default_table* exist in the database.
         """
-        query_kwargs = dict()
+        query_params = dict()
         ## Coordinates of input geometries are not transformed by
         ## default. Return the input geometry unchanged.
         transform_geom = _unchanged_geom
@@ -771,8 +1884,6 @@ class SQLiteGeomRefDB(GeomRefDB):
         tab_info = db_info.get(geoms_tab_name, None)
         if tab_info is None:
             raise RuntimeError(f"No {geoms_tab_name!r} table was found in the database!")
-        else:
-            query_kwargs["table"] = geoms_tab_name
         tab_epsg = tab_info["srid"]
         ## Coordinates of output geometries are not transformed by
         ## default. Return the output geometry unchanged.
@@ -780,7 +1891,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         if output_epsg is not None:
             try:
                 output_epsg = int(output_epsg)
-                _ = pyproj.CRS(output_epsg)
+                _ = _get_crs(output_epsg)
             except (CRSError, ValueError, TypeError):
                 raise ValueError(f"{output_epsg!r} is not a valid EPSG code!")
             transform_geom = get_transform_func(tab_epsg, output_epsg)
@@ -788,25 +1899,30 @@ class SQLiteGeomRefDB(GeomRefDB):
             if aoi_epsg is not None:
                 try:
                     aoi_epsg = int(aoi_epsg)
-                    _ = pyproj.CRS(aoi_epsg)
+                    _ = _get_crs(aoi_epsg)
                 except (CRSError, ValueError, TypeError):
                     raise ValueError(f"{aoi_epsg!r} is not a valid EPSG code!")
                 if aoi_epsg != tab_epsg:
                     transform_aoi = get_transform_func(aoi_epsg, tab_epsg)
                     aoi_geom = transform_aoi(aoi_geom)
-            query_kwargs["aoiwkt"] = aoi_geom.wkt
-            query_kwargs["epsg"] = tab_epsg
-        query = self._get_spatial_query(
-            spatial_index=aoi_geom is not None,
-            only_within_aoi=aoi_geom is not None,
+            query_params = {
+                "table": geoms_tab_name,
+                "aoi": aoi_geom.wkb,
+                "srid": tab_epsg,
+            }
+        query = self._get_spatial_query(within_aoi=aoi_geom is not None).format(
+            table=geoms_tab_name
         )
         cursor = self._conn.cursor()
-        cursor.execute(query.format(**query_kwargs))
-        for row in cursor:
-            yield transform_geom(wkb.loads(row[0]))
+        cursor.execute(query, query_params)
+        while rows := cursor.fetchmany(self._search_chunk_size):
+            yield from transform_geom(shapely.from_wkb([row[1] for row in rows]))
 
     def db_geom_info(
-        self, to_stdout: bool = False, count_features: bool = False
+        self,
+        to_stdout: bool = False,
+        count_features: bool = False,
+        refresh: bool = False,
     ) -> Optional[dict]:
         """Get information on features stored in the internal SQLite database.
 
@@ -826,6 +1942,13 @@ class SQLiteGeomRefDB(GeomRefDB):
             If set to ``True``, the function will also return the number of
             features/rows per table. If set to ``False``, the features will
             not be counted.
+        refresh : bool, default: ``False``
+            The information is cached by the instance, and only
+            refreshed after the database has been modified through the
+            instance (e.g. with :meth:`add_geometries`). Set to
+            ``True`` to force the refresh of the cached information,
+            e.g. if the database file has been modified by another
+            program.
 
         Returns
         -------
@@ -839,16 +1962,26 @@ class SQLiteGeomRefDB(GeomRefDB):
             features count (key: *count*). The function returns `None` if
             ``to_stdout=True``.
         """
+        if refresh:
+            self._invalidate_geom_info()
         cursor = self._conn.cursor()
-        cursor.execute("SELECT * FROM geometry_columns")
-        info = {
-            tab[0]: {"geom_type": _geom_type_mapping[tab[2]], "srid": tab[4]}
-            for tab in cursor.fetchall()
-        }
+        if self._geom_info_cache is None:
+            cursor.execute(
+                "SELECT f_table_name, geometry_type, srid FROM geometry_columns;"
+            )
+            self._geom_info_cache = {
+                tab[0]: {"geom_type": _geom_type_mapping[tab[1]], "srid": tab[2]}
+                for tab in cursor.fetchall()
+            }
+        ## Return copies so that the cached information cannot be
+        ## altered by the caller.
+        info = {tab: tab_info.copy() for tab, tab_info in self._geom_info_cache.items()}
         if count_features:
             for tab in info.keys():
-                cursor.execute(f"SELECT COUNT(*) FROM {tab};")
-                info[tab]["count"] = cursor.fetchone()[0]
+                if tab not in self._count_cache:
+                    cursor.execute(f"SELECT COUNT(*) FROM {tab};")
+                    self._count_cache[tab] = cursor.fetchone()[0]
+                info[tab]["count"] = self._count_cache[tab]
         if not to_stdout:
             return info
         elif not info:
@@ -879,73 +2012,254 @@ class SQLiteGeomRefDB(GeomRefDB):
                     table += line_tmp.format(f1=k, f2=v["geom_type"], f3=str(v["srid"]))
             print(table)
 
+    def _invalidate_geom_info(self, geoms_tab_name: Optional[str] = None) -> None:
+        """Invalidate the information cached by :meth:`db_geom_info`.
+
+        If a table name is given, only its cached features count is
+        invalidated. Otherwise, the whole cache is cleared (e.g. after
+        a change of the database schema), including the tables known to
+        have derived columns (see :meth:`_has_derived_columns`).
+        """
+        if geoms_tab_name is None:
+            self._geom_info_cache = None
+            self._count_cache = dict()
+            self._derived_columns_cache = dict()
+        else:
+            self._count_cache.pop(geoms_tab_name, None)
+
     @staticmethod
-    def _get_spatial_query(spatial_index: bool = True, only_within_aoi: bool = False,
-                           within_aoi: bool = False) -> str:
-        """Builds SQL spatial query templates for accessing the database's features.
+    @lru_cache(maxsize=128)
+    def _get_spatial_query(
+        within_aoi: bool = False,
+        select: str = "ROWID, AsBinary(geometry)",
+        excluded: bool = False,
+    ) -> str:
+        """Builds SQL spatial query templates for accessing the database's
+        features.
+
+        This function builds templates of parameterized SQL queries for
+        fast access to the features stored in a table of the database,
+        which name fills the ``{table}`` field of the template. The
+        queries can use the internal spatial index to search for
+        features that intersect with an *area of interest*. By default,
+        the queries return ``(rowid, geometry)`` rows. The templates are
+        cached and keyed by query shape only, so that the text of the
+        queries is identical from one call to the next, and SQLite can
+        reuse the compiled statements.
+
+        Parameters
+        ----------
+        within_aoi : bool, default: ``False``
+            If set to ``True``, create a query that uses the spatial
+            index for searching for features that intersect with an
+            *area of interest*. The named parameters ``:table``,
+            ``:aoi`` (WKB of the *area of interest*) and ``:srid`` must
+            then be bound when executing the query. If set to
+            ``False``, create a query that returns all the features of
+            the table.
+        select : str, default: ``"ROWID, AsBinary(geometry)"``
+            Result columns of the query (e.g. ``"ROWID"`` or
+            ``"COUNT(*)"``).
+        excluded : bool, default: ``False``
+            If set to ``True``, the features which ROWID is stored in
+            the ``pkid`` column of the table which name fills the
+            ``{excluded}`` field of the template are excluded from the
+            query.
+
+        Returns
+        -------
+        `str`
+            Template of the SQL query.
+        """
+        conditions = list()
+        if within_aoi:
+            conditions.append(
+                "{table}.ROWID IN ("
+                "SELECT ROWID FROM SpatialIndex "
+                "WHERE f_table_name = :table "
+                "AND search_frame = GeomFromWKB(:aoi, :srid)) "
+                "AND Intersects(geometry, GeomFromWKB(:aoi, :srid))"
+            )
+        if excluded:
+            conditions.append("{table}.ROWID NOT IN (SELECT pkid FROM {excluded})")
+        query = f"SELECT {select} FROM {{table}}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query + ";"
 
-        This function builds SQL spatial query template for fast access to
-        the features stored in the database. It can create templates where
-        the queries use the internal spatial index to search for features
-        within a *search frame*, and/or where the features returned must
-        lie within an *area of interest*.
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _get_batch_query(
+        within_aoi: bool = False,
+        area_ratio: bool = False,
+        overlap_area: bool = False,
+        stored_area: bool = False,
+    ) -> str:
+        """Builds the SQL query template for batch candidate searches.
+
+        This function builds a SQL query template that joins a temporary
+        table of *search frames* (bounding boxes of the input features),
+        which name fills the ``{frames}`` field of the template, with
+        the R*Tree spatial index of a table, which name fills the
+        ``{table}`` field, in a single statement. The query returns
+        ``(input_id, candidate_rowid, candidate_geometry)`` rows, ordered
+        by ``input_id``. As for :meth:`_get_spatial_query`, the
+        templates are cached and keyed by query shape only.
 
         Parameters
         ----------
-        spatial_index : bool, default: ``True``
-            If set to ``True``, create a template for using the spatial
-            index and search for features that lie within a *search frame*
-            and/or an *area of interest*. If set to ``False``, create a
-            template for returning all features of table, without filtering
-            (overrinding both ``only_within_aoi`` and ``within_aoi``).
-        only_within_aoi : bool, default: ``False``
-            If set to ``True``, create a template that will use the spatial
-            index for searching for features that only intersect with an
-            *area of interest*, without further filtering. If set to
-            ``False``, create a template that may use the spatial index for
-            searching for features lying within an *area of interest*
-            and/or within a *search frame*
         within_aoi : bool, default: ``False``
-            If set to ``True``, create a template that will use the spatial
-            index for searching for features that intersect with an *area
-            of interest*. If set to ``False``, the created template may not
-            filter out features based on a *area of interest* (depending on
-            the value passed to the ``only_within_aoi`` parameter).
+            If set to ``True``, the candidate features must also
+            intersect with an *area of interest*, and the named
+            parameters ``:aoi`` (WKB of the *area of interest*) and
+            ``:srid`` must be bound when executing the query.
+        area_ratio : bool, default: ``False``
+            If set to ``True``, the ratio of the area of the candidate
+            features (stored in the *area* derived column, see
+            :meth:`add_geometries`) to the area of the input features
+            must lie between the named parameters ``:min_ratio`` and
+            ``:max_ratio``.
+        overlap_area : bool, default: ``False``
+            If set to ``True``, the area of the intersection of the
+            candidate and input features is computed in SQL (from the
+            WKB of the input features stored in the *search frames*
+            table, with the named parameter ``:srid``), and the query
+            returns ``(input_id, input_area, candidate_area,
+            intersection_area)`` rows instead.
+        stored_area : bool, default: ``False``
+            If set to ``True``, the area of the candidate features is
+            read from the *area* derived column instead of being
+            computed.
 
         Returns
         -------
         `str`
             Template of the SQL query.
         """
-        query = "SELECT AsBinary(geometry) FROM {{table}}"
-        if not spatial_index:
-            return query.format() + ";"
-        else:
-            query += " {spatial_filter};"
-        sf = " WHERE {{table}}.ROWID IN {aoi}{geom}"
-        if only_within_aoi or within_aoi:
-            aoi = (
-                "(SELECT ROWID "
-                " FROM SpatialIndex "
-                " WHERE f_table_name = '{table}' "
-                "   AND search_frame = GeomFromText('{aoiwkt}', {epsg})) "
-                "AND Intersects(geometry, GeomFromText('{aoiwkt}', {epsg}))"
+        if overlap_area:
+            ref_area = "t.area" if stored_area else "ST_Area(t.geometry)"
+            columns = (
+                f"f.input_id, f.area, {ref_area}, COALESCE(ST_Area(ST_Intersection("
+                "t.geometry, GeomFromWKB(f.geom, :srid))), 0.0)"
             )
         else:
-            aoi = ""
-        if only_within_aoi:
-            geom = ""
-            return query.format(spatial_filter=sf.format(**locals()))
-        else:
-            geom = (
-                "(SELECT ROWID "
-                " FROM SpatialIndex "
-                " WHERE f_table_name = '{table}' "
-                "   AND search_frame = GeomFromText('{geomsfwkt}', {epsg}))"
+            columns = "f.input_id, t.ROWID, AsBinary(t.geometry)"
+        ## CROSS JOIN forces SQLite to scan the search frames first and
+        ## to use them as constraints on the R*Tree.
+        query = (
+            f"SELECT {columns} "
+            "FROM {frames} AS f "
+            "CROSS JOIN idx_{table}_geometry AS r "
+            "  ON r.xmin <= f.maxx AND r.xmax >= f.minx "
+            " AND r.ymin <= f.maxy AND r.ymax >= f.miny "
+            "CROSS JOIN {table} AS t ON t.ROWID = r.pkid"
+        )
+        conditions = list()
+        if area_ratio:
+            ## Cheap comparisons of stored values, evaluated before any
+            ## spatial function.
+            conditions.append(
+                "t.area >= :min_ratio * f.area AND t.area <= :max_ratio * f.area"
             )
         if within_aoi:
-            aoi += " AND {table}.ROWID IN "
-        return query.format(spatial_filter=sf.format(**locals()))
+            conditions.append("Intersects(t.geometry, GeomFromWKB(:aoi, :srid))")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query + " ORDER BY f.input_id;"
+
+    @contextmanager
+    def _frames_table(self):
+        """Provide a temporary table for storing *search frames*.
+
+        The table stores the bounds of the *search frames*, along with
+        the area and (optionally) the WKB of the input features.
+
+        Temporary tables are recycled from one call to the next, so that
+        the queries built from their names can reuse compiled
+        statements. A new table is only created if all the existing ones
+        are in use (e.g. by generators running concurrently). The
+        changes made to the table are committed right away, so that
+        they do not leave a transaction open on the connection.
+        """
+        free_tables = self._free_frames_tables
+        cursor = self._conn.cursor()
+        if free_tables:
+            frames = free_tables.pop()
+        else:
+            frames = f"temp.gc_frames_{uuid.uuid4().hex}"
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {frames} (input_id INTEGER PRIMARY KEY, "
+                "minx REAL, miny REAL, maxx REAL, maxy REAL, area REAL, geom BLOB);"
+            )
+        try:
+            yield frames
+        finally:
+            cursor.execute(f"DELETE FROM {frames};")
+            self._conn.commit()
+            free_tables.append(frames)
+
+    def _search_candidates(
+        self,
+        geoms_iter,
+        transform_geom,
+        get_search_frame,
+        geoms_tab_name,
+        tab_epsg,
+        aoi_geom=None,
+        area_bounds=None,
+        overlap_area=False,
+        stored_area=False,
+    ):
+        """Search for the candidate features of input features.
+
+        Function generator that loads the *search frames* of the input
+        features, chunk by chunk, into a temporary table, and executes
+        the SQL query (from :meth:`_get_batch_query`) once per chunk.
+        For each chunk, a ``(chunk, geoms_reproj, cursor)`` tuple is
+        yielded, where ``geoms_reproj`` are the input geometries in the
+        table's spatial reference system, and ``cursor`` iterates over
+        the rows of candidate features, ordered by ``input_id``. The
+        rows must be consumed before the next chunk is requested. If
+        ``area_bounds`` is given as a ``(min_ratio, max_ratio)`` tuple,
+        candidate features are pruned in SQL from the ratio of their
+        stored area to the area of the input features. See
+        :meth:`_get_batch_query` for the ``overlap_area`` and
+        ``stored_area`` parameters.
+        """
+        cursor = self._conn.cursor()
+        params = dict()
+        if aoi_geom is not None:
+            params.update({"aoi": aoi_geom.wkb, "srid": tab_epsg})
+        if area_bounds is not None:
+            params.update({"min_ratio": area_bounds[0], "max_ratio": area_bounds[1]})
+        if overlap_area:
+            params["srid"] = tab_epsg
+        with self._frames_table() as frames:
+            query = self._get_batch_query(
+                within_aoi=aoi_geom is not None,
+                area_ratio=area_bounds is not None,
+                overlap_area=overlap_area,
+                stored_area=stored_area,
+            ).format(table=geoms_tab_name, frames=frames)
+            insert_query = f"INSERT INTO {frames} VALUES (?, ?, ?, ?, ?, ?, ?);"
+            for chunk in iter_to_chunks(geoms_iter, self._search_chunk_size):
+                geoms_reproj = transform_geom(_to_2D(np.array(chunk, dtype=object)))
+                cursor.execute(f"DELETE FROM {frames};")
+                cursor.executemany(
+                    insert_query,
+                    (
+                        (
+                            i,
+                            *get_search_frame(geom).bounds,
+                            geom.area,
+                            geom.wkb if overlap_area else None,
+                        )
+                        for i, geom in enumerate(geoms_reproj)
+                    ),
+                )
+                self._conn.commit()
+                cursor.execute(query, params)
+                yield chunk, geoms_reproj, cursor
 
     def _geoms_generator(
         self,
@@ -953,39 +2267,296 @@ class SQLiteGeomRefDB(GeomRefDB):
         transform_geom,
         geoms_match,
         get_search_frame,
-        query,
-        query_kwargs,
+        geoms_tab_name,
+        tab_epsg,
+        aoi_geom=None,
         matching_geoms=True,
     ) -> Generator[GeomObject]:
         """Yield (non-)matching features resulting from the SQL query.
 
-        Function generator that formats a SQL query template (from
-        :meth:`_get_spatial_query`), and executes the resulting query
-        for each input feature. The feature(s) resulting from the
-        queries is/are yielded by the function, depending on whether
-        its/their geometries match the geometry of the input features
-        or not.
+        The input features are yielded by the function, depending on
+        whether their geometries match the geometry of (at least) one
+        of their candidate features (see :meth:`_search_candidates`).
+        If the comparison function is one of the area-based functions
+        of :func:`.polygons_area_match`, the areas of the intersections
+        are computed by SpatiaLite, and only the areas are sent back,
+        instead of the geometries of the candidate features.
         """
-        cursor = self._conn.cursor()
-        if matching_geoms:
-            for geom in geoms_iter:
-                geom_reproj = transform_geom(_to_2D(geom))
-                search_frame = get_search_frame(geom_reproj)
-                query_kwargs["geomsfwkt"] = search_frame.wkt
-                cursor.execute(query.format(**query_kwargs))
-                if any(geoms_match(geom_reproj, wkb.loads(row[0])) for row in cursor):
-                    yield geom
-        else:
-            for geom in geoms_iter:
-                geom_reproj = transform_geom(_to_2D(geom))
-                search_frame = get_search_frame(geom_reproj)
-                query_kwargs["geomsfwkt"] = search_frame.wkt
-                cursor.execute(query.format(**query_kwargs))
-                if not any(
-                    geoms_match(geom_reproj, wkb.loads(row[0])) for row in cursor
-                ):
+        stored_area = self._has_derived_columns(geoms_tab_name)
+        overlap_area = isinstance(geoms_match, _AreaMatch)
+        ## Area-based comparison functions bound the ratio of the areas
+        ## of matching features, which can be checked in SQL against
+        ## stored areas.
+        area_bounds = None
+        if overlap_area and stored_area:
+            area_bounds = geoms_match.area_ratio_bounds()
+            if area_bounds == (0.0, float("inf")):
+                area_bounds = None
+        ## Reference features are often candidates for several input
+        ## features, and are parsed and prepared once, as long as they
+        ## stay in the cache.
+        ref_cache = RefGeomCache(self._ref_cache_size)
+        geoms_match = ref_cache.bind(geoms_match)
+        for chunk, geoms_reproj, cursor in self._search_candidates(
+            geoms_iter,
+            transform_geom,
+            get_search_frame,
+            geoms_tab_name,
+            tab_epsg,
+            aoi_geom,
+            area_bounds,
+            overlap_area,
+            stored_area,
+        ):
+            if overlap_area:
+                matched = self._matched_by_areas(cursor, geoms_match)
+            else:
+                matched = self._matched_by_geoms(
+                    cursor, geoms_reproj, geoms_match, ref_cache
+                )
+            for i, geom in enumerate(chunk):
+                if (i in matched) == matching_geoms:
                     yield geom
 
+    @staticmethod
+    def _matched_by_geoms(cursor, geoms_reproj, geoms_match, ref_cache):
+        """Return the ids of the input features matching (at least) one
+        of their candidate features, from ``(input_id, rowid, wkb)``
+        rows.
+        """
+        matched = set()
+        for input_id, rows in itertools.groupby(cursor, key=itemgetter(0)):
+            geom_reproj = geoms_reproj[input_id]
+            if any(
+                geoms_match(
+                    geom_reproj, ref_cache.get(row[1], lambda: wkb.loads(row[2]))
+                )
+                for row in rows
+            ):
+                matched.add(input_id)
+        return matched
+
+    @staticmethod
+    def _matched_by_areas(cursor, area_match):
+        """Return the ids of the input features matching (at least) one
+        of their candidate features, from ``(input_id, input_area,
+        candidate_area, intersection_area)`` rows.
+        """
+        rows = cursor.fetchall()
+        if not rows:
+            return set()
+        input_ids, test_areas, ref_areas, inter_areas = (
+            np.array(col) for col in zip(*rows)
+        )
+        match = area_match.match_areas(inter_areas, test_areas, ref_areas)
+        return set(input_ids[match].tolist())
+
+    def _has_derived_columns(self, geoms_tab_name: str) -> bool:
+        """Check whether a table stores the derived columns of its
+        features (see :meth:`add_geometries`). The answer is cached
+        along with the information of :meth:`db_geom_info`.
+        """
+        has_columns = self._derived_columns_cache.get(geoms_tab_name, None)
+        if has_columns is None:
+            cursor = self._conn.cursor()
+            cursor.execute(f"PRAGMA table_info({geoms_tab_name});")
+            has_columns = set(_DERIVED_COLUMNS) <= {row[1] for row in cursor}
+            self._derived_columns_cache[geoms_tab_name] = has_columns
+        return has_columns
+
+    def _table_srs(self, geoms_tab_name, geoms_epsg, reprojected=True):
+        """Return the name and EPSG code of a table of the database (or
+        of its reprojected copy in the spatial reference system of the
+        input features, if ``reprojected`` is True), and the (validated)
+        EPSG code of the input features.
+        """
+        if geoms_tab_name is None:
+            geoms_tab_name = "default_table"
+        if reprojected:
+            geoms_tab_name = self._reprojected_table(geoms_tab_name, geoms_epsg)
+        tab_info = self.db_geom_info().get(geoms_tab_name, None)
+        if tab_info is None:
+            raise RuntimeError(
+                f"No {geoms_tab_name!r} table was found in the database!"
+            )
+        tab_epsg = tab_info["srid"]
+        if geoms_epsg is None:
+            return geoms_tab_name, tab_epsg, tab_epsg
+        try:
+            geoms_epsg = int(geoms_epsg)
+            _ = _get_crs(geoms_epsg)
+        except (CRSError, ValueError, TypeError):
+            raise ValueError(f"{geoms_epsg!r} is not a valid EPSG code!")
+        return geoms_tab_name, tab_epsg, geoms_epsg
+
+    def _candidate_pairs(
+        self, geoms, geoms_epsg, geoms_tab_name=None, get_search_frame=None
+    ):
+        """Yield the candidate pairs of features for :meth:`compare_full`.
+
+        The reference features are identified by their ROWID, and both
+        geometries of a pair are in the table's spatial reference
+        system.
+        """
+        geoms_tab_name, tab_epsg, geoms_epsg = self._table_srs(
+            geoms_tab_name, geoms_epsg
+        )
+        if get_search_frame is None:
+            get_search_frame = _unchanged_geom
+        transform_geom = _unchanged_geom
+        if geoms_epsg != tab_epsg:
+            transform_geom = get_transform_func(geoms_epsg, tab_epsg)
+        offset = 0
+        for chunk, geoms_reproj, cursor in self._search_candidates(
+            geoms, transform_geom, get_search_frame, geoms_tab_name, tab_epsg
+        ):
+            for input_id, rows in itertools.groupby(cursor, key=itemgetter(0)):
+                geom_reproj = geoms_reproj[input_id]
+                for row in rows:
+                    yield offset + input_id, row[1], geom_reproj, wkb.loads(row[2])
+            offset += len(chunk)
+
+    def _aoi_reference_geoms(
+        self, aoi_geom, geoms_epsg, geoms_tab_name=None, get_search_frame=None
+    ):
+        """Yield the reference features for :meth:`compare_full`.
+
+        The reference features are identified by their ROWID, and are
+        yielded in the table's spatial reference system, as with
+        :meth:`missing_geometries`.
+        """
+        cursor = self._aoi_reference_rows(
+            aoi_geom, geoms_epsg, geoms_tab_name, "ROWID, AsBinary(geometry)"
+        )
+        for row in cursor:
+            yield row[0], wkb.loads(row[1])
+
+    def _aoi_reference_keys(
+        self, aoi_geom, geoms_epsg, geoms_tab_name=None, get_search_frame=None
+    ):
+        """Yield the ROWID of the reference features for
+        :meth:`compare_full`, without loading their geometries.
+        """
+        for row in self._aoi_reference_rows(
+            aoi_geom, geoms_epsg, geoms_tab_name, "ROWID"
+        ):
+            yield row[0]
+
+    def _aoi_reference_rows(
+        self, aoi_geom, geoms_epsg, geoms_tab_name, select, excluded=None
+    ):
+        """Execute a query (see :meth:`_get_spatial_query`) on the
+        reference features that intersect with an *area of interest*,
+        and return the cursor.
+        """
+        geoms_tab_name, tab_epsg, geoms_epsg = self._table_srs(
+            geoms_tab_name, geoms_epsg
+        )
+        query_params = dict()
+        if aoi_geom is not None:
+            if geoms_epsg != tab_epsg:
+                aoi_geom = get_transform_func(geoms_epsg, tab_epsg)(aoi_geom)
+            query_params = {
+                "table": geoms_tab_name,
+                "aoi": aoi_geom.wkb,
+                "srid": tab_epsg,
+            }
+        query = self._get_spatial_query(
+            within_aoi=aoi_geom is not None,
+            select=select,
+            excluded=excluded is not None,
+        ).format(table=geoms_tab_name, excluded=excluded)
+        cursor = self._conn.cursor()
+        return cursor.execute(query, query_params)
+
+    def _match_counts(
+        self,
+        geoms_iter,
+        aoi_geom,
+        geoms_epsg,
+        geoms_match,
+        count_missing=True,
+        geoms_tab_name=None,
+        get_search_frame=None,
+    ):
+        """Count the true positives, false positives and missing
+        features.
+
+        If no comparison function is given, an *input* feature matches
+        all the *reference* features which bounding box intersects with
+        its *search frame*, and the counting is done in SQL, from the
+        *search frames* and the spatial index of the table. The
+        matched *reference* features are recorded by ROWID in a
+        temporary table. Otherwise, the counting is done from the
+        candidate pairs of :meth:`compare_full`.
+        """
+        if geoms_match not in (None, _geoms_always_match):
+            return super()._match_counts(
+                geoms_iter,
+                aoi_geom,
+                geoms_epsg,
+                geoms_match,
+                count_missing=count_missing,
+                geoms_tab_name=geoms_tab_name,
+                get_search_frame=get_search_frame,
+            )
+        geoms_tab_name, tab_epsg, geoms_epsg = self._table_srs(
+            geoms_tab_name, geoms_epsg
+        )
+        if get_search_frame is None:
+            get_search_frame = _unchanged_geom
+        transform_geom = _unchanged_geom
+        if geoms_epsg != tab_epsg:
+            transform_geom = get_transform_func(geoms_epsg, tab_epsg)
+        matched = f"temp.gc_matched_{uuid.uuid4().hex}"
+        overlap = (
+            "r.xmin <= f.maxx AND r.xmax >= f.minx "
+            "AND r.ymin <= f.maxy AND r.ymax >= f.miny"
+        )
+        tp_query = (
+            f"SELECT COUNT(*) FROM {{frames}} AS f WHERE EXISTS ("
+            f"SELECT 1 FROM idx_{geoms_tab_name}_geometry AS r WHERE {overlap});"
+        )
+        matched_query = (
+            f"INSERT OR IGNORE INTO {matched} SELECT r.pkid FROM {{frames}} AS f "
+            f"CROSS JOIN idx_{geoms_tab_name}_geometry AS r ON {overlap};"
+        )
+        cursor = self._conn.cursor()
+        cursor.execute(f"CREATE TABLE {matched} (pkid INTEGER PRIMARY KEY);")
+        geoms_num = tp_num = 0
+        try:
+            with self._frames_table() as frames:
+                insert_query = (
+                    f"INSERT INTO {frames} VALUES (?, ?, ?, ?, ?, NULL, NULL);"
+                )
+                for chunk in iter_to_chunks(geoms_iter, self._search_chunk_size):
+                    geoms_num += len(chunk)
+                    geoms_reproj = transform_geom(
+                        _to_2D(np.array(chunk, dtype=object))
+                    )
+                    cursor.execute(f"DELETE FROM {frames};")
+                    cursor.executemany(
+                        insert_query,
+                        (
+                            (i, *get_search_frame(geom).bounds)
+                            for i, geom in enumerate(geoms_reproj)
+                        ),
+                    )
+                    tp_num += cursor.execute(
+                        tp_query.format(frames=frames)
+                    ).fetchone()[0]
+                    if count_missing:
+                        cursor.execute(matched_query.format(frames=frames))
+                    self._conn.commit()
+            mg_num = None
+            if count_missing:
+                mg_num = self._aoi_reference_rows(
+                    aoi_geom, geoms_epsg, geoms_tab_name, "COUNT(*)", matched
+                ).fetchone()[0]
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {matched};")
+        return tp_num, geoms_num - tp_num, mg_num
+
     def true_positives(
         self,
         geoms_iter: GeometryIterable,
@@ -995,6 +2566,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         geoms_match: Callable[[GeomObject, GeomObject], bool] = None,
         get_search_frame: Callable[[GeomObject], GeomObject] = None,
         ncores: Optional[int] = None,
+        cost_func: Optional[Callable[[GeomObject], float]] = None,
     ) -> Generator[GeomObject]:  # , **kwargs):
         """Identidy *matching* **input** geometries.
 
@@ -1044,7 +2616,16 @@ class SQLiteGeomRefDB(GeomRefDB):
             frame* will be the same as the *input* geometry.
         ncores : `int`, optional
             Number of cores to use for running the function. If
-            unspecified, the function will run in a single process
+            unspecified, the function will run in a single process,
+            unless a pool of worker processes was opened with
+            :meth:`open_pool`.
+        cost_func : `callable`, optional
+            Function that takes as single argument an *input* geometry
+            (`.GeomObject`) and returns an estimate of the cost of its
+            comparison (e.g. :func:`shapely.get_num_coordinates`). When
+            running on multiple cores, the function is used to process
+            the heaviest *input* geometries first, and to spread them
+            evenly amongst the workers.
 
         Yields
         ------
@@ -1062,7 +2643,6 @@ class SQLiteGeomRefDB(GeomRefDB):
         *spatial reference system*).
         """
         self.logger.info("Searching true positive geometries...")
-        query_kwargs = dict()
         ## Set default behaviors.
         ## If no function is passed to the 'geoms_match' parameter,
         ## the "test geometry" will always match the "reference
@@ -1080,57 +2660,38 @@ class SQLiteGeomRefDB(GeomRefDB):
         transform_geom = _unchanged_geom
         if geoms_tab_name is None:
             geoms_tab_name = "default_table"
+        geoms_tab_name = self._reprojected_table(geoms_tab_name, geoms_epsg)
         db_info = self.db_geom_info()
         tab_info = db_info.get(geoms_tab_name, None)
         if tab_info is None:
             raise RuntimeError(f"No {geoms_tab_name!r} table was found in the database!")
-        else:
-            query_kwargs["table"] = geoms_tab_name
-            tab_epsg = tab_info["srid"]
+        tab_epsg = tab_info["srid"]
         if geoms_epsg is None:
             geoms_epsg = tab_epsg
         else:
             try:
                 geoms_epsg = int(geoms_epsg)
-                _ = pyproj.CRS(geoms_epsg)
+                _ = _get_crs(geoms_epsg)
             except (CRSError, ValueError, TypeError):
                 raise ValueError(f"{geoms_epsg!r} is not a valid EPSG code!")
             if geoms_epsg != tab_epsg:
                 transform_geom = get_transform_func(geoms_epsg, tab_epsg)
                 if aoi_geom is not None:
                     aoi_geom = transform_geom(aoi_geom)
-        query_kwargs["epsg"] = tab_epsg
-        if aoi_geom is not None:
-            query_kwargs["aoiwkt"] = aoi_geom.wkt
-        if ncores is not None:
-            try:
-                ncores = int(ncores)
-                max_cores = mp.cpu_count() - 1
-                if ncores > max_cores:
-                    self.logger.info(
-                        f"Value {ncores} passed to the 'ncores' argument is too high "
-                        "and may result in performance penalty, setting it down to "
-                        f"{max_cores}."
-                    )
-                    ncores = max_cores
-                elif ncores < 2:
-                    ncores = None
-            except (ValueError, TypeError):
-                raise ValueError(
-                    f"{ncores!r} is not a valid value for the 'ncores' argument!"
-                )
-        query = self._get_spatial_query(within_aoi=aoi_geom is not None)
-        if ncores is not None:
+        ncores = self._check_ncores(ncores)
+        if ncores is not None or self._pool is not None:
             tp_gen = self._parallelized_method(
                 ncores,
                 geoms_iter,
                 transform_geom,
                 geoms_match,
                 get_search_frame,
-                query,
-                query_kwargs,
+                geoms_tab_name,
+                tab_epsg,
+                aoi_geom,
                 matching_geoms=True,
                 method_name="_geoms_generator",
+                cost_func=cost_func,
             )
         else:
             tp_gen = self._geoms_generator(
@@ -1138,8 +2699,9 @@ class SQLiteGeomRefDB(GeomRefDB):
                 transform_geom,
                 geoms_match,
                 get_search_frame,
-                query,
-                query_kwargs,
+                geoms_tab_name,
+                tab_epsg,
+                aoi_geom,
                 matching_geoms=True,
             )
         yield from tp_gen
@@ -1154,6 +2716,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         geoms_match: Callable[[GeomObject, GeomObject], bool] = None,
         get_search_frame: Callable[[GeomObject], GeomObject] = None,
         ncores: Optional[int] = None,
+        cost_func: Optional[Callable[[GeomObject], float]] = None,
     ) -> Generator[GeomObject]:  # , **kwargs):
         """Identify *non-matching* **input** geometries.
 
@@ -1203,7 +2766,16 @@ class SQLiteGeomRefDB(GeomRefDB):
             frame* will be the same as the *input* geometry.
         ncores : `int`, optional
             Number of cores to use for running the function. If
-            unspecified, the function will run in a single process
+            unspecified, the function will run in a single process,
+            unless a pool of worker processes was opened with
+            :meth:`open_pool`.
+        cost_func : `callable`, optional
+            Function that takes as single argument an *input* geometry
+            (`.GeomObject`) and returns an estimate of the cost of its
+            comparison (e.g. :func:`shapely.get_num_coordinates`). When
+            running on multiple cores, the function is used to process
+            the heaviest *input* geometries first, and to spread them
+            evenly amongst the workers.
 
         Yields
         ------
@@ -1221,7 +2793,6 @@ class SQLiteGeomRefDB(GeomRefDB):
         *spatial reference system*).
         """
         self.logger.info("Searching false positive geometries...")
-        query_kwargs = dict()
         ## Set default behaviors.
         ## If no function is passed to the 'geoms_match' parameter,
         ## the "test geometry" will always match the "reference
@@ -1239,57 +2810,38 @@ class SQLiteGeomRefDB(GeomRefDB):
         transform_geom = _unchanged_geom
         if geoms_tab_name is None:
             geoms_tab_name = "default_table"
+        geoms_tab_name = self._reprojected_table(geoms_tab_name, geoms_epsg)
         db_info = self.db_geom_info()
         tab_info = db_info.get(geoms_tab_name, None)
         if tab_info is None:
             raise RuntimeError(f"No {geoms_tab_name!r} table was found in the database!")
-        else:
-            query_kwargs["table"] = geoms_tab_name
-            tab_epsg = tab_info["srid"]
+        tab_epsg = tab_info["srid"]
         if geoms_epsg is None:
             geoms_epsg = tab_epsg
         else:
             try:
                 geoms_epsg = int(geoms_epsg)
-                _ = pyproj.CRS(geoms_epsg)
+                _ = _get_crs(geoms_epsg)
             except (CRSError, ValueError):
                 raise ValueError(f"{geoms_epsg!r} is not a valid EPSG code!")
             if geoms_epsg != tab_epsg:
                 transform_geom = get_transform_func(geoms_epsg, tab_epsg)
                 if aoi_geom is not None:
                     aoi_geom = transform_geom(aoi_geom)
-        query_kwargs["epsg"] = tab_epsg
-        if aoi_geom is not None:
-            query_kwargs["aoiwkt"] = aoi_geom.wkt
-        if ncores is not None:
-            try:
-                ncores = int(ncores)
-                max_cores = mp.cpu_count() - 1
-                if ncores > max_cores:
-                    self.logger.info(
-                        f"Value {ncores} passed to the 'ncores' argument is too high "
-                        "and may result in performance penalty, setting it down to "
-                        f"{max_cores}."
-                    )
-                    ncores = max_cores
-                elif ncores < 2:
-                    ncores = None
-            except (ValueError, TypeError):
-                raise ValueError(
-                    f"{ncores!r} is not a valid value for the 'ncores' argument!"
-                )
-        query = self._get_spatial_query(within_aoi=aoi_geom is not None)
-        if ncores is not None:
+        ncores = self._check_ncores(ncores)
+        if ncores is not None or self._pool is not None:
             fp_gen = self._parallelized_method(
                 ncores,
                 geoms_iter,
                 transform_geom,
                 geoms_match,
                 get_search_frame,
-                query,
-                query_kwargs,
+                geoms_tab_name,
+                tab_epsg,
+                aoi_geom,
                 matching_geoms=False,
                 method_name="_geoms_generator",
+                cost_func=cost_func,
             )
         else:
             fp_gen = self._geoms_generator(
@@ -1297,8 +2849,9 @@ class SQLiteGeomRefDB(GeomRefDB):
                 transform_geom,
                 geoms_match,
                 get_search_frame,
-                query,
-                query_kwargs,
+                geoms_tab_name,
+                tab_epsg,
+                aoi_geom,
                 matching_geoms=False,
             )
         yield from fp_gen
@@ -1314,6 +2867,7 @@ class SQLiteGeomRefDB(GeomRefDB):
         geoms_match: Callable[[GeomObject, GeomObject], bool] = None,
         get_search_frame: Callable[[GeomObject], GeomObject] = None,
         ncores: Optional[int] = None,
+        cost_func: Optional[Callable[[GeomObject], float]] = None,
     ) -> Generator[GeomObject]:  # , **kwargs):
         """Identify (missing) *non-matching* **reference** geometries.
 
@@ -1331,10 +2885,9 @@ class SQLiteGeomRefDB(GeomRefDB):
             Iterable of input geometrical features to compare to the
             features of the internal SQLite database.
         geom_type : `SpatialiteGeomType`, optional
-            Geometry type of the input geometrical features. If the
-            ``geom_type`` is not specified by the user, the function
-            will assume that the *input features* have the same
-            ``geom_type`` as the *reference features*.
+            Deprecated, and ignored: the input features are indexed in
+            memory, whatever their geometry type. Passing an argument
+            to this parameter emits a `DeprecationWarning`.
         aoi_geom : `.GeomObject`, optional
             *Area of interest*, within which the database's features must
             lie.
@@ -1356,7 +2909,10 @@ class SQLiteGeomRefDB(GeomRefDB):
             - ``gref``: *reference* geometry (`.GeomObject`)
 
             The function returns ``True`` if it finds that both
-            geometries *match*, else returns ``False``. If this
+            geometries *match*, else returns ``False``. Note that the
+            function used to be called with the *reference* geometry
+            first, which changes the results of asymmetric comparison
+            functions (e.g. ``polygons_area_match("ptest", ...)``). If this
             parameter is omitted, the *input* geometrical feature will
             always be considered as a *match* in the case where its
             *search frame* (see ``get_search_frame`` parameter)
@@ -1369,7 +2925,15 @@ class SQLiteGeomRefDB(GeomRefDB):
             frame* will be the same as the *input* geometry.
         ncores : `int`, optional
             Number of cores to use for running the function. If
-            unspecified, the function will run in a single process
+            unspecified, the function will run in a single process.
+        cost_func : `callable`, optional
+            Function that takes as single argument a *reference*
+            geometry (`.GeomObject`) and returns an estimate of the
+            cost of its comparison (e.g.
+            :func:`shapely.get_num_coordinates`). When running on
+            multiple cores, the function is used to process the
+            heaviest *reference* geometries first, and to spread them
+            evenly amongst the workers.
 
         Yields
         ------
@@ -1380,206 +2944,260 @@ class SQLiteGeomRefDB(GeomRefDB):
         -----
         If the *spatial reference system* of the *input* geometrical
         features is different from that of the database's features,
-        the *input features*' coordinates are reprojected on-the-fly,
-        before being compared to features stored in the database.
+        the *reference features*' coordinates are reprojected
+        on-the-fly, before being compared to the *input features*. All
+        the *input features* are loaded in memory, in a spatial index.
         """
         self.logger.info("Searching missing geometries...")
-        query_kwargs = dict()
+        if geom_type is not None:
+            warnings.warn(
+                "The 'geom_type' parameter of the 'missing_geometries' method is "
+                "deprecated and ignored.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        query_params = dict()
         if geoms_tab_name is None:
             geoms_tab_name = "default_table"
+        geoms_tab_name = self._reprojected_table(geoms_tab_name, geoms_epsg)
         db_info = self.db_geom_info()
         tab_info = db_info.get(geoms_tab_name, None)
         if tab_info is None:
             raise RuntimeError(
                 f"No {geoms_tab_name!r} table was found in the database!"
             )
-        if geom_type is None:
-            self.logger.info(
-                "No geometry type was passed to the 'geom_type' argument. Assuming "
-                "that all input geometries have the same geometry type as the ones "
-                f"stored in the {geoms_tab_name!r} table."
-            )
-            geom_type = tab_info["geom_type"]
-        query_kwargs["table"] = geoms_tab_name
+        if geoms_match is None:
+            geoms_match = _geoms_always_match
+        if get_search_frame is None:
+            get_search_frame = _unchanged_geom
+        ## Coordinates of reference geometries are not transformed by
+        ## default. Return the reference geometry unchanged.
+        transform_ref = _unchanged_geom
         tab_epsg = tab_info["srid"]
-        query_kwargs["epsg"] = tab_epsg
         if geoms_epsg is None:
             geoms_epsg = tab_epsg
         else:
             try:
                 geoms_epsg = int(geoms_epsg)
-                _ = pyproj.CRS(geoms_epsg)
+                _ = _get_crs(geoms_epsg)
             except (CRSError, ValueError, TypeError):
                 raise ValueError(f"{geoms_epsg!r} is not a valid EPSG code!")
-            if geoms_epsg != tab_epsg and aoi_geom is not None:
-                transform_aoi = get_transform_func(geoms_epsg, tab_epsg)
-                aoi_geom = transform_aoi(aoi_geom)
+            if geoms_epsg != tab_epsg:
+                transform_ref = get_transform_func(tab_epsg, geoms_epsg)
+                if aoi_geom is not None:
+                    transform_aoi = get_transform_func(geoms_epsg, tab_epsg)
+                    aoi_geom = transform_aoi(aoi_geom)
         if aoi_geom is not None:
-            query_kwargs["aoiwkt"] = aoi_geom.wkt
-        logger_conf = dict()
-        if ncores is not None:
-            try:
-                ncores = int(ncores)
-                max_cores = mp.cpu_count() - 1
-                if ncores > max_cores:
-                    self.logger.info(
-                        f"Value {ncores} passed to the 'ncores' argument is too high "
-                        "and may result in performance penalty, setting it down to "
-                        f"{max_cores}."
-                    )
-                    ncores = max_cores
-                elif ncores < 2:
-                    ncores = None
-            except (ValueError, TypeError):
-                raise ValueError(
-                    f"{ncores!r} is not a valid value for the 'ncores' argument!"
-                )
-        if ncores is None:
-            logger_conf.update(
-                {"logger_name": str(uuid.uuid1()), "logging_level": None}
-            )
-        else:
-            logger_conf["logger"] = self.logger
-
-        input_geoms_db = SQLiteGeomRefDB(
-            geoms_iter=geoms_iter,
-            geom_type=geom_type,
-            geoms_epsg=geoms_epsg,
-            **logger_conf,
-        )
-        query = self._get_spatial_query(
-            spatial_index=aoi_geom is not None,
-            only_within_aoi=aoi_geom is not None,
+            query_params = {
+                "table": geoms_tab_name,
+                "aoi": aoi_geom.wkb,
+                "srid": tab_epsg,
+            }
+        ncores = self._check_ncores(ncores)
+        ## The input geometries are indexed in memory once, and the
+        ## reference geometries are searched for in the index.
+        input_index = _GeomsIndex(_to_2D(np.fromiter(geoms_iter, dtype=object)))
+        query = self._get_spatial_query(within_aoi=aoi_geom is not None).format(
+            table=geoms_tab_name
         )
         cursor = self._conn.cursor()
-        cursor.execute(query.format(**query_kwargs))
-        geoms_iter = (wkb.loads(row[0]) for row in cursor)
+        cursor.execute(query, query_params)
+        ref_geoms_iter = (wkb.loads(row[1]) for row in cursor)
         if ncores is not None:
-            mg_gen = input_geoms_db._parallelized_method(
+            mg_gen = self._parallelized_method(
                 ncores,
-                geoms_iter,
-                method_name="false_positives",
-                geoms_epsg=tab_epsg,
-                geoms_match=geoms_match,
-                get_search_frame=get_search_frame,
+                ref_geoms_iter,
+                geoms_match,
+                transform_ref,
+                get_search_frame,
+                method_name="unmatched",
+                bound_obj=input_index,
+                cost_func=cost_func,
             )
         else:
-            mg_gen = input_geoms_db.false_positives(
-                geoms_iter,
-                geoms_epsg=tab_epsg,
-                geoms_match=geoms_match,
-                get_search_frame=get_search_frame,
+            mg_gen = input_index.unmatched(
+                ref_geoms_iter, geoms_match, transform_ref, get_search_frame
             )
         yield from mg_gen
-        del input_geoms_db
         self.logger.info("Done searching missing geometries.")
 
+    def open_pool(self, ncores: int) -> None:
+        """Start a persistent pool of worker processes.
+
+        The worker processes load a copy of the internal SQLite
+        database once, and stay alive until :meth:`close_pool` is
+        called. Subsequent calls of the :meth:`true_positives` and
+        :meth:`false_positives` methods will run in the pool (whatever
+        the value passed to their ``ncores`` parameter), and will only
+        have to send the input geometries to the workers. Note that
+        :meth:`missing_geometries` does not use the pool, as its
+        workers rather need a copy of the input geometries.
+
+        Parameters
+        ----------
+        ncores : `int`
+            Number of worker processes (cores) of the pool.
+
+        Raises
+        ------
+        ValueError
+            If ``ncores`` is not a valid number of cores.
+
+        Notes
+        -----
+        Geometrical features added to the database after the opening
+        of the pool will not be seen by the workers. The pool must be
+        closed and re-opened to take them into account.
+        """
+        ncores = self._check_ncores(ncores)
+        if ncores is None:
+            raise ValueError("A pool must have at least 2 worker processes!")
+        self.close_pool()
+        self._pool = self._start_pool(ncores)
+        self.logger.info(f"Pool of {ncores} worker processes opened.")
+
+    def close_pool(self) -> None:
+        """Stop the worker processes of the pool opened with
+        :meth:`open_pool`, if any.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+            self.logger.info("Pool of worker processes closed.")
+
+    def _start_pool(self, ncores, bound_obj=None):
+        """Start a pool of worker processes bound to the instance (or to
+        ``bound_obj``), with the same logging configuration as the
+        parent process.
+        """
+        logger_conf = {
+            "name": self.logger.name,
+            "level": self.logger.getEffectiveLevel(),
+        }
+        ## The pickling of the instance (see __getstate__) must not
+        ## pollute the logging outputs.
+        _update_logger(self.logger, level=None)
+        try:
+            pool = WorkerPool(
+                self if bound_obj is None else bound_obj,
+                ncores,
+                logger_conf=logger_conf,
+            )
+        finally:
+            _update_logger(self.logger, level=logger_conf["level"])
+        for pid in pool.pids:
+            self.logger.info(f"New process spawned (PID: {pid}).")
+        return pool
+
+    def _check_ncores(self, ncores):
+        """Validate the number of cores passed to a method, and return
+        `None` if the method must run in a single process.
+        """
+        if ncores is None:
+            return None
+        try:
+            ncores = int(ncores)
+        except (ValueError, TypeError):
+            raise ValueError(
+                f"{ncores!r} is not a valid value for the 'ncores' argument!"
+            )
+        max_cores = mp.cpu_count() - 1
+        if ncores > max_cores:
+            self.logger.info(
+                f"Value {ncores} passed to the 'ncores' argument is too high "
+                "and may result in performance penalty, setting it down to "
+                f"{max_cores}."
+            )
+            ncores = max_cores
+        if ncores < 2:
+            return None
+        return ncores
+
     def _parallelized_method(
-        self, ncores, iterable, *method_args, method_name="", **method_kwargs
+        self,
+        ncores,
+        iterable,
+        *method_args,
+        method_name="",
+        bound_obj=None,
+        cost_func=None,
+        **method_kwargs,
     ):
         """Parallelize function generator methods.
 
         The function enables to parallelize (use of multiple cores) methods
-        which take as input an iterable and return a generator.
+        which take as input an iterable and return a generator. The
+        method runs in the persistent pool of worker processes if one
+        was opened with :meth:`open_pool`, else in a pool started for
+        this call only.
 
         Parameters
         ----------
         ncores : `int`
-            Number of cores to use for parallelizing the method.
+            Number of cores to use for parallelizing the method. Ignored
+            if a persistent pool is opened.
         iterable : `Iterable`
-            Input iterable.
+            Input iterable. It is consumed lazily, and split into chunks
+            that are pulled by the workers as soon as they are idle.
+        bound_obj : `object`, optional
+            Object which method is to be parallelized, if it is not the
+            instance itself. The object is sent once to each worker of
+            a pool started for this call only.
+        cost_func : `callable`, optional
+            Function returning an estimate of the processing cost of an
+            element of the input iterable. If given, the heaviest
+            elements are processed first (see
+            :func:`._misc.iter_to_work_chunks`).
 
         Notes
         -----
         The parallelized method can take any number of positional and
         keyword arguments, as long as the input iterable is their first
-        positional argument.
+        positional argument. If the arguments cannot be pickled (e.g.
+        a comparison function defined as a lambda), they cannot be sent
+        to the worker processes, and the method runs in a single
+        process.
         """
         if not method_name:
             method_name = inspect.stack()[1][3]
-        method_obj = getattr(self, method_name, None)
-        if method_obj is None:
+        if bound_obj is None:
+            bound_obj = self
+        if getattr(bound_obj, method_name, None) is None:
             raise ValueError(
                 f"{method_name!r} is not a valid method name for "
-                f"the class {cls.__name__!r}!"
+                f"the class {type(bound_obj).__name__!r}!"
             )
-        # Same logging configuration for the workers as for the parent process.
-        logger_conf = {
-            "name": self.logger.name,
-            "level": self.logger.getEffectiveLevel(),
-        }
-        method_kwargs["logger_conf"] = logger_conf
-        # Split input iterable into ncores lists of equal length. Note: the
-        # use of lists is for compatibility with the mutliprocessing
-        # module.
-        iterables = split_iter_to_lists(iterable, ncores)
-        # Object to collect the results from the methods running in parallele.
-        shared_results_iter = SharedIterator()
-        # Sentinel value for sharing status amongst processes and knowing
-        # when all workers are done.
-        nprocs_done = mp.Value("i", 0)
-        procs = list()
-        for i in range(ncores):
-            procs.append(
-                mp.Process(
-                    target=self._wrap_method_return,
-                    args=[
-                        method_obj,
-                        iterables[i],
-                        shared_results_iter,
-                        nprocs_done,
-                        *method_args,
-                    ],
-                    kwargs=method_kwargs,
-                )
+        try:
+            pickle.dumps((method_args, method_kwargs))
+        except Exception as exc:
+            self.logger.warning(
+                f"The arguments of the {method_name!r} method cannot be sent to "
+                f"worker processes ({exc}), running it in a single process."
             )
+            method_obj = getattr(bound_obj, method_name)
+            yield from method_obj(iterable, *method_args, **method_kwargs)
+            return
+        if bound_obj is self and self._pool is not None:
+            pool = self._pool
+        else:
+            pool = self._start_pool(ncores, bound_obj)
+        # Split input iterable into chunks of work. Note: the use of
+        # lists is for compatibility with the mutliprocessing module.
+        iterables = iter_to_work_chunks(
+            iterable, self._parallel_chunk_size, cost_func=cost_func
+        )
         try:
-            for p in procs:
-                p.start()
-                self.logger.info(f"New process spawned (PID: {p.pid}).")
-            ## Must check sentinel value, join cannot be called as the
-            ## spawned processes use a queue object (see:
-            ## https://docs.python.org/3/library/multiprocessing.html#programming-guidelines).
-            while not nprocs_done.value == ncores:
-                time.sleep(0.2)
-        except KeyboardInterrupt:
-            for p in procs:
-                p.terminate()
-                p.join()
-            del iterables
+            yield from pool.imap(method_name, iterables, *method_args, **method_kwargs)
+        except BaseException as exc:
+            ## The persistent pool survives errors raised by the
+            ## workers' tasks, as the results of interrupted calls are
+            ## discarded.
+            if pool is not self._pool:
+                pool.terminate()
+            elif isinstance(exc, KeyboardInterrupt):
+                pool.terminate()
+                self._pool = None
             raise
         else:
-            return shared_results_iter
-
-    def _wrap_method_return(
-        self,
-        method_obj,
-        iterable,
-        shared_results_iter,
-        nprocs_done,
-        *method_args,
-        logger_conf=None, # must be here!!
-        **method_kwargs,
-    ):
-        """Wraps the generators returned by the parallelized method, and
-        appends their elements to a shared object compatible with
-        multiprocessing.
-        """
-        if logger_conf is None:
-            logger = _setup_logger(name=str(uuid.uuid1()), level=None)
-        else:
-            logger_conf["name"] = (
-                logger_conf.get("name", type(self).__name__) + f" (PID: {os.getpid()})"
-            )
-            logger = _setup_logger(**logger_conf)
-        logger.info("Start worker function.")
-        res = list(method_obj(iterable, *method_args, **method_kwargs))
-        n_geoms = len(res)
-        if n_geoms > 1:
-            logger.info(f"{n_geoms} geometries found.")
-        else:
-            logger.info(f"{n_geoms} geometry found.")
-        shared_results_iter.put_iter(res)
-        with nprocs_done.get_lock():
-            nprocs_done.value += 1
-        logger.info("Worker function completed.")
+            if pool is not self._pool:
+                pool.close()
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from functools import partial
+from functools import lru_cache, partial
 from typing import Union
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
 
+import numpy as np
+import shapely
 from shapely.geometry import (
     LinearRing,
     LineString,
@@ -13,7 +15,6 @@ from shapely.geometry import (
     Point,
     Polygon,
 )
-import shapely.ops
 import pyproj
 
 _geom_type_mapping = {"LinearRing": 101, # ogr.wkbLinearRing
@@ -39,27 +40,71 @@ GeomObject = Union[
 ]
 
 
-_to_2D: Callable[[GeomObject], GeomObject] = partial(
-    shapely.ops.transform, lambda *geom_coords: geom_coords[:2]
-)
+_to_2D: Callable[[GeomObject], GeomObject] = shapely.force_2d
 
 # Wrap _to_2D function to add documentation and type hints for
 # end-users.
-def to_2D(geom: GeomObject) -> GeomObject:
+def to_2D(
+    geom: Union[GeomObject, np.ndarray]
+) -> Union[GeomObject, np.ndarray]:
     """Remove the third dimension of a geometrical object's coordinates.
 
     Parameters
     ----------
-    geom : `GeomObject`
-        Shapely geometrical object with XYZ-coordinates.
+    geom : `GeomObject` or `numpy.ndarray` of `GeomObject`
+        Shapely geometrical object(s) with XYZ-coordinates. Arrays of
+        geometrical objects are processed at once.
 
     Returns
     -------
-    `GeomObject`
-        Geometrical object with its Z-coordinates removed.
+    `GeomObject` or `numpy.ndarray` of `GeomObject`
+        Geometrical object(s) with Z-coordinates removed.
     """
     return _to_2D(geom)
 
+## CRS and Transformer objects are built once per process and EPSG
+## code(s), as building them queries the PROJ database. The caches are
+## thread-safe, and so are the cached objects (pyproj>=3.1).
+@lru_cache(maxsize=None)
+def _get_crs(epsg: int) -> pyproj.CRS:
+    """Return the (cached) CRS object of an EPSG code.
+
+    Raises `pyproj.exceptions.CRSError` for invalid EPSG codes, which
+    are not cached.
+    """
+    return pyproj.CRS(f"EPSG:{epsg}")
+
+@lru_cache(maxsize=None)
+def _get_transformer(epsg_in: int, epsg_out: int) -> pyproj.Transformer:
+    """Return the (cached) Transformer object between two spatial
+    reference systems, identified by their EPSG codes.
+    """
+    return pyproj.Transformer.from_crs(_get_crs(epsg_in), _get_crs(epsg_out),
+                                       always_xy=True)
+
+def _transform_coords(transformer: pyproj.Transformer,
+                      coords: np.ndarray) -> np.ndarray:
+    return np.column_stack(transformer.transform(*coords.T))
+
+def _transform_geoms(transformer: pyproj.Transformer,
+                     geoms: Union[GeomObject, np.ndarray]
+                     ) -> Union[GeomObject, np.ndarray]:
+    ## The coordinates of all the geometries are transformed at once.
+    ## Geometries with and without Z-coordinates are transformed
+    ## separately, as all the coordinates passed to the transformer
+    ## must have the same dimension.
+    func = partial(_transform_coords, transformer)
+    if np.ndim(geoms) == 0:
+        return shapely.transform(geoms, func,
+                                 include_z=bool(shapely.has_z(geoms)))
+    geoms = np.asarray(geoms, dtype=object)
+    has_z = shapely.has_z(geoms)
+    geoms_reproj = shapely.transform(geoms, func)
+    if has_z.any():
+        geoms_reproj[has_z] = shapely.transform(geoms[has_z], func,
+                                                include_z=True)
+    return geoms_reproj
+
 def get_transform_func(
     epsg_in: int, epsg_out: int
 ) -> Callable[[GeomObject], GeomObject]:
@@ -80,15 +125,98 @@ def get_transform_func(
     Returns
     -------
     `callable`
-        Function that takes one `GeomObject` as positional argument
-        and returns the `GeomObject` with its XY-coordinates
-        transformed to the output spatial reference system.
+        Function that takes one `GeomObject` (or a `numpy.ndarray` of
+        `GeomObject`) as positional argument and returns the
+        `GeomObject` (or array) with its XY-coordinates transformed to
+        the output spatial reference system. The coordinates of an
+        array of geometrical objects are transformed at once.
     """
-    crs_in = pyproj.CRS(f"EPSG:{epsg_in}")
-    crs_out = pyproj.CRS(f"EPSG:{epsg_out}")
-    project = pyproj.Transformer.from_crs(crs_in, crs_out,
-                                          always_xy=True).transform
-    return partial(shapely.ops.transform, project)
+    return partial(_transform_geoms,
+                   _get_transformer(int(epsg_in), int(epsg_out)))
+
+def transform_geoms(
+    geoms: Iterable[GeomObject], epsg_in: int, epsg_out: int
+) -> np.ndarray:
+    """Transform geometrical objects to another SRS, all at once.
+
+    The coordinates of all the geometrical objects are gathered into a
+    single array, which is transformed with a single call to the
+    transformation, and the geometrical objects are then rebuilt with
+    the transformed coordinates.
+
+    Parameters
+    ----------
+    geoms : iterable of `GeomObject`
+        Geometrical objects to transform.
+    epsg_in : `int`
+        EPSG code of the input spatial reference system.
+    epsg_out : `int`
+        EPSG code of the output spatial reference system.
+
+    Returns
+    -------
+    `numpy.ndarray` of `GeomObject`
+        Geometrical objects with their XY-coordinates transformed to
+        the output spatial reference system.
+    """
+    return get_transform_func(epsg_in, epsg_out)(
+        np.array(list(geoms), dtype=object)
+    )
 
 def _unchanged_geom(geom: GeomObject) -> GeomObject:
     return geom
+
+
+class _GeomsIndex:
+    """Packed in-memory spatial index of geometrical objects.
+
+    The index is bulk-loaded once (Sort-Tile-Recursive algorithm, see
+    :class:`shapely.STRtree`) and cannot be modified afterwards. It is
+    meant to index the *input* geometries of a comparison, for reverse
+    searches of *reference* geometries without any matching *input*
+    geometry.
+
+    Parameters
+    ----------
+    geoms_iter : iterable of `GeomObject`
+        Geometrical objects to index.
+    """
+
+    def __init__(self, geoms_iter: Iterable[GeomObject]) -> None:
+        if isinstance(geoms_iter, np.ndarray):
+            self.geoms = geoms_iter
+        else:
+            self.geoms = np.array(list(geoms_iter), dtype=object)
+        self._tree = shapely.STRtree(self.geoms)
+
+    def __len__(self) -> int:
+        return len(self.geoms)
+
+    def query(self, geom: GeomObject) -> np.ndarray:
+        """Return the indexed geometries which bounding boxes intersect
+        with the bounding box of ``geom``.
+        """
+        return self.geoms[self._tree.query(geom)]
+
+    def unmatched(
+        self,
+        geoms_iter: Iterable[GeomObject],
+        geoms_match: Callable[[GeomObject, GeomObject], bool],
+        transform_geom: Callable[[GeomObject], GeomObject] = _unchanged_geom,
+        get_search_frame: Callable[[GeomObject], GeomObject] = _unchanged_geom,
+    ) -> Iterator[GeomObject]:
+        """Yield the geometries that do not match any indexed geometry.
+
+        For each geometry ``geom`` of ``geoms_iter``, the candidate
+        indexed geometries are the ones intersecting with the bounding
+        box of the *search frame* of ``transform_geom(geom)``. The
+        geometry is yielded (unchanged) if ``geoms_match(candidate,
+        transform_geom(geom))`` is ``False`` for all candidates.
+        """
+        for geom in geoms_iter:
+            geom_reproj = transform_geom(geom)
+            if not any(
+                geoms_match(candidate, geom_reproj)
+                for candidate in self.query(get_search_frame(geom_reproj))
+            ):
+                yield geom
@@ -1,15 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import atexit
 import inspect
 import itertools
 import logging
 import os
 import sys
+import threading
+import uuid
 
 # from collections import defaultdict
+from collections import OrderedDict
+from contextlib import contextmanager
 from collections.abc import Iterable, Sequence, Generator
 from numbers import Integral
-from typing import Literal, NamedTuple, Optional, Union
+from typing import Any, Literal, NamedTuple, Optional, Union
 
 try:
     from osgeo import ogr, osr
@@ -18,6 +23,8 @@ try:
 except ImportError:
     pass
 import psycopg2
+import psycopg2.pool
+import shapely
 from shapely import wkb
 from shapely.geometry import (
     LinearRing,
@@ -158,6 +165,274 @@ class ConnectionParameters(NamedTuple):
     port: int = 5432
 
 
+class PGConnectionPool:
+    """Pool of connections to a PostGIS database.
+
+    Thread-safe pool of connections, which can be shared by several
+    `.PostGISGeomRefDB` instances and calls of `fetch_geoms_from_pg`,
+    instead of opening a new connection for each of them. Connections
+    are opened when needed, up to ``maxconn`` connections, and at least
+    ``minconn`` connections are kept open.
+
+    The pool is picklable: the connections themselves are not pickled,
+    but every process opens its own connections when first needed,
+    and all the copies of a pool within a process (e.g. in a worker
+    process) draw from the same connections.
+
+    Parameters
+    ----------
+    conn_params : `ConnectionParameters` or `dict`
+        Parameters to open connections to the PostGIS database.
+    minconn : `int`, default: ``1``
+        Minimum number of connections kept open.
+    maxconn : `int`, default: ``4``
+        Maximum number of connections open at once (per process).
+    health_check : `bool`, default: ``True``
+        Check that a connection is still usable before handing it out,
+        and replace it with a new connection otherwise.
+
+    Raises
+    ------
+    ValueError
+        If ``maxconn`` is lower than 1 or than ``minconn``.
+    """
+
+    ## Connection pools of the current process, keyed by process ID and
+    ## pool identifier. Entries inherited from a parent process (with
+    ## another process ID) are left untouched, as closing them would
+    ## close the connections of the parent process.
+    _pools = dict()
+    _pools_lock = threading.Lock()
+
+    def __init__(
+        self,
+        conn_params: Union[ConnectionParameters, dict],
+        minconn: int = 1,
+        maxconn: int = 4,
+        health_check: bool = True,
+    ) -> None:
+        if isinstance(conn_params, ConnectionParameters):
+            conn_params = conn_params._asdict()
+        if maxconn < 1 or not 0 <= minconn <= maxconn:
+            raise ValueError(
+                f"Invalid pool size (minconn={minconn!r}, maxconn={maxconn!r})!"
+            )
+        self.conn_params = dict(conn_params)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.health_check = health_check
+        self._key = uuid.uuid4().hex
+
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        key = (os.getpid(), self._key)
+        with self._pools_lock:
+            pool = self._pools.get(key, None)
+            if pool is None:
+                pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.minconn, self.maxconn, **self.conn_params
+                )
+                self._pools[key] = pool
+        return pool
+
+    @staticmethod
+    def _is_healthy(conn: psycopg2.extensions.connection) -> bool:
+        if conn.closed:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            if not conn.autocommit:
+                conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """Get a connection from the pool.
+
+        Returns
+        -------
+        `psycopg2.extensions.connection`
+            Connection to the PostGIS database, to be given back to the
+            pool with :meth:`putconn`.
+
+        Raises
+        ------
+        psycopg2.pool.PoolError
+            If ``maxconn`` connections are already in use.
+        RuntimeError
+            If no usable connection to the PostGIS database could be
+            opened.
+        """
+        pool = self._get_pool()
+        for _ in range(self.maxconn + 1):
+            conn = pool.getconn()
+            if not self.health_check or self._is_healthy(conn):
+                return conn
+            pool.putconn(conn, close=True)
+        raise RuntimeError("Could not get a usable connection to the database!")
+
+    def putconn(
+        self, conn: psycopg2.extensions.connection, close: bool = False
+    ) -> None:
+        """Give a connection back to the pool.
+
+        Parameters
+        ----------
+        conn : `psycopg2.extensions.connection`
+            Connection obtained with :meth:`getconn`.
+        close : `bool`, default: ``False``
+            Close the connection instead of keeping it in the pool.
+        """
+        self._get_pool().putconn(conn, close=close)
+
+    @contextmanager
+    def connection(self) -> Generator[psycopg2.extensions.connection]:
+        """Context manager lending a connection from the pool."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        """Close all the connections of the pool in the current process."""
+        with self._pools_lock:
+            pool = self._pools.pop((os.getpid(), self._key), None)
+        if pool is not None:
+            pool.closeall()
+
+
+## Connection pools shared by the calls of `fetch_geoms_from_pg`, keyed
+## by connection parameters, and number of connections lent by each of
+## them. At most _MAX_SHARED_POOLS pools are kept: the least recently
+## used pool is dropped when the limit is exceeded, and closed as soon
+## as none of its connections is lent anymore.
+_MAX_SHARED_POOLS = 8
+_shared_pools = OrderedDict()
+_shared_pools_lent = dict()
+_shared_pools_lock = threading.Lock()
+
+
+def _acquire_shared_pool(conn_params: ConnectionParameters) -> PGConnectionPool:
+    """Return the connection pool shared by the calls of
+    `fetch_geoms_from_pg` with the same connection parameters, to be
+    released with `_release_shared_pool`.
+    """
+    with _shared_pools_lock:
+        pool = _shared_pools.get(conn_params, None)
+        if pool is None:
+            pool = _shared_pools[conn_params] = PGConnectionPool(conn_params)
+            _shared_pools_lent[pool] = 0
+        _shared_pools.move_to_end(conn_params)
+        _shared_pools_lent[pool] += 1
+        evicted = []
+        while len(_shared_pools) > _MAX_SHARED_POOLS:
+            old_pool = _shared_pools.popitem(last=False)[1]
+            if not _shared_pools_lent[old_pool]:
+                del _shared_pools_lent[old_pool]
+                evicted.append(old_pool)
+    for old_pool in evicted:
+        old_pool.closeall()
+    return pool
+
+
+def _release_shared_pool(pool: PGConnectionPool) -> None:
+    """Release a connection pool returned by `_acquire_shared_pool`, and
+    close it if it was dropped from the shared pools meanwhile.
+    """
+    with _shared_pools_lock:
+        _shared_pools_lent[pool] -= 1
+        if _shared_pools_lent[pool] or pool in _shared_pools.values():
+            return
+        del _shared_pools_lent[pool]
+    pool.closeall()
+
+
+@atexit.register
+def _close_shared_pools() -> None:
+    """Close the connection pools shared by the calls of
+    `fetch_geoms_from_pg`.
+    """
+    with _shared_pools_lock:
+        pools = list(_shared_pools_lent)
+        _shared_pools.clear()
+        _shared_pools_lent.clear()
+    for pool in pools:
+        pool.closeall()
+
+
+@contextmanager
+def _shared_connection(
+    conn_params: ConnectionParameters,
+) -> Generator[psycopg2.extensions.connection]:
+    """Context manager lending a connection from the pool shared by the
+    calls of `fetch_geoms_from_pg` with the same connection parameters.
+    If all the connections of the pool are in use, a dedicated
+    connection is opened instead, and closed afterwards.
+    """
+    pool = _acquire_shared_pool(conn_params)
+    try:
+        try:
+            conn = pool.getconn()
+        except psycopg2.pool.PoolError:
+            conn = psycopg2.connect(**conn_params._asdict())
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+    finally:
+        _release_shared_pool(pool)
+
+
+def _server_side_cursor(
+    conn: psycopg2.extensions.connection, itersize: int
+) -> psycopg2.extensions.cursor:
+    """Open a named (server-side) cursor on a PostGIS connection.
+
+    The rows of the results of the queries executed with the returned
+    cursor are kept on the server and transferred ``itersize`` rows at
+    a time. Cursors opened on a connection in autocommit mode are
+    declared ``WITH HOLD``, as they would otherwise not outlive the
+    implicit transaction of the query.
+    """
+    cursor = conn.cursor(
+        name=f"geomcompare_{uuid.uuid4().hex}", withhold=conn.autocommit
+    )
+    cursor.itersize = itersize
+    return cursor
+
+
+def _fetch_geoms(
+    cursor: psycopg2.extensions.cursor,
+    itersize: int,
+    column: int = 0,
+    key_column: Optional[int] = None,
+) -> Generator[Union[GeomObject, tuple[Any, GeomObject]]]:
+    """Yield the geometries of the rows fetched by a cursor.
+
+    The rows are fetched ``itersize`` at a time, and the WKB values of
+    the ``column``-th column of each batch of rows are decoded at once.
+    If ``key_column`` is given, ``(key, geometry)`` tuples are yielded
+    instead, with the values of the ``key_column``-th column as keys.
+    """
+    while True:
+        rows = cursor.fetchmany(itersize)
+        if not rows:
+            break
+        geoms = shapely.from_wkb([bytes(row[column]) for row in rows])
+        if key_column is None:
+            yield from geoms
+        else:
+            yield from zip((row[key_column] for row in rows), geoms)
+
+
 class SchemaTableColumn(NamedTuple):
     """Location of a geometry column in a PostGIS database.
 
@@ -191,22 +466,29 @@ def fetch_geoms_from_pg(
     aoi: Optional[GeomObject] = None,
     aoi_epsg: Optional[int] = None,
     output_epsg: Optional[int] = None,
+    itersize: int = 2000,
+    pool: Optional[PGConnectionPool] = None,
 ) -> Generator[GeomObject]:
     """Fetch geometrical features from a PostGIS database.
 
-    Generator function which connects or uses an existing connection to a
-    PostGIS database, and yields geometrical features from specified
-    geometry column (within a given area or not), or based on a
-    user-defined SQL query. If the connection to the database is opened by
-    the function, it will be closed automatically after the last
-    geometrical feature is yielded.
+    Generator function which uses an existing connection to a PostGIS
+    database, or a connection drawn from a pool of connections, and
+    yields geometrical features from specified geometry column (within a
+    given area or not), or based on a user-defined SQL query. If the
+    connection is drawn from a pool, it will be given back to the pool
+    after the last geometrical feature is yielded.
 
     Parameters
     ----------
     conn : `psycopg2.extensions.connection`, optional
         Pre-opened connection to the PostGIS database.
     conn_params : `ConnectionParameters`, optional
-        Parameters to open a connection to the PostGIS database.
+        Parameters to open a connection to the PostGIS database. The
+        connection is drawn from a pool shared by all the calls with the
+        same parameters, which keeps up to 4 connections open. If they
+        are all in use (e.g. by unfinished generators of other calls),
+        a dedicated connection is opened for the call, and closed
+        after the last geometrical feature is yielded.
     sql_query : `str`, optional
         SQL query to use to extract geometrical features from the PostGIS
         database.
@@ -220,6 +502,12 @@ def fetch_geoms_from_pg(
         EPSG code of the yielded geometrical features. This parameter can
         be used to transform the yielded geometries to a different Spatial
         Reference System from the one used in the PostGIS database.
+    itersize : `int`, default: 2000
+        Number of rows transferred at a time from the PostGIS database.
+        The results of the SQL query are read through a server-side
+        cursor, so that at most ``itersize`` rows are held in memory.
+    pool : `PGConnectionPool`, optional
+        Pool of connections to the PostGIS database.
 
     Yields
     ------
@@ -229,8 +517,8 @@ def fetch_geoms_from_pg(
     Raises
     ------
     ValueError
-        If both ``conn`` and ``conn_params`` parameters are not passed
-        an argument different from `None`.
+        If none of the ``conn``, ``conn_params`` and ``pool`` parameters
+        is passed an argument different from `None`.
     ValueError
         If both ``sql_query`` and ``geoms_col_loc`` parameters are not
         passed an argument different from `None`.
@@ -240,27 +528,45 @@ def fetch_geoms_from_pg(
     In the case where the ``sql_query`` parameter is given, the parameters
     ``geoms_col_loc``, ``aoi``, ``aoi_epsg`` and ``output_epsg`` will be
     ignored, as SQL queries can include filtering and reprojection.
+
+    If the connection to the PostGIS database is not in autocommit mode,
+    the transaction opened by the function is left open, as with any
+    other query executed on the connection.
     """
     if conn is None:
-        if conn_params is None:
-            raise ValueError("'conn' and 'conn_params' cannot both be passed None!")
-        conn = psycopg2.connect(**conn_params._asdict())
-        close_conn = True
-    else:
-        close_conn = False
-    cursor = conn.cursor()
+        if pool is None:
+            if conn_params is None:
+                raise ValueError(
+                    "'conn', 'conn_params' and 'pool' cannot all be passed None!"
+                )
+            conn_manager = _shared_connection(conn_params)
+        else:
+            conn_manager = pool.connection()
+        with conn_manager as conn:
+            yield from fetch_geoms_from_pg(
+                conn=conn,
+                sql_query=sql_query,
+                geoms_col_loc=geoms_col_loc,
+                aoi=aoi,
+                aoi_epsg=aoi_epsg,
+                output_epsg=output_epsg,
+                itersize=itersize,
+            )
+        return
     if sql_query is None:
         if geoms_col_loc is None:
             raise ValueError(
                 "'sql_query' and 'geoms_col_loc' cannot both be passed None!"
             )
         if aoi is not None or output_epsg is not None:
+            cursor = conn.cursor()
             cursor.execute(
                 f"SELECT Find_SRID('{geoms_col_loc.schema}', "
                 f"'{geoms_col_loc.table}', "
                 f"'{geoms_col_loc.column}');"
             )
             pg_epsg = int(cursor.fetchone()[0])
+            cursor.close()
         where_filter = f"WHERE {geoms_col_loc.column} IS NOT NULL"
         if aoi is not None:
             if aoi_epsg is not None and int(aoi_epsg) != pg_epsg:
@@ -281,11 +587,12 @@ def fetch_geoms_from_pg(
             f"FROM {geoms_col_loc.schema}.{geoms_col_loc.table} "
             f"{where_filter}{spatial_filter}"
         )
+    cursor = _server_side_cursor(conn, itersize)
     cursor.execute(sql_query)
-    for row in cursor:
-        yield wkb.loads(row[0].tobytes())
-    if close_conn:
-        conn = None
+    try:
+        yield from _fetch_geoms(cursor, itersize)
+    finally:
+        cursor.close()
 
 
 def _get_layer_epsg(layer) -> Optional[int]:
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import numpy as np
+import pytest
+from shapely.geometry import Point, box
+
+from geomcompare.comparefunc import RefGeomCache, polygons_area_match
+
+
+@pytest.mark.parametrize("strategy", ["ptest", "pref", "both", "mean", "IoU"])
+def test_polygons_area_match_batch(strategy):
+    gtests = [box(0, 0, 1, 1), box(0, 0, 2, 1), box(0.5, 0, 1.5, 1), box(5, 5, 6, 6)]
+    grefs = [box(0, 0, 1, 1), box(0, 0, 1, 1), box(0, 0, 1, 1), box(0, 0, 1, 1)]
+    match = polygons_area_match(strategy, 0.5)
+    expected = [match(gtest, gref) for gtest, gref in zip(gtests, grefs)]
+    assert match.batch(gtests, grefs).tolist() == expected
+
+
+def test_polygons_area_match_scores():
+    match = polygons_area_match("ptest", 0.5)
+    scores = match.scores([box(0, 0, 2, 1), Point(0, 0)], [box(0, 0, 1, 1)] * 2)
+    assert scores[0] == pytest.approx(0.5)
+    # The area of the test geometry is null.
+    assert np.isnan(scores[1])
+    assert match.batch([Point(0, 0)], [box(0, 0, 1, 1)]).tolist() == [False]
+
+
+@pytest.mark.parametrize("strategy", ["ptest", "pref", "both", "mean", "IoU"])
+def test_polygons_area_match_null_area(strategy):
+    match = polygons_area_match(strategy, 0.5)
+    cached_match = RefGeomCache().bind(match)
+    gtests = [Point(0.5, 0.5), box(0, 0, 1, 1), Point(0.5, 0.5)]
+    grefs = [box(0, 0, 1, 1), Point(0.5, 0.5), Point(0.5, 0.5)]
+    # Pairs with a geometry without area are not matching, whichever the
+    # entry point.
+    expected = [False] * 3
+    assert match.batch(gtests, grefs).tolist() == expected
+    assert list(map(match, gtests, grefs)) == expected
+    assert list(map(cached_match, gtests, grefs)) == expected
+
+
+def test_polygons_area_match_pickle():
+    match = pickle.loads(pickle.dumps(polygons_area_match("mean", 0.8)))
+    assert (match.strategy, match.threshold) == ("mean", 0.8)
+    assert match(box(0, 0, 1, 1), box(0, 0, 1, 1))
+    with pytest.raises(ValueError):
+        polygons_area_match("area", 0.8)
+
+
+def test_ref_geom_cache():
+    cache = RefGeomCache(maxsize=2)
+    loads = []
+
+    def loader(geom):
+        def load():
+            loads.append(geom)
+            return geom
+        return load
+
+    geoms = [box(0, 0, 1, 1), box(1, 0, 3, 1), box(2, 0, 5, 1)]
+    assert cache.get(0, loader(geoms[0])) is geoms[0]
+    assert cache.get(0, loader(geoms[0])) is geoms[0]
+    assert cache.area(geoms[0]) == 1
+    cache.get(1, loader(geoms[1]))
+    cache.get(2, loader(geoms[2]))
+    assert len(cache) == 2
+    # Geometries are stored with their area.
+    assert cache._geoms[1] == (geoms[1], 2)
+    assert cache.area(geoms[2]) == 3
+    # Other geometries than the last returned one are not looked up.
+    assert cache.area(box(0, 0, 2, 2)) == 4
+    assert len(loads) == 3
+    # The least recently used geometry was evicted.
+    cache.get(0, loader(geoms[0]))
+    assert len(loads) == 4
+
+
+@pytest.mark.parametrize("strategy", ["ptest", "pref", "both", "mean", "IoU"])
+def test_polygons_area_match_ref_cache(strategy):
+    match = polygons_area_match(strategy, 0.5)
+    cache = RefGeomCache()
+    cached_match = cache.bind(match)
+    assert cached_match.ref_cache is cache
+    gref = cache.get(0, lambda: box(0, 0, 1, 1))
+    for gtest in [box(0.2, 0.2, 0.8, 0.8), box(0.5, 0, 2, 1), box(5, 5, 6, 6)]:
+        assert cached_match(gtest, gref) == match(gtest, gref)
+    assert cache.bind(len) is len
+
+
+def test_polygons_area_match_stats():
+    match = polygons_area_match("IoU", 0.5)
+    gref = box(0, 0, 1, 1)
+    # Bounding boxes overlap at 10%, and a covered small geometry.
+    assert not match(box(0.9, 0, 1.9, 1), gref)
+    assert not match(box(0.1, 0.1, 0.2, 0.2), gref)
+    assert match(box(0.1, 0, 1.1, 1), gref)
+    assert match.stats == {"pairs": 3, "bbox": 2, "overlay": 1}
+    gtests = [box(0.9, 0, 1.9, 1), box(0.1, 0, 1.1, 1)]
+    assert match.batch(gtests, [gref, gref]).tolist() == [False, True]
+    assert match.stats == {"pairs": 5, "bbox": 3, "overlay": 2}
+    cached_match = RefGeomCache().bind(match)
+    assert cached_match.stats is match.stats
+
+
+@pytest.mark.parametrize("strategy", ["ptest", "pref", "both", "mean", "IoU"])
+@pytest.mark.parametrize("threshold", [0.3, 0.8])
+def test_polygons_area_match_area_ratio_bounds(strategy, threshold):
+    match = polygons_area_match(strategy, threshold)
+    min_ratio, max_ratio = match.area_ratio_bounds()
+    rng = np.random.default_rng(0)
+    gtest = box(0, 0, 1, 1)
+    for x, y, w, h in rng.uniform(0, 2, (200, 4)):
+        gref = box(x - 1, y - 1, x - 1 + w, y - 1 + h)
+        if match(gtest, gref):
+            assert min_ratio <= gref.area / gtest.area <= max_ratio
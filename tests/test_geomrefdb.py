@@ -0,0 +1,655 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import sqlite3
+import struct
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+import pytest
+
+from geomcompare import geomrefdb
+from geomcompare._geomrefdb_abc import GeomRefDB
+from geomcompare.comparefunc import polygons_area_match
+from geomcompare.geomrefdb import (
+    RtreeGeomRefDB,
+    SQLiteGeomRefDB,
+    STRtreeGeomRefDB,
+    _pg_binary_copy,
+)
+from geomcompare.geomutils import (
+    _GeomsIndex,
+    _geom_type_mapping,
+    get_transform_func,
+)
+
+
+EPSG = 25833
+
+
+def _ewkb(geom, srid):
+    return shapely.to_wkb(shapely.set_srid(geom, int(srid)), include_srid=True)
+
+
+def _geom(blob):
+    return None if blob is None else shapely.from_wkb(blob)
+
+
+class FakeSpatialiteConnection(sqlite3.Connection):
+    # Emulates the SpatiaLite functions used by SQLiteGeomRefDB with
+    # Python functions. Geometries are stored as EWKB.
+
+    def enable_load_extension(self, enabled):
+        pass
+
+    def load_extension(self, name):
+        functions = {
+            "InitSpatialMetaData": (0, self._init_spatial_metadata),
+            "AddGeometryColumn": (6, self._add_geometry_column),
+            "CreateSpatialIndex": (2, self._create_spatial_index),
+            "DisableSpatialIndex": (2, self._disable_spatial_index),
+            "GeomFromWKB": (2, lambda blob, srid: _ewkb(_geom(blob), srid)),
+            "GeomFromText": (2, lambda wkt, srid: _ewkb(shapely.from_wkt(wkt), srid)),
+            "AsBinary": (1, lambda blob: _geom(blob).wkb),
+            "Transform": (2, self._transform),
+            "Intersects": (2, lambda a, b: int(_geom(a).intersects(_geom(b)))),
+            "ST_Intersection": (2, self._intersection),
+            "ST_Area": (1, lambda blob: None if blob is None else _geom(blob).area),
+            "ST_NPoints": (1, lambda blob: shapely.get_num_coordinates(_geom(blob))),
+        }
+        for i, func_name in enumerate(["MbrMinX", "MbrMinY", "MbrMaxX", "MbrMaxY"]):
+            functions[func_name] = (1, lambda blob, i=i: _geom(blob).bounds[i])
+        for func_name, (nargs, func) in functions.items():
+            self.create_function(func_name, nargs, func)
+
+    def _init_spatial_metadata(self):
+        self.execute(
+            "CREATE TABLE geometry_columns (f_table_name, f_geometry_column, "
+            "geometry_type, coord_dimension, srid, spatial_index_enabled);"
+        )
+        return 1
+
+    def _add_geometry_column(self, table, column, srid, geom_type, dims, not_null):
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} BLOB;")
+        self.execute(
+            "INSERT INTO geometry_columns VALUES (?, ?, ?, 2, ?, 0);",
+            (table.lower(), column, _geom_type_mapping[geom_type], srid),
+        )
+        return 1
+
+    def _create_spatial_index(self, table, column):
+        idx = f"idx_{table}_{column}"
+        bounds = "MbrMinX({0}), MbrMaxX({0}), MbrMinY({0}), MbrMaxY({0})"
+        self.execute(
+            f"CREATE VIRTUAL TABLE {idx} USING rtree(pkid, xmin, xmax, ymin, ymax);"
+        )
+        self.execute(
+            f"INSERT INTO {idx} SELECT ROWID, {bounds.format(column)} FROM {table};"
+        )
+        self.execute(
+            f"CREATE TRIGGER gii_{table}_{column} AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {idx} VALUES (NEW.ROWID, {bounds.format('NEW.' + column)}); "
+            "END;"
+        )
+        self.execute(
+            "UPDATE geometry_columns SET spatial_index_enabled = 1 "
+            "WHERE f_table_name = ?;",
+            (table.lower(),),
+        )
+        return 1
+
+    def _disable_spatial_index(self, table, column):
+        self.execute(f"DROP TRIGGER IF EXISTS gii_{table}_{column};")
+        self.execute(
+            "UPDATE geometry_columns SET spatial_index_enabled = 0 "
+            "WHERE f_table_name = ?;",
+            (table.lower(),),
+        )
+        return 1
+
+    @staticmethod
+    def _transform(blob, srid):
+        geom = _geom(blob)
+        transform = get_transform_func(int(shapely.get_srid(geom)), srid)
+        return _ewkb(transform(geom), srid)
+
+    @staticmethod
+    def _intersection(a, b):
+        if a is None or b is None:
+            return None
+        return _geom(a).intersection(_geom(b)).wkb
+
+
+@pytest.fixture
+def ref_geoms():
+    return [box(i, 0, i + 1, 1) for i in range(10)]
+
+
+@pytest.fixture
+def input_geoms():
+    # Inputs 0 to 4 overlap the even reference geometries at 90%, input
+    # 5 does not overlap any reference geometry.
+    return [box(i + 0.1, 0, i + 1.1, 1) for i in range(0, 10, 2)] + [
+        box(100, 100, 101, 101)
+    ]
+
+
+@pytest.fixture(params=[RtreeGeomRefDB, STRtreeGeomRefDB])
+def db(request, ref_geoms):
+    return request.param(ref_geoms, EPSG)
+
+
+@pytest.fixture
+def spatialite(monkeypatch):
+    connect = sqlite3.connect
+
+    def fake_connect(*args, **kwargs):
+        return connect(*args, factory=FakeSpatialiteConnection, **kwargs)
+
+    monkeypatch.setattr(sqlite3, "connect", fake_connect)
+
+
+@pytest.fixture
+def sqlite_db(spatialite, ref_geoms):
+    return SQLiteGeomRefDB(
+        geoms_iter=ref_geoms[:6], geom_type="Polygon", geoms_epsg=EPSG
+    )
+
+
+@pytest.fixture
+def geoms_match():
+    return polygons_area_match("IoU", 0.7)
+
+
+def test_geoms_index(ref_geoms):
+    index = _GeomsIndex(ref_geoms)
+    assert len(index) == 10
+    assert len(index.query(box(0.5, 0.5, 2.5, 2))) == 3
+    unmatched = list(
+        index.unmatched([box(0, 0, 1, 1), box(20, 20, 21, 21)], lambda g1, g2: True)
+    )
+    assert unmatched == [box(20, 20, 21, 21)]
+
+
+def test_missing_geometries(db, input_geoms, geoms_match):
+    missing = list(db.missing_geometries(input_geoms, None, EPSG, geoms_match))
+    assert sorted(g.bounds[0] for g in missing) == [1, 3, 5, 7, 9]
+    aoi = box(0, 0, 5, 1)
+    missing = list(db.missing_geometries(input_geoms, aoi, EPSG, geoms_match))
+    assert sorted(g.bounds[0] for g in missing) == [1, 3, 5]
+
+
+def test_compare_full(db, input_geoms, geoms_match):
+    aoi = box(0, 0, 5, 1)
+    results = db.compare_full(input_geoms, aoi, EPSG, geoms_match)
+    assert results["true_positives"] == list(
+        db.true_positives(input_geoms, EPSG, geoms_match)
+    )
+    assert results["false_positives"] == [input_geoms[-1]]
+    assert sorted(g.bounds[0] for g in results["missing_geometries"]) == [1, 3, 5]
+    assert results["recall"] == pytest.approx(5 / 8)
+    assert results["precision"] == pytest.approx(5 / 6)
+
+
+def test_scores(db, input_geoms, geoms_match):
+    aoi = box(0, 0, 5, 1)
+    assert db._match_counts(iter(input_geoms), aoi, EPSG, geoms_match) == (5, 1, 3)
+    assert db.get_recall_score(iter(input_geoms), aoi, EPSG, geoms_match) == 5 / 8
+    assert db.get_precision_score(iter(input_geoms), EPSG, geoms_match) == 5 / 6
+    assert db.get_f1_score(input_geoms, aoi, EPSG, geoms_match) == pytest.approx(
+        db.compare_full(input_geoms, aoi, EPSG, geoms_match)["f1"]
+    )
+
+
+def test_candidate_pairs(db, input_geoms, geoms_match):
+    transform = get_transform_func(EPSG, 4326)
+    input_geoms_4326 = [transform(geom) for geom in input_geoms]
+    pairs = list(db._candidate_pairs(input_geoms_4326, 4326))
+    assert sorted((i, ref_key) for i, ref_key, _, _ in pairs) == [
+        (i // 2, i + j) for i in range(0, 10, 2) for j in range(2)
+    ]
+    # The fused comparison of the pairs gives the same results as the
+    # engine's own implementation.
+    assert GeomRefDB._fused_comparison(
+        db, input_geoms_4326, None, 4326, geoms_match
+    ) == db._fused_comparison(input_geoms_4326, None, 4326, geoms_match)
+
+
+def test_geomrefdb_abstract_methods():
+    class IncompleteGeomRefDB(GeomRefDB):
+        true_positives = false_positives = missing_geometries = None
+
+    with pytest.raises(TypeError, match="_aoi_reference_geoms, _candidate_pairs"):
+        IncompleteGeomRefDB()
+
+
+def test_strtree_reprojection(ref_geoms, input_geoms, geoms_match):
+    db = STRtreeGeomRefDB(ref_geoms, EPSG)
+    transform = get_transform_func(EPSG, 4326)
+    input_geoms_4326 = [transform(geom) for geom in input_geoms]
+    tps = list(db.true_positives(input_geoms_4326, 4326, geoms_match))
+    assert tps == input_geoms_4326[:5]
+    fps = list(db.false_positives(input_geoms_4326, 4326, geoms_match))
+    assert fps == input_geoms_4326[5:]
+
+
+def test_rtree_bulk_load(ref_geoms, input_geoms, geoms_match):
+    db = RtreeGeomRefDB(ref_geoms, EPSG)
+    # The index only stores the positions of the reference geometries.
+    assert sorted(db.index.intersection(box(0.5, 0.5, 2.5, 2).bounds)) == [0, 1, 2]
+    assert db.index.bounds == list(shapely.total_bounds(ref_geoms))
+    empty_db = RtreeGeomRefDB([], EPSG)
+    assert list(empty_db.true_positives(input_geoms, EPSG, geoms_match)) == []
+    missing = empty_db.missing_geometries(input_geoms, None, EPSG, geoms_match)
+    assert list(missing) == []
+
+
+def test_sqlite_reprojected_copy(sqlite_db, ref_geoms, input_geoms, geoms_match):
+    copy_tab_name = sqlite_db.add_reprojected_copy(4326)
+    assert copy_tab_name == "default_table_epsg4326"
+    assert sqlite_db.add_reprojected_copy(EPSG) == "default_table"
+    # Tables named like copies, but which are not.
+    for tab_name in ["default_table_epsg3857", "my_default_table_epsg4326"]:
+        sqlite_db.add_geometries(
+            ref_geoms[:1], geom_type="Polygon", geoms_epsg=EPSG, geoms_tab_name=tab_name
+        )
+    assert sqlite_db._reprojected_copies("default_table") == {copy_tab_name: 4326}
+    assert sqlite_db._table_srs(None, 4326) == (copy_tab_name, 4326, 4326)
+    assert sqlite_db._table_srs(None, 3857) == ("default_table", EPSG, 3857)
+    # Features added to the table are added to the copy.
+    sqlite_db.add_geometries(ref_geoms[6:])
+    db_info = sqlite_db.db_geom_info(count_features=True)
+    assert db_info[copy_tab_name]["count"] == 10
+    transform = get_transform_func(EPSG, 4326)
+    input_geoms_4326 = [transform(geom) for geom in input_geoms]
+    tps = sqlite_db.true_positives(
+        input_geoms_4326, geoms_epsg=4326, geoms_match=geoms_match
+    )
+    assert list(tps) == input_geoms_4326[:5]
+
+
+def test_sqlite_stale_reprojected_copy(sqlite_db, ref_geoms):
+    copy_tab_name = sqlite_db.add_reprojected_copy(4326)
+    transform = get_transform_func(EPSG, 4326)
+
+    def copy_bounds():
+        geoms = sqlite_db.get_geometries(geoms_tab_name=copy_tab_name)
+        return [tuple(round(x, 6) for x in geom.bounds) for geom in geoms]
+
+    def expected_bounds(geoms):
+        return [tuple(round(x, 6) for x in transform(geom).bounds) for geom in geoms]
+
+    # Features deleted from the table (e.g. by another program) are
+    # detected, and the copy is rebuilt.
+    sqlite_db._conn.execute("DELETE FROM default_table WHERE r_id IN (2, 3);")
+    sqlite_db._conn.commit()
+    assert sqlite_db.add_reprojected_copy(4326) == copy_tab_name
+    kept_geoms = [ref_geoms[0]] + ref_geoms[3:6]
+    assert copy_bounds() == expected_bounds(kept_geoms)
+    # The rebuilt copy keeps its spatial index, and is synchronized with
+    # the features added afterwards.
+    sqlite_db.add_geometries(ref_geoms[6:])
+    assert copy_bounds() == expected_bounds(kept_geoms + ref_geoms[6:])
+    candidates = sqlite_db._candidate_pairs(
+        [transform(ref_geoms[9])], 4326, geoms_tab_name=copy_tab_name
+    )
+    assert len(list(candidates)) == 2
+    # Features modified in place are only updated on request.
+    sqlite_db._conn.execute(
+        "UPDATE default_table SET geometry = GeomFromWKB(?, ?) WHERE r_id = 1;",
+        (box(20, 0, 21, 1).wkb, EPSG),
+    )
+    sqlite_db._conn.commit()
+    sqlite_db.add_reprojected_copy(4326)
+    assert copy_bounds()[0] == expected_bounds(ref_geoms[:1])[0]
+    sqlite_db.add_reprojected_copy(4326, refresh=True)
+    assert copy_bounds()[0] == expected_bounds([box(20, 0, 21, 1)])[0]
+
+
+def test_sqlite_unpicklable_geoms_match(monkeypatch, sqlite_db, input_geoms):
+    monkeypatch.setattr(multiprocessing, "cpu_count", lambda: 4)
+    # Lambdas cannot be sent to worker processes: the comparison runs in
+    # a single process.
+    tps = sqlite_db.true_positives(
+        input_geoms, geoms_match=lambda g1, g2: g1.intersects(g2), ncores=2
+    )
+    assert list(tps) == input_geoms[:3]
+
+
+def test_sqlite_deferred_spatial_index(monkeypatch, sqlite_db, ref_geoms):
+    build_spatial_index = sqlite_db._build_spatial_index
+    builds = []
+
+    def fake_build_spatial_index(geoms_tab_name):
+        builds.append(geoms_tab_name)
+        if fail_build:
+            raise RuntimeError("index failure")
+        build_spatial_index(geoms_tab_name)
+
+    def failing_geoms():
+        yield from ref_geoms[6:]
+        raise ValueError("insertion failure")
+
+    monkeypatch.setattr(sqlite_db, "_build_spatial_index", fake_build_spatial_index)
+    fail_build = False
+    sqlite_db.add_geometries(ref_geoms[6:], defer_spatial_index=True)
+    assert builds == ["default_table"]
+    # A failure to rebuild the index does not hide the insertion error.
+    fail_build = True
+    with pytest.raises(ValueError):
+        sqlite_db.add_geometries(
+            failing_geoms(), defer_spatial_index=True, batch_size=2
+        )
+    assert len(builds) == 2
+    assert sqlite_db.db_geom_info(count_features=True)["default_table"]["count"] == 10
+
+
+def test_sqlite_geom_info_cache(sqlite_db, ref_geoms):
+    def counts(**kwargs):
+        info = sqlite_db.db_geom_info(count_features=True, **kwargs)
+        return {tab: tab_info["count"] for tab, tab_info in info.items()}
+
+    info = sqlite_db.db_geom_info(count_features=True)
+    assert info == {"default_table": {"geom_type": "Polygon", "srid": EPSG, "count": 6}}
+    # The cached information cannot be altered by the caller.
+    info["default_table"]["count"] = 0
+    assert counts() == {"default_table": 6}
+    # The cached count is updated by the insertions.
+    sqlite_db.add_geometries(ref_geoms[6:8])
+    assert sqlite_db._count_cache == {"default_table": 8}
+    # New tables and reprojected copies are listed.
+    sqlite_db.add_geometries(ref_geoms[:1], "Polygon", EPSG, geoms_tab_name="t")
+    copy_tab_name = sqlite_db.add_reprojected_copy(4326)
+    assert sqlite_db.db_geom_info()[copy_tab_name]["srid"] == 4326
+    assert counts() == {"default_table": 8, "t": 1, copy_tab_name: 8}
+    # A failed insertion does not change the cached counts.
+    with pytest.raises(Exception):
+        sqlite_db.add_geometries(ref_geoms[8:] + ["POINT (0 0)"])
+    assert counts() == {"default_table": 8, "t": 1, copy_tab_name: 8}
+    # Changes made outside of the instance are only seen after a refresh.
+    sqlite_db._conn.execute("DELETE FROM t;")
+    sqlite_db._conn.execute("CREATE TABLE u (r_id INTEGER PRIMARY KEY);")
+    sqlite_db._conn.execute(
+        "SELECT AddGeometryColumn('u', 'geometry', 4326, 'Point', 'XY', 1);"
+    )
+    sqlite_db._conn.commit()
+    assert counts() == {"default_table": 8, "t": 1, copy_tab_name: 8}
+    assert counts(refresh=True) == {
+        "default_table": 8,
+        "t": 0,
+        copy_tab_name: 8,
+        "u": 0,
+    }
+
+
+@pytest.mark.parametrize("derived_columns", [False, True])
+@pytest.mark.parametrize("strategy", ["ptest", "pref", "both", "mean", "IoU"])
+def test_sqlite_area_match_pushdown(spatialite, ref_geoms, strategy, derived_columns):
+    # The last reference geometry has a null area.
+    refs = ref_geoms[:6] + [box(6.5, 0, 6.5, 1)]
+    db = SQLiteGeomRefDB(geoms_iter=refs, geom_type="Polygon", geoms_epsg=EPSG)
+    if derived_columns:
+        db.add_geometries([], derived_columns=True)
+    # Inputs overlapping the reference geometries in many proportions,
+    # with null-area inputs and pairs.
+    inputs = [box(i + 0.2 * i, 0, i + 1 + 0.2 * i, 1) for i in range(4)] + [
+        box(0.1, 0.1, 0.9, 0.9),
+        box(4, 0, 5.5, 1),
+        box(2.5, 0, 2.5, 1),
+        box(6, 0, 7, 1),
+        box(6.5, 0, 6.5, 1),
+        box(100, 100, 101, 101),
+    ]
+    area_match = polygons_area_match(strategy, 0.6)
+
+    def python_match(gtest, gref):
+        # Not an area-based function: the areas are not computed in SQL.
+        return area_match(gtest, gref)
+
+    def results(geoms_match):
+        kwargs = dict(geoms_epsg=EPSG, geoms_match=geoms_match)
+        return (
+            list(db.true_positives(inputs, **kwargs)),
+            list(db.false_positives(inputs, **kwargs)),
+            list(db.missing_geometries(inputs, **kwargs)),
+        )
+
+    sql_results = results(area_match)
+    assert sql_results == results(python_match)
+    assert sql_results[0] and sql_results[1] and sql_results[2]
+    assert refs[-1] in sql_results[2]
+    assert inputs[-2] in sql_results[1]
+
+
+def test_sqlite_missing_geometries_arguments(sqlite_db, ref_geoms, input_geoms):
+    calls = []
+
+    def geoms_match(gtest, gref):
+        calls.append((gtest, gref))
+        return gtest.intersection(gref).area > 0.5
+
+    missing = list(
+        sqlite_db.missing_geometries(iter(input_geoms), geoms_match=geoms_match)
+    )
+    assert missing == ref_geoms[1:6:2]
+    # The input geometry comes first, as for the other classes.
+    assert calls
+    assert all(gtest in input_geoms for gtest, _ in calls)
+    with pytest.warns(DeprecationWarning):
+        missing = sqlite_db.missing_geometries(
+            input_geoms, geom_type="Polygon", geoms_match=geoms_match
+        )
+        assert list(missing) == ref_geoms[1:6:2]
+
+
+def test_sqlite_derived_columns_cache(sqlite_db):
+    sqlite_db.db_geom_info(refresh=True)
+    statements = []
+    sqlite_db._conn.set_trace_callback(statements.append)
+    assert not sqlite_db._has_derived_columns("default_table")
+    assert not sqlite_db._has_derived_columns("default_table")
+    assert len([st for st in statements if st.startswith("PRAGMA table_info")]) == 1
+    # The cache is invalidated when the columns are added.
+    sqlite_db.add_geometries([], derived_columns=True)
+    assert sqlite_db._has_derived_columns("default_table")
+    # Changes made outside of the instance are only seen after a refresh.
+    sqlite_db._conn.execute("ALTER TABLE default_table DROP COLUMN num_vertices;")
+    assert sqlite_db._has_derived_columns("default_table")
+    sqlite_db.db_geom_info(refresh=True)
+    assert not sqlite_db._has_derived_columns("default_table")
+
+
+def test_sqlite_batched_insertions(monkeypatch, sqlite_db, ref_geoms):
+    iter_to_chunks = geomrefdb.iter_to_chunks
+    chunk_sizes = []
+
+    def spy_iter_to_chunks(iterable, size):
+        for chunk in iter_to_chunks(iterable, size):
+            chunk_sizes.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(geomrefdb, "iter_to_chunks", spy_iter_to_chunks)
+    # The last batch is partial.
+    sqlite_db.add_geometries(ref_geoms[6:], batch_size=3)
+    assert chunk_sizes == [3, 1]
+    # The geometries fill the batches exactly.
+    sqlite_db.add_geometries(
+        ref_geoms[:4], "Polygon", EPSG, geoms_tab_name="t", batch_size=2
+    )
+    assert chunk_sizes[2:] == [2, 2]
+    assert list(sqlite_db.get_geometries()) == ref_geoms
+    assert list(sqlite_db.get_geometries(geoms_tab_name="t")) == ref_geoms[:4]
+
+
+def test_sqlite_insertions_rollback(sqlite_db, ref_geoms):
+    assert sqlite_db.db_geom_info(count_features=True)["default_table"]["count"] == 6
+    # The first batch is valid, the second one holds an invalid geometry.
+    with pytest.raises(Exception):
+        sqlite_db.add_geometries(ref_geoms[6:8] + [None, "POINT (0 0)"], batch_size=2)
+    # The insertions of the first batch are rolled back too.
+    assert sqlite_db._count_cache.get("default_table") is None
+    assert sqlite_db.db_geom_info(count_features=True)["default_table"]["count"] == 6
+    assert list(sqlite_db.get_geometries()) == ref_geoms[:6]
+
+
+@pytest.mark.parametrize("in_ram", [True, False])
+def test_sqlite_bulk_load_pragmas(spatialite, tmp_path, ref_geoms, in_ram):
+    db = SQLiteGeomRefDB(
+        filename=str(tmp_path / "ref.sqlite"),
+        in_ram=in_ram,
+        geoms_iter=ref_geoms[:1],
+        geom_type="Polygon",
+        geoms_epsg=EPSG,
+    )
+    pragmas = []
+
+    def geoms(geoms_iter):
+        cursor = db._conn.cursor()
+        pragmas.append(
+            tuple(
+                cursor.execute(f"PRAGMA {name};").fetchone()[0]
+                for name in ["synchronous", "journal_mode"]
+            )
+        )
+        yield from geoms_iter
+
+    defaults = (2, "memory" if in_ram else "delete")
+    db.add_geometries(geoms(ref_geoms[1:2]))
+    # Journaling and disk synchronization are only turned off on request,
+    # or for databases stored in RAM.
+    assert pragmas[-1] == ((0, "memory") if in_ram else defaults)
+    db.add_geometries(geoms(ref_geoms[2:3]), bulk_load=True)
+    assert pragmas[-1] == (0, "memory")
+    db.add_geometries(geoms([]))
+    assert pragmas[-1] == ((0, "memory") if in_ram else defaults)
+
+
+def test_sqlite_batch_candidates(sqlite_db):
+    rng = np.random.default_rng(0)
+    grid = [box(x, y, x + 1, y + 1) for x in range(10) for y in range(10)]
+    sqlite_db.add_geometries(grid, "Polygon", EPSG, geoms_tab_name="grid")
+    # Enough input features to span three chunks of search frames.
+    n_geoms = 2 * sqlite_db._search_chunk_size + 1
+    xy = rng.uniform(0, 9.5, size=(n_geoms, 2))
+    geoms = [box(x, y, x + 0.5, y + 0.5) for x, y in xy]
+    geoms[1] = box(20, 20, 21, 21)
+    pairs = {
+        (input_id, rowid)
+        for input_id, rowid, _, _ in sqlite_db._candidate_pairs(
+            geoms, EPSG, geoms_tab_name="grid"
+        )
+    }
+    # Same candidates as when querying the spatial index for each input
+    # feature.
+    query = (
+        "SELECT pkid FROM idx_grid_geometry "
+        "WHERE xmin <= ? AND xmax >= ? AND ymin <= ? AND ymax >= ?;"
+    )
+    expected = set()
+    for input_id, geom in enumerate(geoms):
+        minx, miny, maxx, maxy = geom.bounds
+        for (rowid,) in sqlite_db._conn.execute(query, (maxx, minx, maxy, miny)):
+            expected.add((input_id, rowid))
+    assert pairs == expected
+    assert {input_id for input_id, _ in pairs} == set(range(n_geoms)) - {1}
+    assert not sqlite_db._conn.in_transaction
+
+
+def test_sqlite_frames_table_recycling(sqlite_db, input_geoms, geoms_match):
+    def frames_count(frames):
+        return sqlite_db._conn.execute(f"SELECT COUNT(*) FROM {frames};").fetchone()[0]
+
+    assert list(sqlite_db.true_positives(input_geoms, geoms_match=geoms_match))
+    (frames,) = sqlite_db._free_frames_tables
+    # The table is reused by the next call, and cleared afterwards.
+    tps = sqlite_db.true_positives(input_geoms, geoms_match=geoms_match)
+    next(tps)
+    assert sqlite_db._free_frames_tables == []
+    assert frames_count(frames) == len(input_geoms)
+    # Another table is created for a generator running concurrently.
+    fps = sqlite_db.false_positives(input_geoms, geoms_match=geoms_match)
+    next(fps)
+    list(tps)
+    assert sqlite_db._free_frames_tables == [frames]
+    list(fps)
+    assert len(sqlite_db._free_frames_tables) == 2
+    for frames in sqlite_db._free_frames_tables:
+        assert frames_count(frames) == 0
+    # The changes made to the tables are committed.
+    assert not sqlite_db._conn.in_transaction
+
+
+def test_sqlite_query_templates(sqlite_db, ref_geoms, input_geoms, geoms_match):
+    SQLiteGeomRefDB._get_batch_query.cache_clear()
+    sqlite_db.add_geometries(ref_geoms, "Polygon", EPSG, geoms_tab_name="t")
+    tps = sqlite_db.true_positives(input_geoms, geoms_match=geoms_match)
+    next(tps)
+    # Queries on other tables, with other search frames tables, share the
+    # same template.
+    list(
+        sqlite_db.true_positives(
+            input_geoms, geoms_tab_name="t", geoms_match=geoms_match
+        )
+    )
+    list(tps)
+    assert len(sqlite_db._free_frames_tables) == 2
+    assert SQLiteGeomRefDB._get_batch_query.cache_info().currsize == 1
+    query = SQLiteGeomRefDB._get_spatial_query(select="ROWID", excluded=True)
+    assert query.format(table="t", excluded="temp.m") == (
+        "SELECT ROWID FROM t WHERE t.ROWID NOT IN (SELECT pkid FROM temp.m);"
+    )
+
+
+def test_sqlite_bound_params(sqlite_db, input_geoms):
+    aoi = box(0, 0, 3, 1)
+    query = SQLiteGeomRefDB._get_batch_query(within_aoi=True)
+    # Query formerly built with the area of interest formatted in the SQL.
+    old_query = (
+        "SELECT f.input_id, t.ROWID, AsBinary(t.geometry) "
+        "FROM {frames} AS f "
+        "CROSS JOIN idx_{table}_geometry AS r "
+        "  ON r.xmin <= f.maxx AND r.xmax >= f.minx "
+        " AND r.ymin <= f.maxy AND r.ymax >= f.miny "
+        "CROSS JOIN {table} AS t ON t.ROWID = r.pkid "
+        "WHERE Intersects(t.geometry, GeomFromText('{aoiwkt}', {epsg})) "
+        "ORDER BY f.input_id;"
+    )
+    cursor = sqlite_db._conn.cursor()
+    with sqlite_db._frames_table() as frames:
+        cursor.executemany(
+            f"INSERT INTO {frames} VALUES (?, ?, ?, ?, ?, ?, NULL);",
+            ((i, *geom.bounds, geom.area) for i, geom in enumerate(input_geoms)),
+        )
+        rows = cursor.execute(
+            query.format(table="default_table", frames=frames),
+            {"aoi": aoi.wkb, "srid": EPSG},
+        ).fetchall()
+        old_rows = cursor.execute(
+            old_query.format(
+                table="default_table", frames=frames, aoiwkt=aoi.wkt, epsg=EPSG
+            )
+        ).fetchall()
+    assert [row[:2] for row in rows] == [(0, 1), (0, 2), (1, 3), (1, 4)]
+    assert rows == old_rows
+
+
+def test_pg_binary_copy(ref_geoms):
+    data = _pg_binary_copy(ref_geoms, EPSG).read()
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    pos = 19
+    rows = []
+    while True:
+        (num_fields,) = struct.unpack_from("!h", data, pos)
+        pos += 2
+        if num_fields == -1:
+            break
+        assert num_fields == 2
+        _, input_id, size = struct.unpack_from("!iii", data, pos)
+        pos += 12
+        rows.append((input_id, shapely.from_wkb(data[pos : pos + size])))
+        pos += size
+    assert pos == len(data)
+    assert [input_id for input_id, _ in rows] == list(range(len(ref_geoms)))
+    assert all(shapely.get_srid(geom) == EPSG for _, geom in rows)
+    assert all(geom.equals(ref) for (_, geom), ref in zip(rows, ref_geoms))
@@ -1,9 +1,18 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
+from pyproj.exceptions import CRSError
 from shapely.geometry import Point, Polygon
 import pytest
 
-from geomcompare.geomutils import to_2D, _unchanged_geom
+from geomcompare.geomutils import (
+    _get_crs,
+    _get_transformer,
+    get_transform_func,
+    to_2D,
+    transform_geoms,
+    _unchanged_geom,
+)
 
 
 @pytest.fixture
@@ -18,5 +27,31 @@ def test_to_2D(geoms_3D):
     assert all(not g.has_z for g in map(to_2D, geoms_3D))
 
 
+def test_to_2D_array(geoms_3D):
+    geoms_2D = to_2D(np.array(geoms_3D, dtype=object))
+    assert all(not g.has_z for g in geoms_2D)
+
+
 def test_unchanged_geom(geoms_3D):
     assert all(g.equals(_unchanged_geom(g)) for g in geoms_3D)
+
+
+def test_srs_registry():
+    assert _get_crs(25833) is _get_crs(25833)
+    assert _get_transformer(4326, 25833) is _get_transformer(4326, 25833)
+    with pytest.raises(CRSError):
+        _get_crs(-1)
+    pt = get_transform_func(4326, 25833)(Point(15.0, 60.0))
+    assert pt.x == pytest.approx(500000.0)
+
+
+def test_transform_geoms(geoms_3D):
+    geoms = geoms_3D + [Point(15.0, 60.0), Polygon(((15, 60), (16, 60), (16, 61)))]
+    transform = get_transform_func(4326, 25833)
+    geoms_reproj = transform_geoms(geoms, 4326, 25833)
+    assert len(geoms_reproj) == len(geoms)
+    for geom, geom_reproj in zip(geoms, geoms_reproj):
+        # Batch and single geometry transformations are the same, and
+        # the Z-coordinates are kept.
+        assert geom_reproj.equals_exact(transform(geom), 1e-6)
+        assert geom_reproj.has_z == geom.has_z
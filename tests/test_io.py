@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import psycopg2
+import shapely
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from shapely.geometry import Point
+
+import geomcompare.io
+from geomcompare.comparefunc import polygons_area_match
+from geomcompare.geomrefdb import PostGISGeomRefDB
+from geomcompare.io import (
+    ConnectionParameters,
+    PGConnectionPool,
+    _close_shared_pools,
+    _fetch_geoms,
+    fetch_geoms_from_pg,
+)
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None, withhold=False):
+        self.conn = conn
+        self.name = name
+        self.withhold = withhold
+        self.itersize = 2000
+        self.fetch_sizes = []
+        self.closed = False
+        self.rows = []
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.queries.append(query)
+        self.conn.params.append(params)
+        rows = self.conn.rows
+        self.rows = list(rows(query, params) if callable(rows) else rows)
+
+    def copy_expert(self, sql, file):
+        self.conn.queries.append(sql)
+        self.conn.copied.append(file.read())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeInfo:
+    transaction_status = TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    def __init__(self, rows, autocommit=False):
+        self.rows = rows
+        self.autocommit = autocommit
+        self.queries = []
+        self.params = []
+        self.copied = []
+        self.cursors = []
+        self.closed = 0
+        self.broken = False
+        self.info = FakeInfo()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+    def cursor(self, name=None, withhold=False):
+        cursor = FakeCursor(self, name, withhold)
+        self.cursors.append(cursor)
+        return cursor
+
+
+@pytest.mark.parametrize("autocommit", [False, True])
+def test_fetch_geoms_from_pg_server_side(autocommit):
+    points = [Point(i, i) for i in range(5)]
+    conn = FakeConnection([(memoryview(p.wkb),) for p in points], autocommit)
+    geoms = list(fetch_geoms_from_pg(conn=conn, sql_query="SELECT", itersize=2))
+    assert [g.coords[0] for g in geoms] == [p.coords[0] for p in points]
+    cursor = conn.cursors[-1]
+    # Rows are streamed from a named cursor, batch by batch.
+    assert cursor.name is not None
+    assert cursor.withhold == autocommit
+    assert cursor.itersize == 2
+    assert cursor.fetch_sizes == [2, 2, 2, 2]
+    assert cursor.closed
+    # No other cursor is opened.
+    assert conn.cursors == [cursor]
+
+
+def test_fetch_geoms_key_column():
+    rows = [(f"(0,{i})", memoryview(Point(i, i).wkb)) for i in range(3)]
+    cursor = FakeConnection(rows).cursor()
+    cursor.execute("SELECT")
+    res = list(_fetch_geoms(cursor, 2, column=1, key_column=0))
+    assert [(key, geom.x) for key, geom in res] == [
+        ("(0,0)", 0),
+        ("(0,1)", 1),
+        ("(0,2)", 2),
+    ]
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    connections = []
+
+    def connect(**kwargs):
+        conn = FakeConnection([(memoryview(Point(0, 0).wkb),)])
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    return connections
+
+
+@pytest.fixture
+def pool(connections):
+    pool = PGConnectionPool({"dbname": "test"}, minconn=1, maxconn=2)
+    yield pool
+    pool.closeall()
+
+
+def test_pool_reuses_connections(pool, connections):
+    conn = pool.getconn()
+    pool.putconn(conn)
+    with pool.connection() as same_conn:
+        assert same_conn is conn
+    assert len(connections) == 1
+
+
+def test_pool_health_check(pool, connections):
+    with pool.connection() as conn:
+        conn.broken = True
+    with pool.connection() as new_conn:
+        assert new_conn is not conn
+    assert conn.closed
+
+
+def test_pool_pickle(pool, connections):
+    with pool.connection() as conn:
+        pass
+    # Copies of the pool within a process share the same connections.
+    pool_copy = pickle.loads(pickle.dumps(pool))
+    with pool_copy.connection() as same_conn:
+        assert same_conn is conn
+
+
+def test_pool_size():
+    with pytest.raises(ValueError):
+        PGConnectionPool({"dbname": "test"}, minconn=2, maxconn=1)
+
+
+def test_fetch_geoms_from_pg_pool(pool, connections):
+    geoms = list(fetch_geoms_from_pg(pool=pool, sql_query="SELECT"))
+    assert [g.coords[0] for g in geoms] == [(0.0, 0.0)]
+    # The connection was given back to the pool.
+    with pool.connection() as conn:
+        assert conn is connections[0]
+
+
+def test_fetch_geoms_from_pg_shared_pool_overflow(connections):
+    conn_params = ConnectionParameters("localhost", "test", "user", "password")
+    gens = [
+        fetch_geoms_from_pg(conn_params=conn_params, sql_query="SELECT")
+        for _ in range(6)
+    ]
+    # More unfinished generators than connections in the shared pool.
+    for gen in gens:
+        assert next(gen).coords[0] == (0.0, 0.0)
+    for gen in gens:
+        gen.close()
+    assert len(connections) == 6
+    # Only minconn=1 connection of the shared pool is kept open.
+    assert [conn.closed for conn in connections] == [0, 1, 1, 1, 1, 1]
+
+
+def test_fetch_geoms_from_pg_shared_pools_bounded(monkeypatch, connections):
+    monkeypatch.setattr(geomcompare.io, "_MAX_SHARED_POOLS", 2)
+    _close_shared_pools()
+    params = [
+        ConnectionParameters("localhost", f"test{i}", "user", "password")
+        for i in range(3)
+    ]
+    gen = fetch_geoms_from_pg(conn_params=params[0], sql_query="SELECT")
+    next(gen)
+    for conn_params in params[1:]:
+        list(fetch_geoms_from_pg(conn_params=conn_params, sql_query="SELECT"))
+    # The least recently used pool was dropped, but is only closed once
+    # its lent connection is given back.
+    assert len(geomcompare.io._shared_pools) == 2
+    assert [conn.closed for conn in connections] == [0, 0, 0]
+    gen.close()
+    assert [conn.closed for conn in connections] == [1, 0, 0]
+    # The remaining pools are closed at exit.
+    _close_shared_pools()
+    assert not geomcompare.io._shared_pools
+    assert all(conn.closed for conn in connections)
+
+
+def test_postgis_closes_own_pool(connections):
+    npools = len(PGConnectionPool._pools)
+    for _ in range(3):
+        db = PostGISGeomRefDB({"dbname": "test"}, "schema", "table", "geom")
+        del db
+    assert all(conn.closed for conn in connections)
+    assert len(PGConnectionPool._pools) == npools
+    pool = PGConnectionPool({"dbname": "test"})
+    db = PostGISGeomRefDB(
+        {"dbname": "test"}, "schema", "table", "geom", PG_pool=pool
+    )
+    conn = db.PG_conn
+    del db
+    # A pool passed to the instance is left open.
+    assert not conn.closed
+    pool.closeall()
+
+
+def test_postgis_reprojected_copy(monkeypatch):
+    copy_exists, counts = False, (10, 10)
+
+    def rows(query, params):
+        if query.startswith("SELECT Find_SRID"):
+            return [(25833,)]
+        if query.startswith("SELECT to_regclass"):
+            return [(copy_exists,)]
+        if query.startswith("SELECT (SELECT COUNT(*)"):
+            return [counts]
+        return []
+
+    def drops():
+        return sum(query.startswith("DROP TABLE") for query in conn.queries)
+
+    conn = FakeConnection(rows)
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: conn)
+    db = PostGISGeomRefDB({"dbname": "test"}, "schema", "table", "geom")
+    assert db._source_table(4326) == ("schema.table", 25833)
+    assert db.add_reprojected_copy(25833) == "table"
+    assert db.add_reprojected_copy(4326) == "table_epsg4326"
+    assert any("ST_Transform(geom, 4326)" in query for query in conn.queries)
+    # The copy is used for input features in its spatial reference system.
+    assert db._source_table(4326) == ("schema.table_epsg4326", 4326)
+    assert db._source_table(3857) == ("schema.table", 25833)
+    # An existing copy is reused if it is up to date...
+    copy_exists = True
+    db.add_reprojected_copy(4326)
+    assert drops() == 0
+    # ...and rebuilt if its number of features differs from the table's,
+    # or on request.
+    counts = (11, 10)
+    db.add_reprojected_copy(4326)
+    assert drops() == 1
+    counts = (10, 10)
+    db.add_reprojected_copy(4326, refresh=True)
+    assert drops() == 2
+
+
+def test_postgis_aoi_reference_geoms(monkeypatch):
+    rows = [(f"(0,{i})", memoryview(Point(i, i).wkb)) for i in range(5)]
+    conn = FakeConnection(rows)
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: conn)
+    db = PostGISGeomRefDB({"dbname": "test"}, "schema", "table", "geom", itersize=2)
+    db._PG_geoms_EPSG = 25833
+    refs = db._aoi_reference_geoms(None, 25833)
+    assert next(refs)[0] == "(0,0)"
+    # The server-side cursor is closed if the iteration stops early.
+    refs.close()
+    assert conn.cursors[-1].name is not None
+    assert conn.cursors[-1].closed
+
+
+def test_postgis_batch_candidates(monkeypatch):
+    refs = [Point(i, i) for i in range(0, 10, 2)]
+
+    def candidates(query, params):
+        # Rows of the candidate features of the input features, joined
+        # with their ordinality (1-based) in the array parameter.
+        if params is None:
+            return
+        for i, wkb in enumerate(params[0], start=1):
+            geom = shapely.from_wkb(wkb.adapted)
+            for j, ref in enumerate(refs):
+                if ref.distance(geom) < 1.5:
+                    yield (i - 1, f"(0,{j})", memoryview(ref.wkb))
+
+    conn = FakeConnection(candidates)
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: conn)
+    db = PostGISGeomRefDB({"dbname": "test"}, "schema", "table", "geom")
+    db._PG_geoms_EPSG = 25833
+    db._search_chunk_size = 2
+    geoms = [Point(i, i) for i in range(5)]
+    chunks = [
+        (chunk, {input_id: [row[1] for row in rows] for input_id, rows in groups})
+        for chunk, groups in db._batch_candidates(iter(geoms), 4326)
+    ]
+    # The input features are sent in chunks, as a single array parameter.
+    assert [chunk for chunk, _ in chunks] == [geoms[:2], geoms[2:4], geoms[4:]]
+    params = [params for params in conn.params if params is not None]
+    assert [[wkb.adapted for wkb in chunk_params[0]] for chunk_params in params] == [
+        [geom.wkb for geom in chunk] for chunk, _ in chunks
+    ]
+    # The candidates are mapped to the position of the input features in
+    # their chunk.
+    assert [candidates for _, candidates in chunks] == [
+        {0: ["(0,0)"], 1: ["(0,0)", "(0,1)"]},
+        {0: ["(0,1)"], 1: ["(0,1)", "(0,2)"]},
+        {0: ["(0,2)"]},
+    ]
+    query = conn.queries[conn.params.index(params[-1])]
+    assert "unnest(%s::bytea[]) WITH ORDINALITY AS g(wkb, i)" in query
+    assert "FROM schema.table" in query
+    assert "ST_Transform(ST_GeomFromWKB(g.wkb, 4326), 25833)" in query
+    assert "ST_AsBinary(ST_Transform(t.geom, 4326))" in query
+    tps = db.true_positives(geoms, 4326, lambda g1, g2: g1.equals(g2))
+    assert list(tps) == refs[:3]
+
+
+@pytest.fixture
+def server_side_db(monkeypatch):
+    def rows(query, params):
+        if "SELECT DISTINCT input_id" in query:
+            # The first feature of each chunk matches.
+            return [(0,)]
+        if query.startswith("SELECT COUNT(*)"):
+            return [(3,)]
+        if query.startswith("SELECT ST_AsBinary"):
+            return [(memoryview(Point(9, 9).wkb),)]
+        return []
+
+    conn = FakeConnection(rows)
+    monkeypatch.setattr(psycopg2, "connect", lambda **kwargs: conn)
+    db = PostGISGeomRefDB(
+        {"dbname": "test"}, "schema", "table", "geom", server_side=True
+    )
+    db._PG_geoms_EPSG = 25833
+    # The input features are loaded in three chunks.
+    db._copy_chunk_size = 2
+    return db, conn
+
+
+def _queries(conn, start):
+    return [query for query in conn.queries[start:] if query != "SELECT 1;"]
+
+
+@pytest.mark.parametrize("geoms_EPSG", [25833, 4326])
+def test_postgis_server_side_generator(server_side_db, geoms_EPSG):
+    db, conn = server_side_db
+    area_match = polygons_area_match("IoU", 0.5)
+    geoms = [Point(i, i) for i in range(5)]
+    start = len(conn.queries)
+    tps = list(db.true_positives(geoms, geoms_EPSG, area_match))
+    assert tps == [geoms[0], geoms[2], geoms[4]]
+    queries = _queries(conn, start)
+    # The temporary table is indexed once per comparison.
+    assert sum("CREATE INDEX" in query for query in queries) == 1
+    assert not any("DROP INDEX" in query for query in queries)
+    copies = [query for query in queries if query.startswith("COPY")]
+    assert len(copies) == 3
+    assert conn.copied[-1].startswith(b"PGCOPY\n\xff\r\n\x00")
+    pairs_query = next(query for query in queries if "ST_Intersection" in query)
+    if geoms_EPSG == 25833:
+        assert all("(input_id, geom)" in query for query in copies)
+        assert not any(query.startswith("UPDATE") for query in queries)
+        assert "ST_Transform" not in pairs_query
+        assert "ST_Area(g.geom)" in pairs_query
+    else:
+        # The areas are computed in the SRS of the input features, as
+        # in client-side mode.
+        assert all("(input_id, geom_in)" in query for query in copies)
+        updates = [query for query in queries if query.startswith("UPDATE")]
+        assert len(updates) == 3
+        assert "ST_Transform(geom_in, 25833)" in updates[0]
+        assert "ST_Transform(t.geom, 4326)" in pairs_query
+        assert "ST_Area(g.geom_in)" in pairs_query
+        assert "ST_Area(ST_Intersection(g.geom_in, r.geom))" in pairs_query
+    assert queries[-1].startswith("DROP TABLE IF EXISTS")
+    fps = list(db.false_positives(geoms, geoms_EPSG, area_match))
+    assert fps == [geoms[1], geoms[3]]
+
+
+def test_postgis_server_side_missing_and_counts(server_side_db):
+    db, conn = server_side_db
+    area_match = polygons_area_match("IoU", 0.5)
+    geoms = [Point(i, i) for i in range(5)]
+    start = len(conn.queries)
+    missing = list(db.missing_geometries(geoms, None, 4326, area_match))
+    assert [geom.coords[0] for geom in missing] == [(9.0, 9.0)]
+    queries = _queries(conn, start)
+    assert sum("CREATE INDEX" in query for query in queries) == 1
+    # The matched reference features are recorded for each chunk.
+    assert sum("INSERT INTO gc_matched_" in query for query in queries) == 3
+    assert any(
+        "ST_AsBinary(ST_Transform(t.geom, 4326))" in query for query in queries
+    )
+    start = len(conn.queries)
+    assert db._match_counts(geoms, None, 4326, area_match) == (3, 2, 3)
+    queries = _queries(conn, start)
+    assert sum("CREATE INDEX" in query for query in queries) == 1
+    assert sum("INSERT INTO gc_matched_" in query for query in queries) == 3
+    assert db._match_counts(geoms, None, 4326, area_match, count_missing=False) == (
+        3,
+        2,
+        None,
+    )
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import pytest
+
+from geomcompare._misc import (
+    WorkerPool,
+    _SpillBuffer,
+    iter_to_chunks,
+    iter_to_work_chunks,
+)
+
+
+class Multiplier:
+    def __init__(self, factor):
+        self.factor = factor
+
+    def multiply(self, iterable, offset=0):
+        for el in iterable:
+            yield el * self.factor + offset
+
+    def fail(self, iterable):
+        raise ValueError("failure")
+        yield
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(Multiplier(2), 2)
+    yield pool
+    pool.terminate()
+
+
+def test_iter_to_chunks():
+    assert list(iter_to_chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_to_chunks([], 2)) == []
+
+
+def test_worker_pool_imap(pool):
+    res = pool.imap("multiply", [[1, 2], [3], []], offset=1)
+    assert sorted(res) == [3, 5, 7]
+    # Workers stay alive across calls.
+    assert sorted(pool.imap("multiply", [[10]])) == [20]
+
+
+def test_worker_pool_error(pool):
+    with pytest.raises(ValueError):
+        list(pool.imap("fail", [[1]]))
+    assert sorted(pool.imap("multiply", [[1], [2]])) == [2, 4]
+
+
+def test_worker_pool_unpicklable_task(pool):
+    res = pool.imap("multiply", [[1]], offset=lambda x: x)
+    with pytest.raises(pickle.PicklingError):
+        next(res)
+    # The pool is still usable.
+    assert sorted(pool.imap("multiply", [[1]])) == [2]
+
+
+def test_worker_pool_early_stop(pool):
+    res = pool.imap("multiply", [range(10000), range(10000)])
+    assert next(res) == 0
+    res.close()
+    # The cancelled call does not leak results into the next one.
+    assert sorted(pool.imap("multiply", [[1]])) == [2]
+
+
+def test_worker_pool_concurrent_imap(pool):
+    a = pool.imap("multiply", [range(100), range(100, 200)])
+    next(a)
+    b = pool.imap("multiply", [range(50)], offset=1)
+    # Starting a call does not cancel the other running calls.
+    assert sorted(b) == [2 * i + 1 for i in range(50)]
+    assert len(list(a)) == 199
+    # Calls consumed alternately.
+    pairs = list(
+        zip(pool.imap("multiply", [range(30)]), pool.imap("multiply", [range(30)]))
+    )
+    assert len(pairs) == 30
+
+
+def test_spill_buffer():
+    buffer = _SpillBuffer(maxsize=2)
+    for i in range(5):
+        buffer.append(i)
+    assert len(buffer) == 5
+    assert len(buffer._head) == 2
+    assert [buffer.popleft() for _ in range(3)] == [0, 1, 2]
+    buffer.append(5)
+    assert [buffer.popleft() for _ in range(3)] == [3, 4, 5]
+    assert len(buffer) == 0
+    buffer.close()
+
+
+def test_worker_pool_bounded_buffers():
+    pool = WorkerPool(Multiplier(2), 2, batch_size=1, max_pending=2)
+    try:
+        a = pool.imap("multiply", [range(50), range(50)])
+        next(a)
+        # The results of the unconsumed call are buffered while the other
+        # call runs, at most max_pending of them in memory.
+        assert sorted(pool.imap("multiply", [range(100)])) == list(range(0, 200, 2))
+        (buffer,) = pool._buffers.values()
+        assert len(buffer._head) <= 2
+        assert len(list(a)) == 99
+    finally:
+        pool.terminate()
+
+
+def test_worker_pool_max_calls():
+    pool = WorkerPool(Multiplier(2), 1, max_calls=1)
+    try:
+        a = pool.imap("multiply", [range(10)])
+        next(a)
+        with pytest.raises(RuntimeError):
+            next(pool.imap("multiply", [[1]]))
+        a.close()
+        assert sorted(pool.imap("multiply", [[1]])) == [2]
+    finally:
+        pool.terminate()
+
+
+def test_worker_pool_close_with_pending_results():
+    pool = WorkerPool(Multiplier(2), 2, batch_size=1, max_pending=1)
+    res = pool.imap("multiply", [range(1000), range(1000)])
+    next(res)
+    pool.close()
+    assert not any(p.is_alive() for p in pool._procs)
+
+
+def test_iter_to_work_chunks():
+    elements = [1, 50, 2, 3, 40, 4]
+    chunks = list(iter_to_work_chunks(iter(elements), 3, cost_func=lambda x: x))
+    # Heaviest elements first, in chunks of roughly equal cost.
+    assert chunks[0] == [50]
+    assert sorted(el for chunk in chunks for el in chunk) == sorted(elements)
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert list(iter_to_work_chunks(elements, 4)) == [[1, 50, 2, 3], [40, 4]]